@@ -7,8 +7,8 @@ BASE_CURRENCY = "USDT"
 EXCHANGE = "binance"
 MODE = "paper"
 
-# Symbols you want to track
-SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+# Symbols you want to track (comma-separated SYMBOLS env overrides, e.g. for simulations)
+SYMBOLS = [s.strip() for s in os.getenv("SYMBOLS", "BTCUSDT,ETHUSDT,SOLUSDT").split(",") if s.strip()]
 
 # ========== Paths ==========
 LOG_DIR = os.getenv("LOG_DIR", "logs")
@@ -18,8 +18,9 @@ TRADE_LOG_PATH = os.path.join(LOG_DIR, "trade_log.csv")
 JOURNAL_PATH    = os.path.join(LOG_DIR, "journal.csv")
 BALANCE_LOG_PATH = os.path.join(LOG_DIR, "balance_history.csv")
 
-# ML log stays in project root (do NOT move)
-ML_LOG_FILE = "ml_log.csv"
+# ML log stays in project root (do NOT move); override only for isolated replay/simulation runs
+ML_LOG_FILE = os.getenv("ML_LOG_FILE", "ml_log.csv")
+TERMINAL_LOG_FILE = os.getenv("TERMINAL_LOG_FILE", "terminal_log.txt")
 
 # ========== Telegram ==========
 TELEGRAM_TOKEN   = os.getenv("TELEGRAM_TOKEN", "")   # set in .env
@@ -28,14 +29,32 @@ TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "") # set in .env
 # ========== Engine / Risk ==========
 INITIAL_BALANCE = float(os.getenv("INITIAL_BALANCE", "5000"))
 
-# Timeframe and loop interval
+# Timeframe and loop cadence
 TIMEFRAME = os.getenv("TIMEFRAME", "5m")         # more trades: "3m"
+# Entries are evaluated once per closed TIMEFRAME bar, ENTRY_DELAY_MS after the close
+ENTRY_DELAY_MS = int(os.getenv("ENTRY_DELAY_MS", "300"))
+# Open-position SL/TP monitoring cadence between bar closes
 EVALUATION_INTERVAL = int(os.getenv("EVAL_SECS", "60"))
 
 # Entry filters — loosen carefully to increase trade count
 MIN_TREND_STRENGTH = float(os.getenv("MIN_TREND_STRENGTH", "0.0008"))  # 0.08%
 MIN_VOLATILITY     = float(os.getenv("MIN_VOLATILITY", "0.0009"))      # 0.09%
 
+# Multi-timeframe: fetch one MTF_BASE_INTERVAL stream per symbol and derive TIMEFRAME
+# (and any other multiple of it, e.g. 3m/5m/15m/1h) locally — no extra REST calls per timeframe
+MTF_ENABLED       = os.getenv("MTF_ENABLED", "0") == "1"
+MTF_BASE_INTERVAL = os.getenv("MTF_BASE_INTERVAL", "1m")
+MTF_HISTORY_BARS  = int(os.getenv("MTF_HISTORY_BARS", "3000"))    # base bars kept per symbol (3000×1m ≈ 50h)
+MTF_REFRESH_SECS  = float(os.getenv("MTF_REFRESH_SECS", "1.0"))   # base refetch at most this often per symbol
+
+# Record every kline response the bot consumes (NDJSON, .gz ok) for offline replay
+# (scripts/replay_run.py). Recording runs the scan in-process (SHARD_WORKERS ignored).
+RECORD_KLINES = os.getenv("RECORD_KLINES", "")
+
+# Worker processes for the per-symbol scan (fetch -> features -> signal -> ML).
+# 0/1 = in-process; use >1 for large SYMBOLS lists (main process stays the only log writer)
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+
 # Cooldown per symbol after a close (seconds)
 COOLDOWN_SECONDS = int(os.getenv("COOLDOWN_SECONDS", "600"))
 
@@ -53,6 +72,51 @@ TRAILING_GAP_ATR = 1.1
 # Price buffer to avoid wick noise (0.02% default)
 PRICE_BUFFER_PCT = float(os.getenv("PRICE_BUFFER_PCT", "0.0002"))
 
+# ========== ML ==========
+# Model bundles written by retrain_ml.py: MODEL_DIR/<version>/ plus an ACTIVE pointer file
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+# "numpy" = built-in tree evaluator (ml/tree_inference.py, no xgboost/lightgbm import); "native" = the libraries
+ML_BACKEND = os.getenv("ML_BACKEND", "numpy").strip().lower()
+# How often the running bot re-reads MODEL_DIR/ACTIVE; a new version is loaded in the background
+# and swapped in between cycles (0 = load once at startup)
+MODEL_POLL_SECS = float(os.getenv("MODEL_POLL_SECS", "30"))
+# ML entry gate: skip a candidate the classifier predicts as SL or scores below this confidence
+ML_MIN_CONFIDENCE = float(os.getenv("ML_MIN_CONFIDENCE", "0.5"))
+# Point-in-time feature store (ml/feature_store.py): FEATURE_STORE_DIR/<timeframe>/<SYMBOL>.npz
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", "features")
+
+# ========== Trade ledger ==========
+# Append-only trade event log (logger/ledger.py); trade_log/journal/ml_log CSVs are projected
+# from it by a background thread every LEDGER_PROJECT_SECS (0 = inline, right after each event)
+LEDGER_PATH = os.getenv("LEDGER_PATH", os.path.join(LOG_DIR, "trade_events.ndjson"))
+LEDGER_PROJECT_SECS = float(os.getenv("LEDGER_PROJECT_SECS", "1.0"))
+
+# ========== Mark-to-market ==========
+# Paper accounting (engine/mark_to_market.py): each trade stakes POSITION_STAKE_PCT % of the balance
+# at open; TP_SCALE_OUT fractions of the stake are booked at TP1/TP2 and the rest at the close.
+# Open trades are valued at every cycle's closes and equity is appended to EQUITY_CURVE_PATH
+# (fixed-size binary records, "" = off)
+POSITION_STAKE_PCT = float(os.getenv("POSITION_STAKE_PCT", "10"))
+TP_SCALE_OUT = [float(f) for f in os.getenv("TP_SCALE_OUT", "0.33,0.33").split(",") if f.strip()]
+EQUITY_CURVE_PATH = os.getenv("EQUITY_CURVE_PATH", os.path.join(LOG_DIR, "equity_curve.bin"))
+
+# ========== Portfolios ==========
+# Several paper portfolios in one process (engine/portfolio.py): a JSON file of {name: {config
+# overrides}}. Each gets its own LOG_DIR/<name>/ logs, open trades, cooldowns and balance; the
+# market scan, features and ML batch are shared. "" = one portfolio on the paths above
+PORTFOLIOS_FILE = os.getenv("PORTFOLIOS_FILE", "")
+
+# ========== Checkpoint ==========
+# Engine state (cooldowns, ATR cache, last bars, MTF candle buffers) written every cycle and
+# restored on start (engine/checkpoint.py); "*.npz" = binary format, "*.json" = text, "" = off
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(LOG_DIR, "engine_checkpoint.npz"))
+
+# ========== Metrics ==========
+# Per-stage latency histograms, overrun count and logger bytes (Prometheus text format)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_FILE    = os.getenv("METRICS_FILE", os.path.join(LOG_DIR, "metrics.prom"))
+METRICS_PORT    = int(os.getenv("METRICS_PORT", "0"))   # 0 = no HTTP endpoint (file only)
+
 # ========== Misc ==========
 # Max expected duration in seconds before forcing close (optional; set 0 to disable)
 MAX_TRADE_DURATION_SEC = int(os.getenv("MAX_TRADE_DURATION_SEC", "0"))
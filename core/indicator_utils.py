@@ -1,76 +1,45 @@
 # core/indicator_utils.py
-import os
-import pandas as pd
+# pandas is imported on first use (keeps `import main` cheap; see scripts/profile_startup.py)
+from typing import TYPE_CHECKING
+from utils import clock
 
-try:
-    from binance.client import Client
-except Exception:
-    Client = None  # allow import even if lib missing (handled below)
+from data.kline_source import get_klines
 
-_client = None
+if TYPE_CHECKING:
+    import pandas as pd
 
-def _strip_env(s: str) -> str:
-    if s is None:
-        return ""
-    # Remove surrounding spaces and Windows CRs
-    return s.strip().replace("\r", "").replace("\n", "")
-
-def _get_client():
-    """
-    Lazy, safe Binance Client constructor:
-    - Strips CR/LF/whitespace from keys.
-    - If keys absent/invalid or library missing, returns a no-op public client (if possible).
-    """
-    global _client
-    if _client is not None:
-        return _client
-
-    if Client is None:
-        raise RuntimeError("python-binance not installed. Please `pip install python-binance`.")
-
-    key = _strip_env(os.getenv("BINANCE_API_KEY"))
-    secret = _strip_env(os.getenv("BINANCE_API_SECRET"))
-
-    try:
-        if key and secret:
-            _client = Client(api_key=key, api_secret=secret)
-        else:
-            # Public-only client for market data (klines don’t need auth)
-            _client = Client()
-    except Exception as e:
-        # As a last resort, try an unauthenticated client for public endpoints
-        try:
-            _client = Client()
-        except Exception as e2:
-            raise RuntimeError(f"Failed to initialize Binance client: {e} | {e2}")
-
-    return _client
-
-def fetch_recent_candles(symbol, interval="5m", limit=100):
+def fetch_recent_candles(symbol, interval="5m", limit=100, closed_only=False):
     """
     Returns a DataFrame with columns ['open','high','low','close'] as floats.
     Uses public klines endpoint; auth not required.
+    closed_only=True drops the bar that is still forming.
     """
+    import pandas as pd
     try:
-        client = _get_client()
-        klines = client.get_klines(symbol=symbol, interval=interval, limit=limit)
+        klines = get_klines(symbol, interval, limit=limit)
         df = pd.DataFrame(klines, columns=[
             "timestamp","open","high","low","close","volume",
             "close_time","quote_asset_volume","num_trades",
             "taker_buy_base","taker_buy_quote","ignore"
         ])
+        if closed_only and not df.empty:
+            df = df[df["close_time"].astype("int64") < clock.now() * 1000]
         if df.empty:
             return pd.DataFrame(columns=["open","high","low","close"]).astype(float)
-        return df[["open","high","low","close"]].astype(float)
+        return df[["open","high","low","close"]].astype(float).reset_index(drop=True)
     except Exception as e:
         print(f"❌ fetch_recent_candles error [{symbol}]: {e}")
         return pd.DataFrame(columns=["open","high","low","close"]).astype(float)
 
-def calculate_atr(df: pd.DataFrame, period: int = 14) -> float:
+def calculate_atr(df: "pd.DataFrame" = None, period: int = 14, symbol: str = None, timeframe: str = None, limit: int = 100) -> float:
     """
     Simple ATR (SMA of True Range). Returns 0.0 if insufficient rows or invalid.
+    Pass symbol/timeframe instead of df to use closed bars of any (derived) timeframe.
     """
+    import pandas as pd
     try:
+        if df is None and symbol:
+            df = fetch_recent_candles(symbol, interval=timeframe or "5m", limit=limit, closed_only=True)
         if df is None or df.empty:
             return 0.0
         d = df.copy()
@@ -1,10 +1,18 @@
 # core/signal_engine.py
-from config import MIN_TREND_STRENGTH, MIN_VOLATILITY
+from config import MIN_TREND_STRENGTH, MIN_VOLATILITY, TIMEFRAME
 
-def generate_signal(symbol, candle):
+def generate_signal(symbol, candle=None, timeframe=None, params=None):
     """
     Decide whether to open a fake LONG or SHORT based on simple trend + volatility logic.
+    With candle=None the latest closed bar of `timeframe` (default TIMEFRAME) is used;
+    derived timeframes are served by the local resampler when it is installed.
+    params may override MIN_TREND_STRENGTH / MIN_VOLATILITY (config names), e.g. per portfolio.
     """
+    if candle is None:
+        from data.price_feed import get_latest_candle
+        candle = get_latest_candle(symbol, timeframe or TIMEFRAME, closed_only=True)
+        if not candle:
+            return None
     close = float(candle["close"])
     open_ = float(candle["open"])
     high  = float(candle["high"])
@@ -13,7 +21,9 @@ def generate_signal(symbol, candle):
     trend_strength = (close - open_) / max(open_, 1e-9)
     volatility = (high - low) / max(open_, 1e-9)
 
-    if abs(trend_strength) < MIN_TREND_STRENGTH or volatility < MIN_VOLATILITY:
+    min_trend = params.get("MIN_TREND_STRENGTH", MIN_TREND_STRENGTH) if params else MIN_TREND_STRENGTH
+    min_vol = params.get("MIN_VOLATILITY", MIN_VOLATILITY) if params else MIN_VOLATILITY
+    if abs(trend_strength) < min_trend or volatility < min_vol:
         return None
 
     direction = "LONG" if trend_strength > 0 else "SHORT"
@@ -11,3 +11,35 @@ def get_historical_data(symbol, interval, lookback, api_key, api_secret):
     df['low'] = pd.to_numeric(df['low'])
     df['close'] = pd.to_numeric(df['close'])
     return df
+
+
+_KLINE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_vol', 'trades', 'tb_base_vol', 'tb_quote_vol', 'ignore']
+
+
+def klines_to_frame(klines):
+    """Raw klines -> DataFrame with numeric timestamp/open/high/low/close/volume."""
+    df = pd.DataFrame(klines, columns=_KLINE_COLUMNS)
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        df[col] = pd.to_numeric(df[col])
+    df['timestamp'] = df['timestamp'].astype('int64')
+    return df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+
+
+def fetch_candle_history(symbol, interval, start_ms, end_ms=None, page=1000):
+    """
+    Closed-bar history between start_ms and end_ms (epoch ms), paged forward through
+    data.kline_source so recorded / simulated sources work too.
+    """
+    from data.kline_source import get_klines
+    from utils import clock
+    end_ms = int(end_ms if end_ms is not None else clock.now() * 1000)
+    rows, cursor = [], int(start_ms)
+    while cursor < end_ms:
+        batch = get_klines(symbol, interval, limit=page, start_time=cursor, end_time=end_ms)
+        if not batch:
+            break
+        rows.extend(k for k in batch if int(k[6]) < end_ms)
+        cursor = int(batch[-1][0]) + 1
+        if len(batch) < page:
+            break
+    return klines_to_frame(rows)
@@ -0,0 +1,82 @@
+# data/kline_source.py
+# Single choke point for raw Binance klines. Every candle the bot consumes goes through
+# get_klines(), so alternative sources (resampled feed, recorder, replay, simulation)
+# can be plugged in with set_source() without touching the callers.
+
+import os
+
+_client = None
+_source = None   # callable(symbol, interval, limit, start_time, end_time) -> list of klines
+
+
+def _strip_env(s: str) -> str:
+    if s is None:
+        return ""
+    # Remove surrounding spaces and Windows CRs
+    return s.strip().replace("\r", "").replace("\n", "")
+
+
+def _get_client():
+    """
+    Lazy, safe Binance Client constructor:
+    - Strips CR/LF/whitespace from keys.
+    - If keys absent/invalid or library missing, returns a no-op public client (if possible).
+    """
+    global _client
+    if _client is not None:
+        return _client
+
+    # Imported here: python-binance is one of the slowest imports and only live fetches need it
+    try:
+        from binance.client import Client
+    except Exception:
+        raise RuntimeError("python-binance not installed. Please `pip install python-binance`.")
+
+    key = _strip_env(os.getenv("BINANCE_API_KEY"))
+    secret = _strip_env(os.getenv("BINANCE_API_SECRET"))
+
+    try:
+        if key and secret:
+            _client = Client(api_key=key, api_secret=secret)
+        else:
+            # Public-only client for market data (klines don’t need auth)
+            _client = Client()
+    except Exception as e:
+        # As a last resort, try an unauthenticated client for public endpoints
+        try:
+            _client = Client()
+        except Exception as e2:
+            raise RuntimeError(f"Failed to initialize Binance client: {e} | {e2}")
+
+    return _client
+
+
+def live_klines(symbol, interval, limit=500, start_time=None, end_time=None):
+    """Raw klines from the Binance REST API (public endpoint)."""
+    kwargs = {"symbol": symbol, "interval": interval, "limit": int(limit)}
+    if start_time is not None:
+        kwargs["startTime"] = int(start_time)
+    if end_time is not None:
+        kwargs["endTime"] = int(end_time)
+    return _get_client().get_klines(**kwargs)
+
+
+def get_klines(symbol, interval, limit=500, start_time=None, end_time=None):
+    """
+    Raw klines [open_time, open, high, low, close, volume, close_time, ...] oldest first.
+    start_time/end_time are epoch milliseconds (Binance semantics).
+    """
+    fn = _source or live_klines
+    return fn(symbol, interval, limit=limit, start_time=start_time, end_time=end_time)
+
+
+def set_source(fn):
+    """Install an alternative kline source (None restores the live API). Returns the previous one."""
+    global _source
+    prev = _source
+    _source = fn
+    return prev
+
+
+def get_source():
+    return _source or live_klines
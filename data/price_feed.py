@@ -1,18 +1,20 @@
-import os
-from binance.client import Client
-from dotenv import load_dotenv
+from data.kline_source import get_klines
+from utils import clock
 
-load_dotenv()
 
-
-def get_latest_candle(symbol, interval="5m"):
-    api_key = os.getenv('BINANCE_API_KEY')
-    api_secret = os.getenv('BINANCE_API_SECRET')
-    client = Client(api_key, api_secret)
-
-    candles = client.get_klines(symbol=symbol, interval=interval, limit=1)
+def get_latest_candle(symbol, interval="5m", closed_only=False):
+    """
+    Latest kline as a candle dict.
+    closed_only=True returns the most recent *closed* bar instead of the one still forming
+    (used right after a bar close, when the new bar is only a few hundred ms old).
+    """
+    # Shared client via data.kline_source: constructing a Client per call pings the API every time.
+    candles = get_klines(symbol, interval, limit=2 if closed_only else 1)
+    if closed_only:
+        now_ms = clock.now() * 1000
+        candles = [c for c in candles if float(c[6]) < now_ms]
     if candles:
-        c = candles[0]
+        c = candles[-1]
         return {
             'open': float(c[1]),
             'high': float(c[2]),
@@ -22,4 +24,3 @@ def get_latest_candle(symbol, interval="5m"):
             'volatility': abs(float(c[2]) - float(c[3])) / float(c[4])
         }
     return None
-
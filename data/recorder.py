@@ -0,0 +1,157 @@
+# data/recorder.py
+# Market-data recorder and replay source for data.kline_source.
+#
+# Recording (NDJSON, optionally gzip when the path ends with .gz), one object per line:
+#   {"start": <clock>, "v": 1, "cfg": {...}}                     header (bot start time + data config)
+#   {"t": <clock>, "s": symbol, "i": interval, "l": limit, "st": start_ms, "et": end_ms, "k": [klines]}
+#   (failed requests store "err": message instead of "k")
+# Klines are stored exactly as the API returned them, so replay is bit-for-bit.
+#
+# Replay serves the recorded responses back through the same get_klines() interface with a
+# SimClock that jumps to each record's timestamp, so run_bot runs as fast as the CPU allows.
+
+import gzip
+import json
+import threading
+from collections import defaultdict, deque
+from data import kline_source
+from utils import clock
+
+FORMAT_VERSION = 1
+
+
+class ReplayFinished(Exception):
+    """Raised (from the simulated sleep) once every recorded response has been served."""
+
+
+def _open(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class KlineRecorder:
+    """Kline source wrapper: forwards to `upstream` and appends every response to `path`."""
+
+    def __init__(self, path: str, upstream=None):
+        from config import TIMEFRAME, MTF_ENABLED, MTF_BASE_INTERVAL, MTF_HISTORY_BARS, MTF_REFRESH_SECS
+        self.path = path
+        self._upstream = upstream or kline_source.live_klines
+        self._lock = threading.Lock()
+        self._f = _open(path, "a")
+        # Settings that change which requests the bot makes; replay must run with the same ones
+        cfg = {"TIMEFRAME": TIMEFRAME, "MTF_ENABLED": "1" if MTF_ENABLED else "0",
+               "MTF_BASE_INTERVAL": MTF_BASE_INTERVAL, "MTF_HISTORY_BARS": str(MTF_HISTORY_BARS),
+               "MTF_REFRESH_SECS": str(MTF_REFRESH_SECS)}
+        self._write({"start": clock.now(), "v": FORMAT_VERSION, "cfg": cfg})
+
+    def _write(self, obj):
+        with self._lock:
+            self._f.write(json.dumps(obj, separators=(",", ":")) + "\n")
+            self._f.flush()
+
+    def __call__(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        t = clock.now()
+        rec = {"t": t, "s": symbol, "i": interval, "l": int(limit), "st": start_time, "et": end_time}
+        try:
+            rows = self._upstream(symbol, interval, limit=limit, start_time=start_time, end_time=end_time)
+        except Exception as e:
+            # Failures are part of the tape too, otherwise replay would drift out of step
+            rec["err"] = str(e)
+            self._write(rec)
+            raise
+        rec["k"] = rows
+        self._write(rec)
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+
+class KlineReplay:
+    """
+    Kline source serving a recording. Responses are matched on the request key
+    (symbol, interval, limit, start, end) in recorded order, so concurrent/sharded request
+    interleavings still line up; the clock is moved to each record's timestamp first.
+    """
+
+    def __init__(self, path: str, sim_clock: clock.SimClock = None):
+        self.start = None
+        self.config = {}
+        self.last_t = 0.0
+        self._queues = defaultdict(deque)
+        self.total = 0
+        with _open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                rec = json.loads(line)
+                if "start" in rec:
+                    if self.start is None:   # one session per file; later headers are ignored
+                        self.start = float(rec["start"])
+                        self.config = rec.get("cfg") or {}
+                    continue
+                key = (rec["s"], rec["i"], int(rec["l"]), rec.get("st"), rec.get("et"))
+                self._queues[key].append((float(rec["t"]), rec.get("k"), rec.get("err")))
+                self.total += 1
+                self.last_t = max(self.last_t, float(rec["t"]))
+        self.served = 0
+        self.misses = 0
+        self.clock = sim_clock
+
+    @property
+    def exhausted(self) -> bool:
+        return self.served >= self.total
+
+    def __call__(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        q = self._queues.get((symbol, interval, int(limit), start_time, end_time))
+        if not q:
+            self.misses += 1
+            raise LookupError(f"replay has no recorded response for {symbol} {interval} limit={limit}")
+        t, rows, err = q.popleft()
+        if self.clock is not None:
+            self.clock.advance_to(t)
+        self.served += 1
+        if err is not None:
+            raise RuntimeError(err)
+        return rows
+
+
+def install_recorder(path: str) -> KlineRecorder:
+    """Record everything the current kline source returns (install before the resampler)."""
+    rec = KlineRecorder(path, upstream=kline_source.get_source())
+    kline_source.set_source(rec)
+    return rec
+
+
+def load_replay_config(path: str) -> dict:
+    """Data settings stored in the recording header (apply to os.environ before importing config)."""
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                return json.loads(line).get("cfg") or {}
+    return {}
+
+
+# Give up this long (simulated seconds) after the last record if requests stop matching
+_OVERRUN_SECS = 3600
+
+
+def install_replay(path: str) -> KlineReplay:
+    """
+    Replace the kline source with a recording and the wall clock with a SimClock that starts
+    at the recorded bot start; the simulated sleep raises ReplayFinished when the tape ends.
+    """
+    replay = KlineReplay(path)
+
+    def _stop_when_done(_clock, _seconds):
+        if replay.exhausted or _clock.now() > replay.last_t + _OVERRUN_SECS:
+            raise ReplayFinished(f"served {replay.served}/{replay.total} recorded responses ({replay.misses} misses)")
+
+    first_t = min((q[0][0] for q in replay._queues.values() if q), default=0.0)
+    replay.clock = clock.SimClock(replay.start if replay.start is not None else first_t, on_sleep=_stop_when_done)
+    clock.set_clock(replay.clock)
+    kline_source.set_source(replay)
+    return replay
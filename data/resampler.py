@@ -0,0 +1,220 @@
+# data/resampler.py
+# Multi-timeframe feed: one base kline stream per symbol (default 1m), every higher
+# timeframe (3m/5m/15m/1h/...) rolled up locally and kept up to date incrementally.
+#
+# The feed is itself a kline source (same signature as data.kline_source.get_klines), so
+# once installed, get_latest_candle / fetch_recent_candles / calculate_atr / build_features /
+# generate_signal can ask for any derived timeframe without extra REST calls.
+#
+# Roll-up per bucket: open = first base open, high = max, low = min, close = last close,
+# volume = sum. Buckets are aligned to epoch (UTC), like Binance.
+
+import bisect
+import math
+import threading
+from data import kline_source
+from utils import clock as _clock
+from engine.scheduler import timeframe_seconds
+from utils.terminal_logger import tlog
+
+_MAX_PAGE = 1000   # Binance klines page size
+
+
+def _kline_row(start_ms: int, step_ms: int, bar) -> list:
+    o, h, l, c, v = bar
+    # Same layout as the REST API; extras we don't aggregate are zeroed.
+    return [start_ms, o, h, l, c, v, start_ms + step_ms - 1, 0.0, 0, 0.0, 0.0, "0"]
+
+
+class MultiTimeframeFeed:
+    def __init__(self, base_interval: str = "1m", history_bars: int = 3000, refresh_secs: float = 1.0,
+                 upstream=None, clock=None):
+        self.base_interval = base_interval
+        self.base_ms = timeframe_seconds(base_interval) * 1000
+        self.history_bars = max(100, int(history_bars))
+        self.refresh_secs = float(refresh_secs)
+        self._upstream = upstream or kline_source.live_klines
+        self._clock = clock or _clock.now
+        self._lock = threading.RLock()
+        self._base = {}          # {symbol: {open_ms: [o, h, l, c, v]}}
+        self._times = {}         # {symbol: sorted [open_ms]}
+        self._derived = {}       # {(symbol, tf_ms): {bucket_ms: [o, h, l, c, v]}}
+        self._buckets = {}       # {(symbol, tf_ms): sorted [bucket_ms]}
+        self._last_refresh = {}  # {symbol: epoch seconds}
+
+    # ---------- derived timeframes ----------
+    def supports(self, interval: str) -> bool:
+        """Any whole multiple of the base interval up to 1d (weeks are Monday-aligned on Binance, epoch is not)."""
+        try:
+            tf_ms = timeframe_seconds(interval) * 1000
+        except ValueError:
+            return False
+        return tf_ms >= self.base_ms and tf_ms % self.base_ms == 0 and tf_ms <= 86_400_000
+
+    def _rollup(self, symbol: str, tf_ms: int, bucket: int):
+        times = self._times[symbol]
+        base = self._base[symbol]
+        lo = bisect.bisect_left(times, bucket)
+        hi = bisect.bisect_left(times, bucket + tf_ms)
+        key = (symbol, tf_ms)
+        series, order = self._derived[key], self._buckets[key]
+        if lo >= hi:
+            if bucket in series:
+                del series[bucket]
+                order.remove(bucket)
+            return
+        first = base[times[lo]]
+        agg = [first[0], first[1], first[2], base[times[hi - 1]][3], 0.0]
+        for t in times[lo:hi]:
+            b = base[t]
+            if b[1] > agg[1]: agg[1] = b[1]
+            if b[2] < agg[2]: agg[2] = b[2]
+            agg[4] += b[4]
+        if bucket not in series:
+            bisect.insort(order, bucket)
+        series[bucket] = agg
+
+    def _register(self, symbol: str, tf_ms: int):
+        """First request for a timeframe: build it from the whole base buffer once."""
+        key = (symbol, tf_ms)
+        self._derived[key], self._buckets[key] = {}, []
+        times = self._times.get(symbol) or []
+        if not times:
+            return
+        first_full = -(-times[0] // tf_ms) * tf_ms   # skip a leading bucket we only partially hold
+        for bucket in sorted({t // tf_ms * tf_ms for t in times if t >= first_full}):
+            self._rollup(symbol, tf_ms, bucket)
+
+    # ---------- base stream ----------
+    def ingest(self, symbol: str, klines):
+        """Merge raw base-interval klines (new or revised bars) and update derived buckets."""
+        if not klines:
+            return
+        with self._lock:
+            base = self._base.setdefault(symbol, {})
+            times = self._times.setdefault(symbol, [])
+            touched = set()
+            for k in klines:
+                t = int(k[0])
+                if t not in base:
+                    if times and t < times[-1]:
+                        bisect.insort(times, t)
+                    else:
+                        times.append(t)
+                base[t] = [float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])]
+                touched.add(t)
+
+            # Bound memory: keep the newest history_bars base bars
+            drop = len(times) - self.history_bars
+            if drop > 0:
+                for t in times[:drop]:
+                    base.pop(t, None)
+                del times[:drop]
+
+            for (sym, tf_ms), order in self._buckets.items():
+                if sym != symbol:
+                    continue
+                first_full = -(-times[0] // tf_ms) * tf_ms
+                while order and order[0] < first_full:
+                    self._derived[(sym, tf_ms)].pop(order.pop(0), None)
+                for bucket in {t // tf_ms * tf_ms for t in touched if t >= first_full}:
+                    self._rollup(symbol, tf_ms, bucket)
+
+    def snapshot(self) -> dict:
+        """Base buffers as {symbol: (n, 6) float64 array of [open_ms, o, h, l, c, v]} (engine.checkpoint)."""
+        import numpy as np
+        with self._lock:
+            return {sym: np.array([[t] + self._base[sym][t] for t in times], dtype=np.float64).reshape(-1, 6)
+                    for sym, times in self._times.items() if times}
+
+    def restore(self, bars: dict) -> int:
+        """
+        Seed base buffers from snapshot() rows; the next refresh() then only fetches the bars
+        since (or warms up from scratch when the gap is more than a page). Returns bars restored.
+        """
+        n = 0
+        for symbol, rows in bars.items():
+            self.ingest(symbol, [[int(r[0]), *r[1:6]] for r in rows])
+            n += len(rows)
+        return n
+
+    def _fetch_base(self, symbol: str, limit: int, end_time=None):
+        return self._upstream(symbol, self.base_interval, limit=limit, start_time=None, end_time=end_time)
+
+    def refresh(self, symbol: str, force: bool = False):
+        """Pull only the base bars that are new (or still forming) since the last refresh."""
+        now = self._clock()
+        if not force and now - self._last_refresh.get(symbol, 0.0) < self.refresh_secs:
+            return
+        with self._lock:
+            times = self._times.get(symbol)
+            last_open = times[-1] if times else None
+        if last_open is None:
+            self._warm_up(symbol)
+        else:
+            missing = int((now * 1000 - last_open) // self.base_ms) + 2
+            if missing > _MAX_PAGE:
+                self._warm_up(symbol)   # too far behind: rebuild rather than leave a gap
+            else:
+                self.ingest(symbol, self._fetch_base(symbol, max(2, missing)))
+        self._last_refresh[symbol] = now
+
+    def _warm_up(self, symbol: str):
+        pages, end_time, want = [], None, self.history_bars
+        while want > 0:
+            requested = min(_MAX_PAGE, want)
+            page = self._fetch_base(symbol, requested, end_time=end_time)
+            if not page:
+                break
+            pages.append(page)
+            want -= len(page)
+            end_time = int(page[0][0]) - 1
+            if len(page) < requested:
+                break   # exchange has no older history
+        for page in reversed(pages):
+            self.ingest(symbol, page)
+        tlog(f"🕯️ {symbol}: warmed {sum(len(p) for p in pages)} {self.base_interval} bars for local resampling.")
+
+    # ---------- kline source interface ----------
+    def get_klines(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        if start_time is not None or end_time is not None or not self.supports(interval):
+            return self._upstream(symbol, interval, limit=limit, start_time=start_time, end_time=end_time)
+        self.refresh(symbol)
+        tf_ms = timeframe_seconds(interval) * 1000
+        with self._lock:
+            if tf_ms == self.base_ms:
+                times = self._times.get(symbol) or []
+                base = self._base.get(symbol, {})
+                return [_kline_row(t, tf_ms, base[t]) for t in times[-int(limit):]]
+            key = (symbol, tf_ms)
+            if key not in self._buckets:
+                self._register(symbol, tf_ms)
+            series = self._derived[key]
+            return [_kline_row(b, tf_ms, series[b]) for b in self._buckets[key][-int(limit):]]
+
+    def capacity(self, interval: str) -> int:
+        """How many bars of `interval` the base buffer can serve."""
+        return math.floor(self.history_bars * self.base_ms / (timeframe_seconds(interval) * 1000))
+
+
+_feed = None
+
+
+def get_feed():
+    return _feed
+
+
+def install_feed(base_interval: str = None, history_bars: int = None, refresh_secs: float = None):
+    """Create the process-wide feed and route data.kline_source through it (idempotent)."""
+    global _feed
+    if _feed is not None:
+        return _feed
+    from config import MTF_BASE_INTERVAL, MTF_HISTORY_BARS, MTF_REFRESH_SECS
+    _feed = MultiTimeframeFeed(
+        base_interval=base_interval or MTF_BASE_INTERVAL,
+        history_bars=history_bars or MTF_HISTORY_BARS,
+        refresh_secs=MTF_REFRESH_SECS if refresh_secs is None else refresh_secs,
+        upstream=kline_source.get_source(),
+    )
+    kline_source.set_source(_feed.get_klines)
+    return _feed
@@ -0,0 +1,103 @@
+# data/simulator.py
+# Historical market simulator for running the real run_bot loop faster than real time.
+#
+# HistoricalMarket is a kline source (same signature as data.kline_source.get_klines) over
+# stored base-interval history (e.g. 1m) per symbol. Requests are answered *as of the
+# simulated clock*: only base bars that have closed by clock.now() are visible, any multiple
+# of the base interval is rolled up on the fly, and the bar still forming is built from the
+# base bars closed so far, so nothing after "now" can leak into a decision.
+#
+# install_simulation() swaps in the market and a SimClock; the simulated sleep raises
+# SimulationFinished once the clock passes the end of the history.
+
+import numpy as np
+from data import kline_source
+from data.resampler import _kline_row
+from engine.scheduler import timeframe_seconds
+from utils import clock
+
+
+class SimulationFinished(Exception):
+    """Raised (from the simulated sleep) when the simulated clock reaches the end of history."""
+
+
+class HistoricalMarket:
+    def __init__(self, histories: dict, base_interval: str = "1m"):
+        """histories: {symbol: DataFrame with timestamp(ms open), open, high, low, close[, volume]}."""
+        self.base_interval = base_interval
+        self.base_ms = timeframe_seconds(base_interval) * 1000
+        self._data = {}
+        for symbol, df in histories.items():
+            df = df.sort_values("timestamp").drop_duplicates("timestamp")
+            vol = df["volume"] if "volume" in df.columns else 0.0
+            self._data[symbol] = (
+                df["timestamp"].to_numpy(dtype="int64"),
+                np.column_stack([df["open"], df["high"], df["low"], df["close"],
+                                 np.broadcast_to(np.asarray(vol, dtype=float), len(df))]).astype(float),
+            )
+        self.requests = 0
+
+    @property
+    def symbols(self) -> list:
+        return list(self._data)
+
+    def span(self) -> tuple:
+        """(first open_ms, last close_ms) covered by every symbol."""
+        starts = [t[0] for t, _ in self._data.values() if len(t)]
+        ends = [t[-1] + self.base_ms - 1 for t, _ in self._data.values() if len(t)]
+        return max(starts), min(ends)
+
+    def get_klines(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        self.requests += 1
+        if symbol not in self._data:
+            raise LookupError(f"no simulated history for {symbol}")
+        tf_ms = timeframe_seconds(interval) * 1000
+        if tf_ms % self.base_ms:
+            raise ValueError(f"{interval} is not a multiple of the simulated base interval {self.base_interval}")
+        times, ohlcv = self._data[symbol]
+        limit = int(limit)
+
+        # Visible = base bars closed by now (and opened by end_time, Binance endTime semantics)
+        cutoff = int(clock.now() * 1000) - self.base_ms
+        if end_time is not None:
+            cutoff = min(cutoff, int(end_time))
+        hi = int(np.searchsorted(times, cutoff, side="right"))
+        if hi == 0:
+            return []
+        if start_time is not None:
+            first = -(-int(start_time) // tf_ms) * tf_ms
+            lo = int(np.searchsorted(times, first))
+            hi = min(hi, int(np.searchsorted(times, first + limit * tf_ms)))
+        else:
+            last_bucket = times[hi - 1] // tf_ms * tf_ms
+            lo = int(np.searchsorted(times, last_bucket - (limit - 1) * tf_ms))
+        if lo >= hi:
+            return []
+
+        t, bars = times[lo:hi], ohlcv[lo:hi]
+        if tf_ms == self.base_ms:
+            return [_kline_row(int(ts), tf_ms, row) for ts, row in zip(t, bars.tolist())]
+
+        buckets = t // tf_ms * tf_ms
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(t)] - 1
+        agg = np.column_stack([
+            bars[starts, 0],
+            np.maximum.reduceat(bars[:, 1], starts),
+            np.minimum.reduceat(bars[:, 2], starts),
+            bars[ends, 3],
+            np.add.reduceat(bars[:, 4], starts),
+        ])
+        return [_kline_row(int(b), tf_ms, row) for b, row in zip(buckets[starts], agg.tolist())]
+
+
+def install_simulation(market: HistoricalMarket, start: float, end: float) -> clock.SimClock:
+    """Route klines to `market` and run the clock from `start` to `end` (epoch seconds)."""
+    def _stop_at_end(_clock, _seconds):
+        if _clock.now() >= end:
+            raise SimulationFinished(f"reached end of history ({market.requests} kline requests served)")
+
+    sim = clock.SimClock(start, on_sleep=_stop_at_end)
+    clock.set_clock(sim)
+    kline_source.set_source(market.get_klines)
+    return sim
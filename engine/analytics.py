@@ -0,0 +1,202 @@
+# engine/analytics.py
+# Performance analytics over the journal (one row per closed trade), computed with NumPy in one
+# pass and kept incrementally: JournalStats remembers the byte offset it has read up to and
+# folds only the rows appended since into running sums, so a refresh costs the new trades only.
+#
+#   expectancy       mean PnL % per trade (= win rate x avg win + loss rate x avg loss)
+#   profit factor    gross profit / gross loss
+#   sharpe           mean / std of per-trade PnL % (per trade); sharpe_annual scales it by
+#                    sqrt(trades per year) over the journal's time span
+#   max drawdown     of the equity curve compounding each trade's PnL %, as engine.backtest.summarize
+#   MAE / MFE        worst / best unrealized PnL % while open (journal mae/mfe columns; rows
+#                    written before those existed are left out of these two)
+#   per hour         trades, win rate and PnL by hour of the close timestamp (local time)
+#
+# State is a few scalars and 24-slot arrays: memory doesn't grow with the journal.
+
+import os
+import threading
+import time
+import numpy as np
+from config import JOURNAL_PATH
+from logger.schema import read_appended
+
+_COLUMNS = ["timestamp", "status", "pnl", "mae", "mfe"]
+_YEAR_SEC = 365 * 86400
+
+
+def _hours(stamps) -> np.ndarray:
+    """Hour of "%Y-%m-%d %H:%M:%S" strings (-1 if unparsable), from the fixed-width characters."""
+    chars = stamps.fillna("").to_numpy(dtype="U19").view(np.uint32).reshape(len(stamps), 19)
+    digits = chars[:, 11:13].astype(np.int64) - ord("0")
+    ok = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    return np.where(ok, digits[:, 0] * 10 + digits[:, 1], -1)
+
+
+def _span_sec(first: str, last: str):
+    try:
+        fmt = "%Y-%m-%d %H:%M:%S"
+        return time.mktime(time.strptime(last, fmt)) - time.mktime(time.strptime(first, fmt))
+    except (TypeError, ValueError):
+        return None
+
+
+class JournalStats:
+    """Running journal metrics; update() folds newly appended rows, report() reads them out."""
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.n = self.wins = self.losses = 0
+        self.pnl_sum = self.pnl_sq = self.gross_profit = self.gross_loss = 0.0
+        self.equity, self.peak, self.max_dd = 1.0, 1.0, 0.0
+        self.n_exc = 0
+        self.mae_sum = self.mfe_sum = self.mae_worst = self.mfe_best = 0.0
+        self.hour_n = np.zeros(24, dtype=np.int64)
+        self.hour_wins = np.zeros(24, dtype=np.int64)
+        self.hour_pnl = np.zeros(24, dtype=np.float64)
+        self.first_ts = self.last_ts = None
+
+    def add(self, pnl, hour=None, mae=None, mfe=None, first_ts: str = None, last_ts: str = None):
+        """
+        Fold a batch of closed trades in journal order: PnL % per trade, close hour (0-23, -1 =
+        unknown) and MAE/MFE % (NaN = not recorded). Any batch split gives the same result.
+        """
+        pnl = np.asarray(pnl, dtype=np.float64)
+        ok = np.isfinite(pnl)
+        pnl = pnl[ok]
+        if not len(pnl):
+            return
+        win, loss = pnl > 0, pnl < 0
+        self.n += len(pnl)
+        self.wins += int(win.sum())
+        self.losses += int(loss.sum())
+        self.pnl_sum += float(pnl.sum())
+        self.pnl_sq += float(np.dot(pnl, pnl))
+        self.gross_profit += float(pnl[win].sum())
+        self.gross_loss -= float(pnl[loss].sum())
+
+        equity = self.equity * np.cumprod(1 + pnl / 100.0)
+        peak = np.maximum(np.maximum.accumulate(equity), self.peak)
+        self.max_dd = max(self.max_dd, float(((peak - equity) / peak).max()))
+        self.equity, self.peak = float(equity[-1]), float(peak[-1])
+
+        if mae is not None and mfe is not None:
+            mae = np.asarray(mae, dtype=np.float64)[ok]
+            mfe = np.asarray(mfe, dtype=np.float64)[ok]
+            rec = np.isfinite(mae) & np.isfinite(mfe)
+            if rec.any():
+                self.n_exc += int(rec.sum())
+                self.mae_sum += float(mae[rec].sum())
+                self.mfe_sum += float(mfe[rec].sum())
+                self.mae_worst = min(self.mae_worst, float(mae[rec].min()))
+                self.mfe_best = max(self.mfe_best, float(mfe[rec].max()))
+
+        if hour is not None:
+            hour = np.asarray(hour, dtype=np.int64)[ok]
+            known = (hour >= 0) & (hour < 24)
+            self.hour_n += np.bincount(hour[known], minlength=24)
+            self.hour_wins += np.bincount(hour[known], weights=win[known], minlength=24).astype(np.int64)
+            self.hour_pnl += np.bincount(hour[known], weights=pnl[known], minlength=24)
+        if first_ts and self.first_ts is None:
+            self.first_ts = first_ts
+        if last_ts:
+            self.last_ts = last_ts
+
+    def add_frame(self, df):
+        """add() from journal rows (read with logger.schema): closed rows only."""
+        if "status" in df.columns:
+            df = df[df["status"].str.lower() == "closed"]
+        if df.empty or "pnl" not in df.columns:
+            return
+        hour, stamps = None, ()
+        if "timestamp" in df.columns:
+            hour = _hours(df["timestamp"])
+            stamps = df["timestamp"].dropna()
+        self.add(df["pnl"].to_numpy(dtype=np.float64), hour,
+                 df["mae"].to_numpy(dtype=np.float64) if "mae" in df.columns else None,
+                 df["mfe"].to_numpy(dtype=np.float64) if "mfe" in df.columns else None,
+                 first_ts=stamps.iloc[0] if len(stamps) else None,
+                 last_ts=stamps.iloc[-1] if len(stamps) else None)
+
+    def update(self) -> int:
+        """Fold the rows appended to the journal since the last call; returns how many were read."""
+        with self._lock:
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if size == 0:
+                self.reset()
+                return 0
+            if size == self.offset:
+                return 0
+            if size < self.offset:
+                self.reset()   # rewritten / rebuilt: start over
+            try:
+                df, end = read_appended("journal", self.path, self.offset, _COLUMNS, on_bad_lines="skip")
+            except ValueError:
+                self.reset()
+                df, end = read_appended("journal", self.path, 0, _COLUMNS, on_bad_lines="skip")
+            self.offset = end
+            self.add_frame(df)
+            return len(df)
+
+    def report(self) -> dict:
+        n = self.n
+        mean = self.pnl_sum / n if n else 0.0
+        var = (self.pnl_sq - self.pnl_sum * mean) / (n - 1) if n > 1 else 0.0
+        std = float(np.sqrt(max(var, 0.0)))
+        sharpe = mean / std if std > 0 else None
+        span = _span_sec(self.first_ts, self.last_ts)
+        hours = np.flatnonzero(self.hour_n)
+        return {
+            "trades": n,
+            "win_rate": self.wins / n if n else 0.0,
+            "total_pnl_pct": self.pnl_sum,
+            "expectancy_pct": mean,
+            "avg_win_pct": self.gross_profit / self.wins if self.wins else 0.0,
+            "avg_loss_pct": -self.gross_loss / self.losses if self.losses else 0.0,
+            "profit_factor": self.gross_profit / self.gross_loss if self.gross_loss > 0 else None,
+            "pnl_std_pct": std,
+            "sharpe": sharpe,
+            "sharpe_annual": float(sharpe * np.sqrt(n * _YEAR_SEC / span)) if sharpe is not None and span and span > 0 else None,
+            "max_drawdown_pct": self.max_dd * 100,
+            "equity_multiple": self.equity,
+            "mae_trades": self.n_exc,
+            "mae_avg_pct": self.mae_sum / self.n_exc if self.n_exc else None,
+            "mfe_avg_pct": self.mfe_sum / self.n_exc if self.n_exc else None,
+            "mae_worst_pct": self.mae_worst if self.n_exc else None,
+            "mfe_best_pct": self.mfe_best if self.n_exc else None,
+            "from": self.first_ts,
+            "to": self.last_ts,
+            "by_hour": [{"hour": int(h), "trades": int(self.hour_n[h]),
+                         "win_rate": float(self.hour_wins[h] / self.hour_n[h]), "pnl_pct": float(self.hour_pnl[h])}
+                        for h in hours],
+        }
+
+
+def _fmt(x, spec=".2f", suffix=""):
+    return "n/a" if x is None else f"{x:{spec}}{suffix}"
+
+
+def format_report(r: dict, hours: bool = True) -> str:
+    """Plain-text report (CLI and Telegram /stats)."""
+    if not r["trades"]:
+        return "No closed trades yet."
+    lines = [
+        f"Trades: {r['trades']} ({r['from']} -> {r['to']})",
+        f"Win rate: {r['win_rate'] * 100:.1f}% | Expectancy: {r['expectancy_pct']:.3f}%/trade",
+        f"Avg win: {r['avg_win_pct']:.3f}% | Avg loss: {r['avg_loss_pct']:.3f}% | Profit factor: {_fmt(r['profit_factor'])}",
+        f"Total PnL: {r['total_pnl_pct']:.2f}% | Equity x{r['equity_multiple']:.4g} | Max drawdown: {r['max_drawdown_pct']:.2f}%",
+        f"Sharpe: {_fmt(r['sharpe'], '.3f')}/trade | {_fmt(r['sharpe_annual'])} annualized",
+        f"MAE avg/worst: {_fmt(r['mae_avg_pct'], '.3f', '%')} / {_fmt(r['mae_worst_pct'], '.3f', '%')} | "
+        f"MFE avg/best: {_fmt(r['mfe_avg_pct'], '.3f', '%')} / {_fmt(r['mfe_best_pct'], '.3f', '%')} "
+        f"({r['mae_trades']} trades)",
+    ]
+    if hours and r["by_hour"]:
+        lines.append("By hour (close): trades | win rate | PnL")
+        lines += [f"  {h['hour']:02d}h  {h['trades']:6d} | {h['win_rate'] * 100:5.1f}% | {h['pnl_pct']:8.2f}%"
+                  for h in r["by_hour"]]
+    return "\n".join(lines)
@@ -0,0 +1,244 @@
+# engine/backtest.py
+# Historical backtest of the live rules over a stored OHLCV history (one symbol).
+#
+# Same rules as the bot, evaluated on closed bars:
+#   - entry: generate_signal() trend/volatility filter on bar i, ATR(14) of bars <= i,
+#     entry at the bar close, one trade per symbol, COOLDOWN_SECONDS after each close
+#   - exits: build_fake_trade() levels and update_position_status() TP/SL/trailing with
+#     PRICE_BUFFER_PCT, one call per closed bar (like the entry cycle)
+#
+# Signals, ATR and features are computed for the whole history with NumPy/pandas. For each
+# open trade, the bar where *something* happens (SL, an unhit TP, trailing trigger) is found
+# with vectorized masks over a window of bars, and only that bar goes through the real
+# update_position_status(), so exit semantics cannot drift from the live code.
+# Output rows use the journal schema (logger/journal_writer.py).
+#
+# Not simulated: ML gating (predictions need the live model), intrabar monitor ticks.
+# Features (adx/rsi/macd/ema_ratio) are computed over the whole history, so the
+# EMA-based ones can differ slightly from the bot's 100-bar window at the same bar.
+
+import csv
+import os
+import time
+import numpy as np
+import pandas as pd
+from config import MIN_TREND_STRENGTH, MIN_VOLATILITY, COOLDOWN_SECONDS, INITIAL_BALANCE
+from engine.position_model import (build_fake_trade, update_position_status, position_params, track_excursion,
+                                   seeded_trade_ids)
+from engine.scheduler import timeframe_seconds
+from logger.journal_writer import FIELDS, journal_row
+from utils.pnl_utils import calc_realistic_pnl
+
+_ATR_PERIOD = 14
+_FEATURES = ("adx", "rsi", "macd", "ema_ratio")
+_FIRST_WINDOW = 64      # bars scanned per step while a trade is open (doubles until an event)
+
+
+def quiet(_msg):
+    """log= callable for build_fake_trade/update_position_status that drops the messages."""
+    pass
+
+
+def backtest_params(overrides: dict = None) -> dict:
+    """position_params() plus the entry filter and cooldown, with optional overrides."""
+    p = dict(position_params(overrides))
+    p.update({"MIN_TREND_STRENGTH": MIN_TREND_STRENGTH, "MIN_VOLATILITY": MIN_VOLATILITY,
+              "COOLDOWN_SECONDS": COOLDOWN_SECONDS})
+    if overrides:
+        p.update({k: v for k, v in overrides.items() if k in p})
+    return p
+
+
+def load_history(path: str) -> pd.DataFrame:
+    """OHLCV CSV with a 'timestamp' column (bar open, epoch ms), e.g. saved by scripts/backtest.py."""
+    df = pd.read_csv(path)
+    df = df.dropna(subset=["timestamp", "open", "high", "low", "close"])
+    return df.sort_values("timestamp").drop_duplicates("timestamp").reset_index(drop=True)
+
+
+def prepare_bars(df: pd.DataFrame, interval: str, with_features: bool = True) -> dict:
+    """
+    Per-bar NumPy arrays used by simulate(): OHLC, close time, ATR and the ML features.
+    Independent of strategy params, so one prepare can serve many simulate() calls.
+    """
+    o = df["open"].to_numpy(dtype=float)
+    h = df["high"].to_numpy(dtype=float)
+    l = df["low"].to_numpy(dtype=float)
+    c = df["close"].to_numpy(dtype=float)
+    step_ms = timeframe_seconds(interval) * 1000
+    close_ms = df["timestamp"].to_numpy(dtype="int64") + step_ms - 1
+
+    # ATR exactly as calculate_atr(): SMA of true range, rounded to 5 decimals, 0 when unavailable
+    prev_c = np.concatenate(([np.nan], c[:-1]))
+    tr = pd.DataFrame({"hl": h - l, "hc": np.abs(h - prev_c), "lc": np.abs(l - prev_c)}).max(axis=1)
+    atr = tr.rolling(window=_ATR_PERIOD).mean().to_numpy()
+    atr = np.where(np.isnan(atr) | (atr <= 0), 0.0, np.round(atr, 5))
+
+    bars = {"open": o, "high": h, "low": l, "close": c, "close_ms": close_ms, "atr": atr,
+            "interval": interval}
+    if with_features:
+        from ml.feature_builder import build_features
+        feats = build_features(df[["open", "high", "low", "close"]].astype(float).copy())
+        for name in _FEATURES:
+            bars[name] = feats[name].to_numpy(dtype=float)
+    return bars
+
+
+def fmt_ms(ms) -> str:
+    """Epoch ms as a local "%Y-%m-%d %H:%M:%S" stamp (the logs' timestamp format)."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(ms) / 1000))
+
+
+def _first(mask) -> int:
+    i = int(mask.argmax())
+    return i if mask[i] else -1
+
+
+def run_exits(trade: dict, bars: dict, start: int, p: dict) -> int:
+    """
+    Advance an open trade from bar `start`; returns the index of the closing bar (-1 if
+    still open at the end of history). Only event bars call update_position_status().
+    """
+    high, low, atr = bars["high"], bars["low"], bars["atr"]
+    n = len(high)
+    buf, gap = p["PRICE_BUFFER_PCT"], p["TRAILING_GAP_ATR"]
+    is_long = str(trade["side"]).upper() == "LONG"
+    s, width = start, _FIRST_WINDOW
+    while s < n:
+        e = min(n, s + width)
+        H, L, A = high[s:e], low[s:e], atr[s:e]
+        # SL (tested with the inverted direction, as in _price_hit) and any TP not hit yet
+        sl = trade["sl"]
+        event = (L <= sl * (1 + buf)) if is_long else (H >= sl * (1 - buf))
+        for i, key in enumerate(("tp1", "tp2", "tp3")):
+            if i not in trade["hit"]:
+                lvl = float(trade[key])
+                event |= (H >= lvl * (1 - buf)) if is_long else (L <= lvl * (1 + buf))
+        # Trailing: the ratchet is a running max/min; it only moves on bars with ATR > 0
+        run = None
+        if trade.get("trail_active"):
+            tl0 = float(trade["trail_level"])
+            ok = A > 0
+            if is_long:
+                run = np.maximum(np.maximum.accumulate(np.where(ok, H - gap * A, -np.inf)), tl0)
+                event |= ok & (L <= run * (1 + buf))
+            else:
+                run = np.minimum(np.minimum.accumulate(np.where(ok, L + gap * A, np.inf)), tl0)
+                event |= ok & (H >= run * (1 - buf))
+        j = _first(event)
+        if j < 0:
+            if run is not None:
+                trade["trail_level"] = float(run[-1])
+            s, width = e, width * 2
+            continue
+        if run is not None and j > 0:
+            trade["trail_level"] = float(run[j - 1])
+        k = s + j
+        candle = {"open": bars["open"][k], "high": high[k], "low": low[k], "close": bars["close"][k]}
+        update_position_status(trade, candle, atr[k], params=p, log=quiet)
+        if trade["status"] == "closed":
+            return k
+        s, width = k + 1, _FIRST_WINDOW
+    return -1
+
+
+def simulate(bars: dict, symbol: str, params: dict = None, seed: int = 0) -> tuple:
+    """
+    Run the strategy over prepared bars. Returns (closed_trades, open_trade_or_None);
+    closed trades carry "closed_at" and "pnl" besides the usual trade fields.
+    """
+    p = backtest_params(params)
+    o, h, l, c = bars["open"], bars["high"], bars["low"], bars["close"]
+    close_ms, atr = bars["close_ms"], bars["atr"]
+    n = len(c)
+
+    # generate_signal() filter, vectorized
+    ref = np.maximum(o, 1e-9)
+    trend = (c - o) / ref
+    vol = (h - l) / ref
+    candidates = np.flatnonzero((np.abs(trend) >= p["MIN_TREND_STRENGTH"]) & (vol >= p["MIN_VOLATILITY"]) & (atr > 0))
+    cooldown_ms = int(p["COOLDOWN_SECONDS"]) * 1000
+
+    closed, open_trade = [], None
+    with seeded_trade_ids(seed):
+        i = 0
+        while i < n:
+            ci = int(np.searchsorted(candidates, i))
+            if ci >= len(candidates):
+                break
+            e = int(candidates[ci])
+            signal = {"symbol": symbol, "direction": "LONG" if trend[e] > 0 else "SHORT",
+                      "confidence": abs(float(trend[e])), "strategy_name": "basic_trend", "leverage": 1}
+            for name in _FEATURES:
+                if name in bars:
+                    signal[name] = float(bars[name][e])
+            candle = {"open": o[e], "high": h[e], "low": l[e], "close": c[e]}
+            trade = build_fake_trade(signal, candle, float(atr[e]), params=p, log=quiet)
+            trade["opened_at"] = fmt_ms(close_ms[e])
+            trade["atr"] = float(atr[e])
+
+            k = run_exits(trade, bars, e + 1, p)
+            if k < 0:
+                open_trade = trade
+                break
+            if k > e + 1:
+                # MAE/MFE over the bars held open (only event bars went through update_position_status)
+                track_excursion(trade, float(h[e + 1:k].max()), float(l[e + 1:k].min()))
+            trade["duration_sec"] = int((close_ms[k] - close_ms[e]) // 1000)
+            trade["closed_at"] = fmt_ms(close_ms[k])
+            trade["pnl"] = calc_realistic_pnl(trade["entry_price"], trade["exit_price"], trade["side"], trade["leverage"])
+            closed.append(trade)
+            # Next entry: a later bar whose close is past the cooldown
+            i = max(k + 1, int(np.searchsorted(close_ms, close_ms[k] + cooldown_ms)))
+    return closed, open_trade
+
+
+def summarize(closed: list, initial_balance: float = INITIAL_BALANCE) -> dict:
+    pnl = np.array([t["pnl"] for t in closed], dtype=float)
+    equity = initial_balance * np.cumprod(1 + pnl / 100.0)
+    balance = float(equity[-1]) if len(pnl) else initial_balance
+    peak = np.maximum.accumulate(np.concatenate(([initial_balance], equity)))
+    drawdown = float(((peak[1:] - equity) / peak[1:]).max()) * 100 if len(pnl) else 0.0
+    reasons = {}
+    for t in closed:
+        reasons[t["exit_reason"]] = reasons.get(t["exit_reason"], 0) + 1
+    return {
+        "trades": len(closed),
+        "win_rate": float((pnl > 0).mean()) if len(pnl) else 0.0,
+        "total_pnl_pct": float(pnl.sum()),
+        "avg_pnl_pct": float(pnl.mean()) if len(pnl) else 0.0,
+        "max_drawdown_pct": round(drawdown, 4),
+        "final_balance": round(balance, 2),
+        "exit_reasons": reasons,
+    }
+
+
+def write_journal(closed: list, path: str, initial_balance: float = INITIAL_BALANCE):
+    """Write closed trades as a journal CSV (same columns as journal.csv); balance compounds pnl."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    balance = initial_balance
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, quotechar='"', escapechar='\\')
+        w.writerow(FIELDS)
+        for t in closed:
+            balance *= 1 + t["pnl"] / 100.0
+            t["balance"] = round(balance, 2)
+            w.writerow(journal_row(t, t["closed_at"]))
+
+
+def run_backtest(df: pd.DataFrame, symbol: str, interval: str, params: dict = None,
+                 journal_path: str = None, seed: int = 0) -> dict:
+    """prepare -> simulate -> (journal) -> summary with timings."""
+    t0 = time.perf_counter()
+    bars = prepare_bars(df, interval)
+    t1 = time.perf_counter()
+    closed, open_trade = simulate(bars, symbol, params, seed)
+    t2 = time.perf_counter()
+    if journal_path:
+        write_journal(closed, journal_path)
+    summary = summarize(closed)
+    summary.update({"symbol": symbol, "interval": interval, "bars": len(df),
+                    "open_at_end": open_trade is not None,
+                    "prepare_sec": round(t1 - t0, 3), "simulate_sec": round(t2 - t1, 3),
+                    "total_sec": round(time.perf_counter() - t0, 3)})
+    return summary
@@ -0,0 +1,107 @@
+# engine/checkpoint.py
+# Engine state checkpoint for warm restarts: what run_bot keeps only in memory, written
+# atomically (tmp + fsync + os.replace) at the end of every cycle.
+#
+#   cooldowns    {symbol: epoch_until}          symbol cooldowns (single portfolio)
+#   portfolio_cooldowns {name: {symbol: epoch_until}}   per portfolio (PORTFOLIOS_FILE)
+#   atr          {symbol: last ATR}              symbol_atr_cache (catch-up replay ATR)
+#   last_bar_ms  {symbol: close ms}             last bar an entry cycle processed (catch-up start)
+#   feed         {"base_interval", "bars": {symbol: [[open_ms, o, h, l, c, v], ...]}}
+#                                               data.resampler base buffers (MTF_ENABLED only)
+#
+# Format follows the path: "*.npz" (default; binary: the candle buffers as float64 arrays,
+# everything else as one JSON string, no float formatting/parsing) or "*.json" (compact JSON,
+# several times slower to write with MTF buffers).
+# Timeframe-dependent parts are dropped on load when TIMEFRAME changed; expired cooldowns too.
+
+import json
+import os
+from config import CHECKPOINT_PATH, TIMEFRAME
+from utils.metrics import record_bytes
+
+VERSION = 1
+
+
+def _is_binary(path: str) -> bool:
+    return path.lower().endswith(".npz")
+
+
+def save_checkpoint(cooldowns: dict, atr: dict, last_bar_ms: dict = None, feed=None, now: float = None,
+                    path: str = None, portfolio_cooldowns: dict = None) -> int:
+    """Write the checkpoint atomically; returns bytes written (0 when disabled or on error)."""
+    path = CHECKPOINT_PATH if path is None else path
+    if not path:
+        return 0
+    meta = {
+        "version": VERSION,
+        "saved_at": now,
+        "timeframe": TIMEFRAME,
+        "cooldowns": cooldowns,
+        "atr": atr,
+        "last_bar_ms": last_bar_ms or {},
+    }
+    if portfolio_cooldowns:
+        meta["portfolio_cooldowns"] = portfolio_cooldowns
+    bars = feed.snapshot() if feed is not None else {}
+    if feed is not None:
+        meta["feed"] = {"base_interval": feed.base_interval, "symbols": sorted(bars)}
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            if _is_binary(path):
+                import numpy as np
+                arrays = {f"bars_{i}": bars[s] for i, s in enumerate(meta.get("feed", {}).get("symbols", []))}
+                np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+            else:
+                if feed is not None:
+                    meta["feed"]["bars"] = {s: a.tolist() for s, a in bars.items()}
+                f.write(json.dumps(meta, separators=(",", ":")).encode("utf-8"))
+            size = f.tell()
+            f.flush()
+            os.fsync(f.fileno())   # data on disk before the rename makes it the checkpoint
+        os.replace(tmp, path)
+        record_bytes("checkpoint", size)
+        return size
+    except Exception as e:
+        # fail-closed: a missed checkpoint only costs a colder restart
+        print(f"⚠️ save_checkpoint error: {e}")
+        return 0
+
+
+def load_checkpoint(now: float, path: str = None) -> dict:
+    """
+    Checkpoint as written by save_checkpoint() ({} if disabled, missing or unreadable), with
+    expired cooldowns removed and feed bars as {symbol: (n, 6) float64 array}.
+    """
+    path = CHECKPOINT_PATH if path is None else path
+    if not path or not os.path.exists(path) or os.path.getsize(path) == 0:
+        return {}
+    try:
+        import numpy as np   # imported here: a cold start without a checkpoint never needs it
+        if _is_binary(path):
+            with np.load(path) as z:
+                state = json.loads(str(z["meta"]))
+                feed = state.get("feed")
+                if feed:
+                    feed["bars"] = {s: z[f"bars_{i}"] for i, s in enumerate(feed["symbols"])}
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            feed = state.get("feed")
+            if feed:
+                feed["bars"] = {s: np.asarray(rows, dtype=np.float64).reshape(-1, 6) for s, rows in feed["bars"].items()}
+    except Exception as e:
+        print(f"⚠️ load_checkpoint error (cold start): {e}")
+        return {}
+    if state.get("version") != VERSION:
+        return {}
+
+    state["cooldowns"] = {s: float(t) for s, t in state.get("cooldowns", {}).items() if float(t) > now}
+    state["portfolio_cooldowns"] = {name: {s: float(t) for s, t in cds.items() if float(t) > now}
+                                    for name, cds in state.get("portfolio_cooldowns", {}).items()}
+    if state.get("timeframe") != TIMEFRAME:
+        for key in ("atr", "last_bar_ms"):
+            state[key] = {}
+    return state
@@ -0,0 +1,151 @@
+# engine/mark_to_market.py
+# Paper accounting: realized PnL booked into the balance as trades scale out and close, open
+# trades valued against the cycle's candle closes, and equity sampled once per cycle.
+#
+#   stake        USDT put on a trade: POSITION_STAKE_PCT % of the balance when it opens (trade["stake"])
+#   realized     stake x fraction x PnL % at the fill (calc_realistic_pnl: side and leverage included);
+#                TP_SCALE_OUT[i] of the stake fills at TP i+1, the close fills whatever is left
+#   unrealized   remaining stake x PnL % at the symbol's latest close, every open trade in one NumPy step
+#   equity       balance + unrealized
+#
+# balance_history.csv carries the realized balance (a restart continues from its last row). The
+# equity curve is an append-only file of fixed-size little-endian records (CURVE_DTYPE, 28 bytes);
+# read_curve() loads it without parsing and last_sample() reads only the final record. Cost and
+# memory per cycle depend on the open trades, not on how much history has been written.
+
+import os
+import struct
+from config import EQUITY_CURVE_PATH, POSITION_STAKE_PCT, TP_SCALE_OUT
+from logger.balance_tracker import load_last_balance
+from utils import clock
+from utils.metrics import record_bytes
+from utils.pnl_utils import calc_realistic_pnl
+
+# (clock time, realized balance, unrealized PnL, open trades); equity = balance + unrealized
+CURVE_DTYPE = [("t", "<f8"), ("balance", "<f8"), ("unrealized", "<f8"), ("open", "<u4")]
+_RECORD = struct.Struct("<dddI")
+
+
+class MarkToMarket:
+    """Balance, stakes and fills of one paper account, plus its per-cycle equity samples."""
+
+    def __init__(self, curve_path: str = EQUITY_CURVE_PATH, stake_pct: float = POSITION_STAKE_PCT,
+                 scale_out=TP_SCALE_OUT, balance_path: str = None, initial_balance: float = None):
+        self.curve_path = curve_path
+        self.balance_path = balance_path          # balance_history.csv (None = BALANCE_LOG_PATH)
+        self.initial_balance = initial_balance    # None = INITIAL_BALANCE
+        self.stake_pct = float(stake_pct)
+        self.scale_out = [float(f) for f in scale_out]
+        self._balance = None         # realized balance, loaded on first use
+        self.marks = {}              # {symbol: latest close}
+        self.unrealized = 0.0
+
+    @property
+    def balance(self) -> float:
+        if self._balance is None:
+            self._balance = load_last_balance(self.balance_path, self.initial_balance)
+        return self._balance
+
+    def stake(self, trade: dict) -> float:
+        """The trade's stake; assigned from the current balance the first time it's asked for."""
+        if not trade.get("stake"):
+            trade["stake"] = round(self.balance * self.stake_pct / 100.0, 2)
+        return float(trade["stake"])
+
+    def _fills(self, hits) -> list:
+        """[(tp index, stake fraction)] for TP hits in order, capped so the total never exceeds 1."""
+        left, fills = 1.0, []
+        for i in hits:
+            if 0 <= i < len(self.scale_out):
+                f = min(self.scale_out[i], left)
+                left -= f
+                fills.append((i, f))
+        return fills
+
+    def remaining(self, trade: dict) -> float:
+        """Fraction of the stake still open after the scale-outs of the TPs hit so far."""
+        return max(0.0, 1.0 - sum(f for _, f in self._fills(trade.get("hit", []))))
+
+    def book(self, trade: dict) -> float:
+        """
+        Book the trade's fills not booked yet (trade["fills_booked"] counts those that are, the close
+        included): scale-outs at their TP level and, once the trade is closed, the rest of the stake
+        at the exit price. Returns the USDT realized.
+        """
+        stake, side, lev = self.stake(trade), trade.get("side", "LONG"), trade.get("leverage", 1)
+        fills = self._fills(list(trade.get("hit", [])))
+        done = int(trade.get("fills_booked", 0))
+        closed = str(trade.get("status", "")).lower() == "closed"
+        pnl = 0.0
+        for i, f in fills[done:]:
+            pnl += stake * f * calc_realistic_pnl(trade["entry_price"], trade.get(f"tp{i + 1}"), side, lev) / 100.0
+        if closed and done <= len(fills):
+            pnl += stake * self.remaining(trade) * calc_realistic_pnl(trade["entry_price"], trade["exit_price"], side, lev) / 100.0
+        trade["fills_booked"] = len(fills) + int(closed)
+        self._balance = self.balance + pnl
+        return pnl
+
+    def mark(self, open_trades: list, symbol_candle_map: dict, now: float = None) -> dict:
+        """
+        Value the open trades at each symbol's latest close (this cycle's candle, else the last
+        one seen; entry price before any) and append the cycle's equity sample.
+        """
+        for sym, candle in symbol_candle_map.items():
+            if candle and candle.get("close"):
+                self.marks[sym] = float(candle["close"])
+        opens = [t for t in open_trades if str(t.get("status", "")).lower() == "open"]
+        if opens:
+            import numpy as np
+            cols = np.array([(float(t.get("entry_price") or 0.0),
+                              self.marks.get(t["symbol"], float(t.get("entry_price") or 0.0)),
+                              -1.0 if str(t.get("side", "")).lower() == "short" else 1.0,
+                              float(t.get("leverage", 1)),
+                              self.stake(t) * self.remaining(t)) for t in opens], dtype=np.float64)
+            entry, price, sign, lev, size = cols.T
+            valid = (entry > 0) & (price > 0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pct = np.where(valid, np.round((price - entry) / entry * 100 * sign * lev, 4), 0.0)
+            self.unrealized = float(size @ pct) / 100.0
+        else:
+            self.unrealized = 0.0
+        sample = {"t": clock.now() if now is None else now, "balance": self.balance,
+                  "unrealized": self.unrealized, "equity": self.balance + self.unrealized, "open": len(opens)}
+        self._append(sample)
+        return sample
+
+    def _append(self, sample: dict):
+        if not self.curve_path:
+            return
+        try:
+            rec = _RECORD.pack(sample["t"], sample["balance"], sample["unrealized"], sample["open"])
+            os.makedirs(os.path.dirname(os.path.abspath(self.curve_path)), exist_ok=True)
+            with open(self.curve_path, "ab") as f:
+                f.write(rec)
+            record_bytes("equity_curve", len(rec))
+        except Exception as e:
+            # fail-closed: never crash the trading loop
+            print(f"⚠️ equity curve append error: {e}")
+
+
+def read_curve(path: str = EQUITY_CURVE_PATH):
+    """The whole equity curve as a NumPy structured array (CURVE_DTYPE); a torn last record is ignored."""
+    import numpy as np
+    dtype = np.dtype(CURVE_DTYPE)
+    if not path or not os.path.exists(path):
+        return np.zeros(0, dtype=dtype)
+    return np.fromfile(path, dtype=dtype, count=os.path.getsize(path) // dtype.itemsize)
+
+
+def last_sample(path: str = EQUITY_CURVE_PATH):
+    """The most recent equity sample as a dict (reads one record), or None."""
+    try:
+        n = os.path.getsize(path) // _RECORD.size
+        if not n:
+            return None
+        with open(path, "rb") as f:
+            f.seek((n - 1) * _RECORD.size)
+            t, balance, unrealized, n_open = _RECORD.unpack(f.read(_RECORD.size))
+        return {"t": t, "balance": balance, "unrealized": unrealized, "equity": balance + unrealized, "open": n_open}
+    except (OSError, TypeError, struct.error):
+        return None
+
@@ -0,0 +1,241 @@
+# engine/pipeline.py
+# Per-symbol entry pipeline: fetch closed candle -> ATR/features -> signal -> ML prediction.
+# scan_symbol() is side-effect free on purpose (no log/journal/store writes, no tlog): it runs
+# either in the main process or inside shard workers, and the owner process does all writing.
+# Results are compact dicts; log lines are returned in "notes" for the owner to tlog. The feature
+# helpers take a `log` callable and default to tlog for their in-process callers (catch-up, scripts).
+# ml_predictor is imported on first ML use, so shard workers scanning with use_ml=False never load it.
+
+import time
+from config import TIMEFRAME
+from data.price_feed import get_latest_candle
+from core.signal_engine import generate_signal
+from core.indicator_utils import fetch_recent_candles, calculate_atr
+from utils.terminal_logger import tlog
+
+# Optional: TA feature builder (used for ML features if available). Only located here;
+# ml.feature_builder (pandas + ta) is imported on first use or by prewarm().
+from importlib.util import find_spec
+_FB_MISSING = [m for m in ("pandas", "ta") if find_spec(m) is None]
+HAS_FB = not _FB_MISSING
+FB_ERROR = f"No module named {', '.join(map(repr, _FB_MISSING))}" if _FB_MISSING else None
+
+# Optional: ML predictor, imported once by _ml()
+_ml_module = None
+_ml_failure = None
+
+
+def _ml():
+    """ml_predictor, or None when it can't be imported (tried once)."""
+    global _ml_module, _ml_failure
+    if _ml_module is None and _ml_failure is None:
+        try:
+            import ml_predictor
+            _ml_module = ml_predictor
+        except Exception as e:
+            _ml_failure = e
+    return _ml_module
+
+
+def has_ml() -> bool:
+    """Whether ML gating is available (imports ml_predictor on first call)."""
+    return _ml() is not None
+
+
+def ml_error():
+    """Why ml_predictor couldn't be imported (None when it could)."""
+    _ml()
+    return _ml_failure
+
+
+def start_model_watcher():
+    """Start the background bundle watcher (no-op without ML)."""
+    if has_ml():
+        _ml().start_model_watcher()
+
+
+def swap_model():
+    """ml_predictor.swap_model() (None without ML)."""
+    return _ml().swap_model() if has_ml() else None
+
+
+def prewarm():
+    """Import the heavy entry-cycle dependencies (pandas, ta, the active model) ahead of first use."""
+    import pandas  # noqa: F401
+    if HAS_FB:
+        import ml.feature_builder  # noqa: F401
+    if has_ml():
+        _ml().get_registry()
+
+
+def _features_from_candles(symbol: str, df, log=tlog):
+    """(last_features_dict or None, atr_value) for a closed-candle frame, as the entry cycle computes them."""
+    atr_val = calculate_atr(df, period=14) or 0.0
+
+    # Build ML features if available
+    feats = None
+    if HAS_FB:
+        try:
+            from ml.feature_builder import build_features as build_ml_features
+            fdf = build_ml_features(df.copy())
+            if fdf is not None and not fdf.empty:
+                last = fdf.tail(1).to_dict("records")[0]
+                feats = {
+                    "atr": float(last.get("atr", 0.0)),
+                    "adx": float(last.get("adx", 0.0)),
+                    "rsi": float(last.get("rsi", 0.0)),
+                    "macd": float(last.get("macd", 0.0)),
+                    "ema_ratio": float(last.get("ema_ratio", 1.0)),
+                    "volatility": float(last.get("volatility", 0.0)),
+                }
+                # any feature added to ml.feature_builder.FEATURE_FUNCS, for models trained on it
+                feats.update({k: float(v) for k, v in last.items() if k not in feats})
+        except Exception as e:
+            log(f"⚠️ Feature build error for {symbol}: {e}")
+            feats = None
+    return feats, atr_val
+
+
+def get_features_for_symbol(symbol: str, interval: str = None, limit: int = 100,
+                            closed_only: bool = False, log=tlog):
+    """
+    Helper: fetch recent candles and compute indicators for ML.
+    Returns (df, last_features_dict, atr_value).
+    """
+    try:
+        df = fetch_recent_candles(symbol, interval=interval or TIMEFRAME, limit=limit, closed_only=closed_only)
+        if df is None or df.empty:
+            return None, None, 0.0
+        feats, atr_val = _features_from_candles(symbol, df, log)
+        return df, feats, atr_val
+    except Exception as e:
+        log(f"❌ _get_features_for_symbol error [{symbol}]: {e}")
+        return None, None, 0.0
+
+
+def entry_features_from_history(symbol: str, history, entry_ms, interval: str = None, limit: int = 100) -> list:
+    """
+    Offline replay of the ML inputs scan_symbol() built for trades opened at entry_ms (epoch ms),
+    from an OHLCV history (timestamp = bar open, epoch ms). The entry bar is the last one closed
+    before entry, and features use the window the live fetch saw (limit klines minus the forming
+    one). Returns one {"atr", "trend_strength", "volatility", "adx", "rsi", "macd", "ema_ratio", ...}
+    per entry, or None where the history doesn't reach the entry bar.
+    """
+    import numpy as np
+    from engine.scheduler import timeframe_seconds
+    step_ms = timeframe_seconds(interval or TIMEFRAME) * 1000
+    ts = history["timestamp"].to_numpy(dtype="int64")
+    ohlc = history[["open", "high", "low", "close"]].astype(float).reset_index(drop=True)
+    ends = np.searchsorted(ts + step_ms - 1, np.asarray(entry_ms, dtype=np.float64), side="left") - 1
+    out = []
+    for i in ends.tolist():
+        if i < 0:
+            out.append(None)
+            continue
+        window = ohlc.iloc[max(0, i - (limit - 2)):i + 1].reset_index(drop=True)
+        feats, atr_val = _features_from_candles(symbol, window, log=lambda _m: None)
+        o, h, l, c = window.iloc[-1]
+        # trend_strength is the signal's confidence, volatility the entry candle's range (data.price_feed)
+        signal = {"direction": "", "confidence": abs(c - o) / max(o, 1e-9)}
+        row = build_ml_input(symbol, signal, {"close": c, "volatility": abs(h - l) / c}, feats, float(atr_val or 0.0))
+        out.append({k: v for k, v in row.items() if k not in ("symbol", "side", "entry_price", "duration_sec")})
+    return out
+
+
+def normalize_candle(candle: dict) -> dict:
+    return {
+        "open": float(candle["open"]),
+        "high": float(candle["high"]),
+        "low": float(candle["low"]),
+        "close": float(candle["close"]),
+        "volume": float(candle.get("volume", 0.0)),
+        "volatility": float(candle.get("volatility", 0.0)),
+    }
+
+
+def build_ml_input(symbol: str, signal: dict, candle: dict, feats: dict, atr_val: float) -> dict:
+    row = {
+        "symbol": symbol,
+        "side": signal["direction"],
+        "entry_price": candle["close"],
+        "atr": atr_val,
+        "trend_strength": float(signal.get("confidence", 0.0)),
+        "volatility": float(candle.get("volatility", 0.0)),
+        "duration_sec": 0,
+        "adx": feats.get("adx", 0.0) if feats else 0.0,
+        "rsi": feats.get("rsi", 0.0) if feats else 50.0,
+        "macd": feats.get("macd", 0.0) if feats else 0.0,
+        "ema_ratio": feats.get("ema_ratio", 1.0) if feats else 1.0,
+    }
+    # extra feature-store features; "atr"/"volatility" above stay the entry-candle values
+    row.update({k: v for k, v in (feats or {}).items() if k not in row})
+    return row
+
+
+def scan_symbol(symbol: str, evaluate_entry: bool = True, use_ml: bool = True, signal_params: dict = None) -> dict:
+    """
+    Run the entry pipeline for one symbol on the latest closed bar.
+    evaluate_entry=False stops after candle/ATR (symbol has an open trade or is cooling down).
+    signal_params overrides the signal thresholds (the loosest of all portfolios, see main.py).
+
+    Returns {"symbol", "candle", "atr", "feats", "signal", "ml_input", "ml", "notes", "timings"};
+    candle is None when no valid candle was available.
+    """
+    notes = []
+    timings = {}
+    out = {"symbol": symbol, "candle": None, "atr": 0.0, "feats": None, "signal": None,
+           "ml_input": None, "ml": None, "notes": notes, "timings": timings}
+    try:
+        t0 = time.perf_counter()
+        candle = get_latest_candle(symbol, TIMEFRAME, closed_only=True)
+        timings["fetch"] = time.perf_counter() - t0
+        if not candle or "open" not in candle:
+            notes.append(f"⚠️ Skipping {symbol}: no valid candle data")
+            return out
+        candle = normalize_candle(candle)
+        out["candle"] = candle
+
+        t0 = time.perf_counter()
+        _, feats, atr_val = get_features_for_symbol(symbol, interval=TIMEFRAME, limit=100,
+                                                    closed_only=True, log=notes.append)
+        timings["features"] = time.perf_counter() - t0
+        out["feats"], out["atr"] = feats, float(atr_val or 0.0)
+
+        if not evaluate_entry:
+            return out
+
+        t0 = time.perf_counter()
+        signal = generate_signal(symbol, candle, params=signal_params)
+        timings["signal"] = time.perf_counter() - t0
+        out["signal"] = signal
+        if not signal or out["atr"] <= 0:
+            return out
+
+        out["ml_input"] = build_ml_input(symbol, signal, candle, feats, out["atr"])
+        if use_ml and has_ml():   # the bot scores a whole cycle at once via score_candidates()
+            t0 = time.perf_counter()
+            try:
+                out["ml"] = _ml().predict_trade(out["ml_input"])
+            except Exception as e:
+                out["ml"] = {"error": str(e)}
+            timings["ml"] = time.perf_counter() - t0
+    except Exception as e:
+        notes.append(f"❌ Candle/ATR fetch error for {symbol}: {e}")
+    return out
+
+
+def score_candidates(results: list) -> int:
+    """
+    One batched ML call for every scan result that reached the ML stage (has "ml_input");
+    fills r["ml"] in place, like scan_symbol(use_ml=True) would. Returns the batch size.
+    """
+    todo = [r for r in results if r.get("ml_input") is not None]
+    if not todo or not has_ml():
+        return 0
+    try:
+        preds = _ml().predict_trades([r["ml_input"] for r in todo])
+    except Exception as e:
+        preds = [{"error": str(e)}] * len(todo)
+    for r, pred in zip(todo, preds):
+        r["ml"] = pred
+    return len(todo)
@@ -0,0 +1,138 @@
+# engine/portfolio.py
+# Paper portfolios hosted by one bot process. A portfolio is a config-style override dict plus
+# everything that depends on it: its open trades and cooldowns, trade ledger and CSV views,
+# balance and equity curve, open-positions store and heartbeat, all under its own LOG_DIR.
+# The market side of a cycle (kline fetches, ATR/features, the ML batch) runs once for all of
+# them: main.py scans the union of their symbols with the loosest signal thresholds, then each
+# portfolio re-checks its own signal and runs its own position updates and entries.
+#
+# PORTFOLIOS_FILE (JSON, name -> overrides):
+#   {"baseline": {},
+#    "tight":    {"SL_MULTIPLIER": 1.0, "TP_MULTIPLIERS": [2, 3, 5], "COOLDOWN_SECONDS": 300},
+#    "majors":   {"SYMBOLS": ["BTCUSDT", "ETHUSDT"], "MIN_TREND_STRENGTH": 0.001, "INITIAL_BALANCE": 1000}}
+# Each one writes to LOG_DIR/<name>/ unless it sets "LOG_DIR". Without the file the bot runs a
+# single "default" portfolio on the configured paths (the layout from before portfolios).
+
+import json
+import os
+import re
+import config
+from core.signal_engine import generate_signal
+from engine.mark_to_market import MarkToMarket
+from engine.position_model import position_params
+from logger import open_positions_store
+from logger.ledger import Ledger
+from utils.terminal_logger import tlog
+
+# Config names a portfolio may override besides the position_params() ones
+_SETTINGS = ("MIN_TREND_STRENGTH", "MIN_VOLATILITY", "COOLDOWN_SECONDS", "ML_MIN_CONFIDENCE",
+             "POSITION_STAKE_PCT", "TP_SCALE_OUT", "INITIAL_BALANCE", "SYMBOLS", "LOG_DIR")
+_SIGNAL_KEYS = ("MIN_TREND_STRENGTH", "MIN_VOLATILITY")
+
+
+def portfolio_params(overrides: dict = None) -> dict:
+    """Config values of every overridable setting, with `overrides` applied; unknown keys raise ValueError."""
+    p = dict(position_params())
+    p.update({k: getattr(config, k) for k in _SETTINGS})
+    overrides = dict(overrides or {})
+    unknown = [k for k in overrides if k not in p]
+    if unknown:
+        raise ValueError(f"Unknown portfolio setting(s): {', '.join(unknown)} (known: {', '.join(p)})")
+    if isinstance(overrides.get("SYMBOLS"), str):
+        overrides["SYMBOLS"] = [s.strip() for s in overrides["SYMBOLS"].split(",") if s.strip()]
+    p.update(overrides)
+    return p
+
+
+class Portfolio:
+    """
+    One paper account. log_dir=None uses the configured paths (TRADE_LOG_PATH, LEDGER_PATH, ...);
+    otherwise every file lives in log_dir under its default name.
+    """
+
+    def __init__(self, name: str = "default", overrides: dict = None, log_dir: str = None):
+        self.name = name
+        self.overrides = dict(overrides or {})
+        self.params = portfolio_params(self.overrides)
+        # position_params() overrides for update_position_status (None = config, no per-call copy)
+        self.position_overrides = {k: v for k, v in self.overrides.items() if k in position_params()} or None
+        self.signal_params = {k: self.params[k] for k in _SIGNAL_KEYS}
+        self.symbols = list(self.params["SYMBOLS"])
+        self.open_trades = []
+        self.cooldowns = {}          # {symbol: epoch_until}
+        self.log = tlog if log_dir is None else (lambda msg: tlog(f"[{name}] {msg}"))
+
+        if log_dir is None:
+            self.log_dir = config.LOG_DIR
+            self.paths = {"trade_log": config.TRADE_LOG_PATH, "journal": config.JOURNAL_PATH,
+                          "ml_log": config.ML_LOG_FILE, "balance": config.BALANCE_LOG_PATH,
+                          "ledger": config.LEDGER_PATH, "equity": config.EQUITY_CURVE_PATH,
+                          "open_positions": open_positions_store.STORE_PATH,
+                          "heartbeat": os.path.join(os.path.dirname(os.path.abspath(config.BALANCE_LOG_PATH)), ".last_heartbeat")}
+        else:
+            self.log_dir = log_dir
+            self.paths = {key: os.path.join(log_dir, fname) for key, fname in (
+                ("trade_log", "trade_log.csv"), ("journal", "journal.csv"), ("ml_log", "ml_log.csv"),
+                ("balance", "balance_history.csv"), ("ledger", "trade_events.ndjson"),
+                ("equity", "equity_curve.bin"), ("open_positions", "open_positions.json"),
+                ("heartbeat", ".last_heartbeat"))}
+        self.ledger = Ledger(self.paths["ledger"], self.paths["trade_log"], self.paths["journal"],
+                             self.paths["ml_log"], log=self.log)
+        self.mtm = MarkToMarket(self.paths["equity"], self.params["POSITION_STAKE_PCT"], self.params["TP_SCALE_OUT"],
+                                self.paths["balance"], self.params["INITIAL_BALANCE"])
+
+    def entry_symbols(self, now: float) -> set:
+        """Symbols this portfolio may open a trade on this cycle (no open trade, not cooling down)."""
+        open_syms = {t["symbol"] for t in self.open_trades if str(t.get("status", "")).lower() == "open"}
+        return {s for s in self.symbols if s not in open_syms and now >= self.cooldowns.get(s, 0)}
+
+    def signal(self, symbol: str, candle: dict):
+        """This portfolio's entry signal on a candle (its own thresholds)."""
+        return generate_signal(symbol, candle, params=self.signal_params)
+
+
+_default = None
+
+
+def default_portfolio() -> Portfolio:
+    """The single portfolio on the configured paths (created on first use)."""
+    global _default
+    if _default is None:
+        _default = Portfolio()
+    return _default
+
+
+def load_portfolios(path: str = None) -> list:
+    """Portfolios from PORTFOLIOS_FILE (or `path`); [default_portfolio()] when none is configured."""
+    path = config.PORTFOLIOS_FILE if path is None else path
+    if not path:
+        return [default_portfolio()]
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError(f"{path}: expected a non-empty JSON object of portfolio name -> overrides")
+    portfolios, dirs = [], set()
+    for name, overrides in spec.items():
+        if not re.fullmatch(r"[\w.-]+", name):
+            raise ValueError(f"{path}: portfolio name {name!r} must be usable as a directory name")
+        overrides = overrides or {}
+        log_dir = overrides.get("LOG_DIR") or os.path.join(config.LOG_DIR, name)
+        if os.path.abspath(log_dir) in dirs:
+            raise ValueError(f"{path}: portfolio {name!r} shares its LOG_DIR ({log_dir}) with another one")
+        dirs.add(os.path.abspath(log_dir))
+        portfolios.append(Portfolio(name, overrides, log_dir))
+    return portfolios
+
+
+def scan_symbols(portfolios: list) -> list:
+    """Every portfolio's symbols, once each, in first-seen order (the shared scan universe)."""
+    return list(dict.fromkeys(s for pf in portfolios for s in pf.symbols))
+
+
+def scan_signal_params(portfolios: list):
+    """
+    Loosest signal thresholds over the portfolios, so the shared scan produces (and ML scores) every
+    candidate any of them could take; None when that is just the config.
+    """
+    p = {k: min(pf.signal_params[k] for pf in portfolios) for k in _SIGNAL_KEYS}
+    return None if p == {k: getattr(config, k) for k in _SIGNAL_KEYS} else p
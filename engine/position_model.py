@@ -1,13 +1,58 @@
 # engine/position_model.py
 import uuid
+import random
+from contextlib import contextmanager
 from config import TP_MULTIPLIERS, SL_MULTIPLIER, TRAILING_START_AFTER_TP, TRAILING_GAP_ATR, PRICE_BUFFER_PCT
 from utils.terminal_logger import tlog
-import time
+from utils import clock
+from utils.pnl_utils import calc_realistic_pnl
 
-def build_fake_trade(signal: dict, candle: dict, atr: float) -> dict:
+_id_rng = None   # seeded RNG for reproducible trade ids (replay / simulation)
+
+def seed_trade_ids(seed):
+    """Make trade ids deterministic (None restores uuid4)."""
+    global _id_rng
+    _id_rng = random.Random(seed) if seed is not None else None
+
+@contextmanager
+def seeded_trade_ids(seed):
+    """seed_trade_ids(seed) for the duration of a block; the previous id source is restored after."""
+    global _id_rng
+    prev = _id_rng
+    seed_trade_ids(seed)
+    try:
+        yield
+    finally:
+        _id_rng = prev
+
+def _new_trade_id() -> str:
+    if _id_rng is not None:
+        return uuid.UUID(int=_id_rng.getrandbits(128)).hex[:8]
+    return uuid.uuid4().hex[:8]
+
+# Exit/sizing knobs; keys match the config names so config-style overrides can be passed through
+_DEFAULT_PARAMS = {
+    "TP_MULTIPLIERS": TP_MULTIPLIERS,
+    "SL_MULTIPLIER": SL_MULTIPLIER,
+    "TRAILING_START_AFTER_TP": TRAILING_START_AFTER_TP,
+    "TRAILING_GAP_ATR": TRAILING_GAP_ATR,
+    "PRICE_BUFFER_PCT": PRICE_BUFFER_PCT,
+}
+
+def position_params(overrides: dict = None) -> dict:
+    """Config TP/SL/trailing/buffer settings with optional overrides (backtests, sweeps)."""
+    if not overrides:
+        return _DEFAULT_PARAMS
+    p = dict(_DEFAULT_PARAMS)
+    p.update({k: v for k, v in overrides.items() if k in p})
+    return p
+
+def build_fake_trade(signal: dict, candle: dict, atr: float, params: dict = None, log=tlog) -> dict:
     """
     Build an in-memory trade object for paper sim.
     """
+    p = position_params(params)
+    tp_mult, sl_mult = p["TP_MULTIPLIERS"], p["SL_MULTIPLIER"]
     entry = float(candle["close"])
     side = signal["direction"]
     is_long = side.upper() == "LONG"
@@ -15,13 +60,12 @@ def build_fake_trade(signal: dict, candle: dict, atr: float) -> dict:
     if not atr or atr <= 0:
         raise ValueError("ATR must be positive for TP/SL construction.")
 
-    tp1 = entry + (TP_MULTIPLIERS[0]*atr if is_long else -TP_MULTIPLIERS[0]*atr)
-    tp2 = entry + (TP_MULTIPLIERS[1]*atr if is_long else -TP_MULTIPLIERS[1]*atr)
-    tp3 = entry + (TP_MULTIPLIERS[2]*atr if is_long else -TP_MULTIPLIERS[2]*atr)
-    sl  = entry - (SL_MULTIPLIER*atr if is_long else -SL_MULTIPLIER*atr)
-
+    tp1 = entry + (tp_mult[0]*atr if is_long else -tp_mult[0]*atr)
+    tp2 = entry + (tp_mult[1]*atr if is_long else -tp_mult[1]*atr)
+    tp3 = entry + (tp_mult[2]*atr if is_long else -tp_mult[2]*atr)
+    sl  = entry - (sl_mult*atr if is_long else -sl_mult*atr)
     trade = {
-        "trade_id": uuid.uuid4().hex[:8],
+        "trade_id": _new_trade_id(),
         "symbol": signal["symbol"],
         "side": side,
         "entry_price": entry,
@@ -38,41 +82,68 @@ def build_fake_trade(signal: dict, candle: dict, atr: float) -> dict:
         "leverage": signal.get("leverage",1),
         "strategy": signal.get("strategy_name","basic_trend"),
         "duration_sec": 0,
-        "opened_at": time.strftime("%Y-%m-%d %H:%M:%S"),  # ✅ added (used for catch-up & bookkeeping)
+        "mae": 0.0,               # worst / best unrealized PnL % while open (track_excursion)
+        "mfe": 0.0,
+        "opened_at": clock.strftime("%Y-%m-%d %H:%M:%S"),  # ✅ added (used for catch-up & bookkeeping)
         # pass-through fields for logging/ML if present
         "adx": signal.get("adx",0),
         "rsi": signal.get("rsi",0),
         "macd": signal.get("macd",0),
         "ema_ratio": signal.get("ema_ratio",1.0),
+        "trend_strength": signal.get("trend_strength",0.0),
+        "volatility": signal.get("volatility",0.0),
     }
-    tlog(f"🧩 Open {trade['symbol']} {side} @ {entry:.4f} | SL {sl:.4f} | TP {tp1:.4f}/{tp2:.4f}/{tp3:.4f}")
+    log(f"🧩 Open {trade['symbol']} {side} @ {entry:.4f} | SL {sl:.4f} | TP {tp1:.4f}/{tp2:.4f}/{tp3:.4f}")
     return trade
 
-def _price_hit(level: float, high: float, low: float, is_long: bool) -> bool:
-    buf = PRICE_BUFFER_PCT
+def _price_hit(level: float, high: float, low: float, is_long: bool, buf: float = None) -> bool:
+    buf = PRICE_BUFFER_PCT if buf is None else buf
     if is_long:
         return high >= level*(1 - buf)
     else:
         return low  <= level*(1 + buf)
 
-def update_position_status(trade: dict, candle: dict, atr: float=None) -> dict:
+def track_excursion(trade: dict, high: float, low: float):
+    """
+    Widen the trade's MAE/MFE (PnL % at the worst/best price seen, same formula as the realized
+    PnL) with a price range. Open bars contribute their high/low, the closing bar only its exit
+    price (where inside that bar the exit happened is unknown).
+    """
+    is_long = str(trade["side"]).upper() == "LONG"
+    best, worst = (high, low) if is_long else (low, high)
+    lev = trade.get("leverage", 1)
+    trade["mfe"] = max(float(trade.get("mfe") or 0.0), calc_realistic_pnl(trade["entry_price"], best, trade["side"], lev))
+    trade["mae"] = min(float(trade.get("mae") or 0.0), calc_realistic_pnl(trade["entry_price"], worst, trade["side"], lev))
+
+def update_position_status(trade: dict, candle: dict, atr: float=None, params: dict = None, log=tlog) -> dict:
     """
     Update a single open trade with the given candle (same symbol).
-    Applies TP/SL logic with buffers and trailing.
+    Applies TP/SL logic with buffers and trailing, then the MAE/MFE tracking.
     """
     if str(trade.get("status","")).lower() != "open":
         return trade
+    _apply_candle(trade, candle, atr, params, log)
+    if trade["status"] == "open":
+        track_excursion(trade, float(candle["high"]), float(candle["low"]))
+    else:
+        track_excursion(trade, trade["exit_price"], trade["exit_price"])
+    return trade
+
+def _apply_candle(trade: dict, candle: dict, atr: float, params: dict, log) -> dict:
+    p = position_params(params)
+    buf = p["PRICE_BUFFER_PCT"]
+    gap_atr = p["TRAILING_GAP_ATR"]
 
     high = float(candle["high"])
     low  = float(candle["low"])
     is_long = str(trade["side"]).upper() == "LONG"
 
     # 1) Check SL first (hard stop)
-    if _price_hit(trade["sl"], high, low, not is_long):  # invert direction for SL test
+    if _price_hit(trade["sl"], high, low, not is_long, buf):  # invert direction for SL test
         trade["exit_price"] = trade["sl"]
         trade["status"] = "closed"
         trade["exit_reason"] = "SL"
-        tlog(f"🛑 SL hit: {trade['symbol']} {trade['side']} @ {trade['sl']:.4f} | Candle H/L {high:.4f}/{low:.4f}")
+        log(f"🛑 SL hit: {trade['symbol']} {trade['side']} @ {trade['sl']:.4f} | Candle H/L {high:.4f}/{low:.4f}")
         return trade
 
     # 2) Check TPs in order
@@ -80,17 +151,17 @@ def update_position_status(trade: dict, candle: dict, atr: float=None) -> dict:
         if i in trade["hit"]:
             continue
         level = float(trade[level_key])
-        if _price_hit(level, high, low, is_long):
+        if _price_hit(level, high, low, is_long, buf):
             trade["hit"].append(i)
-            tlog(f"🎯 {level_key.upper()} hit: {trade['symbol']} {trade['side']} @ {level:.4f} | H/L {high:.4f}/{low:.4f}")
+            log(f"🎯 {level_key.upper()} hit: {trade['symbol']} {trade['side']} @ {level:.4f} | H/L {high:.4f}/{low:.4f}")
             # trailing activation after TP2
-            if i+1 >= TRAILING_START_AFTER_TP and atr and atr>0:
-                gap = TRAILING_GAP_ATR*float(atr)
+            if i+1 >= p["TRAILING_START_AFTER_TP"] and atr and atr>0:
+                gap = gap_atr*float(atr)
                 trail = (level - gap) if is_long else (level + gap)
                 prev = trade.get("trail_level")
                 trade["trail_active"] = True
                 trade["trail_level"]  = max(prev, trail) if prev and is_long else (min(prev, trail) if prev and not is_long else trail)
-                tlog(f"🪢 Trailing set @ {trade['trail_level']:.4f} (gap≈{TRAILING_GAP_ATR}×ATR)")
+                log(f"🪢 Trailing set @ {trade['trail_level']:.4f} (gap≈{gap_atr}×ATR)")
             # if TP3: close
             if i == 2:
                 trade["exit_price"] = level
@@ -105,23 +176,23 @@ def update_position_status(trade: dict, candle: dict, atr: float=None) -> dict:
         # Trail moves only in favorable direction
         if is_long:
             # Raise trail if price made a new high beyond TP2 area
-            new_trail = high - TRAILING_GAP_ATR*float(atr)
+            new_trail = high - gap_atr*float(atr)
             if new_trail > tl:
                 trade["trail_level"] = new_trail
             # Triggered?
-            if low <= trade["trail_level"]*(1 + PRICE_BUFFER_PCT):
+            if low <= trade["trail_level"]*(1 + buf):
                 trade["exit_price"] = trade["trail_level"]
                 trade["status"] = "closed"
                 trade["exit_reason"] = "TrailingSL"
-                tlog(f"🪤 TrailingSL close @ {trade['trail_level']:.4f} | H/L {high:.4f}/{low:.4f}")
+                log(f"🪤 TrailingSL close @ {trade['trail_level']:.4f} | H/L {high:.4f}/{low:.4f}")
         else:
-            new_trail = low + TRAILING_GAP_ATR*float(atr)
+            new_trail = low + gap_atr*float(atr)
             if new_trail < tl:
                 trade["trail_level"] = new_trail
-            if high >= trade["trail_level"]*(1 - PRICE_BUFFER_PCT):
+            if high >= trade["trail_level"]*(1 - buf):
                 trade["exit_price"] = trade["trail_level"]
                 trade["status"] = "closed"
                 trade["exit_reason"] = "TrailingSL"
-                tlog(f"🪤 TrailingSL close @ {trade['trail_level']:.4f} | H/L {high:.4f}/{low:.4f}")
+                log(f"🪤 TrailingSL close @ {trade['trail_level']:.4f} | H/L {high:.4f}/{low:.4f}")
 
     return trade
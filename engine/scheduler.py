@@ -0,0 +1,88 @@
+# engine/scheduler.py
+# Candle-close aligned scheduler for the main loop.
+# - "entry" events fire ENTRY_DELAY_MS after each TIMEFRAME bar closes (evaluate the closed bar)
+# - "monitor" events fire every EVALUATION_INTERVAL seconds in between (SL/TP checks only)
+# Deadlines are always re-derived from the wall clock, so sleep overshoot, clock drift
+# and NTP steps do not accumulate; missed bar closes are coalesced into one entry event.
+
+from utils import clock as _clock
+from utils.terminal_logger import tlog
+
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Never sleep longer than this in one go, so wall-clock jumps are noticed quickly.
+_MAX_SLEEP_CHUNK = 5.0
+
+
+def timeframe_seconds(tf: str) -> int:
+    """'1m' -> 60, '5m' -> 300, '1h' -> 3600, '1d' -> 86400 (Binance interval strings)."""
+    s = str(tf or "").strip()
+    try:
+        if s.endswith("M"):
+            raise ValueError("monthly bars are not supported")
+        return int(s[:-1]) * _UNIT_SECONDS[s[-1]]
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"Unsupported timeframe '{tf}': {e}")
+
+
+class CandleScheduler:
+    """
+    wait() blocks until the next event and returns "entry" or "monitor".
+    clock/sleep are injectable; by default they follow utils.clock (real, replay or simulated).
+    """
+
+    def __init__(self, timeframe: str, entry_delay_ms: int, monitor_interval: float,
+                 clock=None, sleep=None):
+        self.tf_sec = timeframe_seconds(timeframe)
+        self.delay = max(0.0, float(entry_delay_ms) / 1000.0)
+        self.monitor_interval = max(1.0, float(monitor_interval))
+        self._clock = clock or _clock.now
+        self._sleep = sleep or _clock.sleep
+
+        now = self._clock()
+        self.last_bar_close = self.bar_close_before(now)   # close time of the bar evaluated last
+        self._next_entry = self.bar_close_after(now) + self.delay
+        self._next_monitor = now + self.monitor_interval
+        self.missed_ticks = 0
+
+    def bar_close_before(self, now: float) -> float:
+        """Most recent bar boundary at or before `now` (epoch seconds, UTC aligned like Binance)."""
+        return (int(now) // self.tf_sec) * self.tf_sec
+
+    def bar_close_after(self, now: float) -> float:
+        return self.bar_close_before(now) + self.tf_sec
+
+    def _resync(self, now: float):
+        # Clock stepped backwards (or was set far ahead before): re-anchor on the wall clock.
+        if self._next_entry - now > self.tf_sec + self.delay:
+            tlog(f"⏱️ Clock jump detected; re-aligning scheduler to next {self.tf_sec}s bar close.")
+            self._next_entry = self.bar_close_after(now) + self.delay
+        if self._next_monitor - now > self.monitor_interval:
+            self._next_monitor = now + self.monitor_interval
+
+    def wait(self) -> str:
+        while True:
+            now = self._clock()
+            self._resync(now)
+            due = min(self._next_entry, self._next_monitor)
+            if now < due:
+                self._sleep(min(due - now, _MAX_SLEEP_CHUNK))
+                continue
+
+            if now >= self._next_entry:
+                # Whole bars that closed while we were busy/asleep are coalesced into this event.
+                missed = int((now - self._next_entry) // self.tf_sec)
+                if missed > 0:
+                    self.missed_ticks += missed
+                    tlog(f"⏱️ Scheduler missed {missed} bar close(s); evaluating the latest one only.")
+                self.last_bar_close = self.bar_close_before(now - self.delay)
+                self._next_entry = self.last_bar_close + self.tf_sec + self.delay
+                # An entry cycle also updates open trades, so push the next monitor tick out.
+                self._next_monitor = now + self.monitor_interval
+                return "entry"
+
+            # Monitor tick; skip (not queue) any ticks we overslept.
+            self._next_monitor = now + self.monitor_interval
+            if self._next_monitor > self._next_entry:
+                self._next_monitor = self._next_entry
+            return "monitor"
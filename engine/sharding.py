@@ -0,0 +1,124 @@
+# engine/sharding.py
+# Multi-process symbol sharding for large SYMBOLS universes.
+# The coordinator (main process) splits symbols into N stable shards; persistent worker
+# processes run engine.pipeline.scan_symbol for their shard and send back compact result
+# dicts. Workers never touch logs or the open-positions store: the coordinator stays the
+# single writer for trade_log / journal / ml_log / balance / open_positions.
+
+import multiprocessing as mp
+import signal as _signal
+import time
+import zlib
+from config import EVALUATION_INTERVAL
+from utils.terminal_logger import tlog
+
+
+def _worker_init():
+    # Ctrl+C is handled by the coordinator; workers just die with the pool.
+    _signal.signal(_signal.SIGINT, _signal.SIG_IGN)
+    # Import the pipeline once per process, not once per task (ml_predictor stays unloaded: the
+    # coordinator scores each cycle's candidates itself, so workers scan with use_ml=False).
+    import engine.pipeline  # noqa: F401
+    from config import MTF_ENABLED
+    if MTF_ENABLED:
+        # Each worker keeps base-interval buffers for its own shard only
+        from data.resampler import install_feed
+        install_feed()
+
+
+def _scan_shard(task):
+    from engine.pipeline import scan_symbol
+    symbols, entry_symbols, use_ml, signal_params = task
+    return [scan_symbol(s, evaluate_entry=s in entry_symbols, use_ml=use_ml, signal_params=signal_params) for s in symbols]
+
+
+def shard_of(symbol: str, n_shards: int) -> int:
+    """Stable symbol -> shard assignment (same across restarts and processes)."""
+    return zlib.crc32(symbol.encode("utf-8")) % max(1, n_shards)
+
+
+def scan_serial(symbols, entry_symbols, use_ml: bool = True, signal_params: dict = None) -> list:
+    from engine.pipeline import scan_symbol
+    return [scan_symbol(s, evaluate_entry=s in entry_symbols, use_ml=use_ml, signal_params=signal_params)
+            for s in symbols]
+
+
+class ShardCoordinator:
+    """
+    Owns `workers` single-process pools; shard i always runs on worker i, so per-symbol
+    state inside a worker (client, resampler buffers) is built once and stays warm.
+    scan() returns results in the order of `symbols`.
+    A shard whose worker fails or has not answered within `timeout` seconds of the scan starting
+    (default: one EVALUATION_INTERVAL) gets a fresh worker, and its symbols are scanned
+    in-process for that cycle.
+    """
+
+    def __init__(self, workers: int, timeout: float = None):
+        self.workers = max(1, int(workers))
+        self.timeout = EVALUATION_INTERVAL if timeout is None else timeout
+        self._pools = None
+
+    @staticmethod
+    def _new_pool():
+        # spawn: the coordinator runs background threads (Telegram, metrics) that must not be forked
+        return mp.get_context("spawn").Pool(processes=1, initializer=_worker_init)
+
+    def _ensure_pools(self):
+        if self._pools is None:
+            self._pools = [self._new_pool() for _ in range(self.workers)]
+            tlog(f"🧵 Started {self.workers} shard worker process(es).")
+        return self._pools
+
+    def _restart(self, i: int):
+        if self._pools is None:
+            return
+        _stop(self._pools[i])
+        try:
+            self._pools[i] = self._new_pool()
+        except Exception as e:
+            tlog(f"⚠️ Could not restart shard worker {i} ({e}); restarting all workers next cycle.")
+            self.close()
+
+    def scan(self, symbols, entry_symbols, use_ml: bool = True, signal_params: dict = None) -> list:
+        symbols = list(symbols)
+        entry_symbols = frozenset(entry_symbols)
+        try:
+            pools = self._ensure_pools()
+            shards = [[] for _ in pools]
+            for s in symbols:
+                shards[shard_of(s, len(pools))].append(s)
+            pending = [(i, sh, pool.apply_async(_scan_shard, ((sh, entry_symbols & set(sh), use_ml, signal_params),)))
+                       for i, (pool, sh) in enumerate(zip(pools, shards)) if sh]
+        except Exception as e:
+            tlog(f"⚠️ Shard pool error, scanning in-process this cycle: {e}")
+            self.close()
+            return scan_serial(symbols, entry_symbols, use_ml, signal_params)
+        deadline = time.monotonic() + self.timeout
+        by_symbol, failed = {}, []
+        for i, sh, job in pending:
+            try:
+                for r in job.get(timeout=max(0.0, deadline - time.monotonic())):
+                    by_symbol[r["symbol"]] = r
+            except Exception as e:
+                failed.append((i, sh, f"no answer within {self.timeout}s" if isinstance(e, mp.TimeoutError) else e))
+        # after collecting the healthy shards, so the in-process scans don't eat into their deadline
+        for i, sh, reason in failed:
+            tlog(f"⚠️ Shard worker {i} failed ({reason}); restarting it and scanning its "
+                 f"{len(sh)} symbol(s) in-process this cycle.")
+            self._restart(i)
+            for r in scan_serial(sh, entry_symbols & set(sh), use_ml, signal_params):
+                by_symbol[r["symbol"]] = r
+        return [by_symbol[s] for s in symbols if s in by_symbol]
+
+    def close(self):
+        for pool in self._pools or []:
+            _stop(pool)
+        self._pools = None
+
+
+def _stop(pool):
+    try:
+        pool.terminate()
+        pool.join()
+    except Exception:
+        pass
@@ -0,0 +1,179 @@
+# engine/sweep.py
+# Parallel parameter sweep over engine.backtest.simulate().
+#
+# Search space (JSON):
+#   {"grid":   {"SL_MULTIPLIER": [1.0, 1.5, 2.0], "TP_MULTIPLIERS": [[0.7, 1.4, 2.0], [1, 2, 3]]}}
+#   {"random": {"SL_MULTIPLIER": {"min": 0.8, "max": 2.5}, "TRAILING_START_AFTER_TP": [1, 2]},
+#    "samples": 500, "seed": 7}
+# Random values are either a list (choice) or {"min", "max"} (uniform; ints stay ints).
+# Any key of backtest_params() can be swept; unknown keys are rejected up front.
+#
+# Bars are prepared once and published in one shared-memory block; workers attach to it in
+# their initializer, so tasks only carry a params dict. Each finished evaluation is appended
+# to <out>.ndjson immediately (the resume log: ids already there are skipped on restart) and
+# the ranked table <out>.csv is rewritten atomically every `rank_every` results and at the end.
+
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import signal as _signal
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from engine.backtest import backtest_params, prepare_bars, simulate, summarize
+
+_ARRAYS = ("open", "high", "low", "close", "close_ms", "atr")
+_RANK_COLUMNS = ["id", "total_pnl_pct", "win_rate", "max_drawdown_pct", "trades",
+                 "avg_pnl_pct", "final_balance", "params"]
+
+
+# ---------- search space ----------
+def _check_keys(keys):
+    known = backtest_params()
+    unknown = [k for k in keys if k not in known]
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s): {', '.join(unknown)} (known: {', '.join(known)})")
+
+
+def expand_space(space: dict) -> list:
+    """List of param dicts for a grid or random space (deterministic for a given spec)."""
+    if "grid" in space:
+        grid = space["grid"]
+        _check_keys(grid)
+        keys = sorted(grid)
+        return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+    if "random" in space:
+        dims = space["random"]
+        _check_keys(dims)
+        rng = random.Random(space.get("seed", 0))
+        out = []
+        for _ in range(int(space.get("samples", 100))):
+            p = {}
+            for k in sorted(dims):
+                d = dims[k]
+                if isinstance(d, dict):
+                    lo, hi = d["min"], d["max"]
+                    p[k] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else round(rng.uniform(lo, hi), 6)
+                else:
+                    p[k] = rng.choice(d)
+            out.append(p)
+        return out
+    raise ValueError("Search space needs a 'grid' or 'random' section.")
+
+
+def param_id(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+# ---------- shared bars ----------
+def _publish(bars: dict):
+    """Copy the bar arrays into one shared-memory block; returns (shm, spec for workers)."""
+    n = len(bars["close"])
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * 8 * len(_ARRAYS)))
+    view = np.ndarray((len(_ARRAYS), n), dtype=np.float64, buffer=shm.buf)
+    for row, name in enumerate(_ARRAYS):
+        view[row] = bars[name]   # close_ms (< 2**53) is exact in float64
+    return shm, {"name": shm.name, "n": n, "interval": bars["interval"]}
+
+
+def _attach(spec: dict):
+    shm = shared_memory.SharedMemory(name=spec["name"])
+    view = np.ndarray((len(_ARRAYS), spec["n"]), dtype=np.float64, buffer=shm.buf)
+    bars = {name: view[row] for row, name in enumerate(_ARRAYS)}
+    bars["close_ms"] = bars["close_ms"].astype("int64")
+    bars["interval"] = spec["interval"]
+    return shm, bars
+
+
+_worker = {}
+
+
+def _worker_init(spec: dict, symbol: str):
+    _signal.signal(_signal.SIGINT, _signal.SIG_IGN)
+    _worker["shm"], _worker["bars"] = _attach(spec)
+    _worker["symbol"] = symbol
+
+
+def _evaluate(task):
+    pid, params = task
+    t0 = time.perf_counter()
+    closed, open_trade = simulate(_worker["bars"], _worker["symbol"], params)
+    out = summarize(closed)
+    out.update({"id": pid, "params": params, "open_at_end": open_trade is not None,
+                "sec": round(time.perf_counter() - t0, 3)})
+    return out
+
+
+# ---------- results ----------
+def load_results(path: str) -> list:
+    """Finished evaluations from the NDJSON resume log (a torn last line is ignored)."""
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                continue
+    return results
+
+
+def write_ranking(results: list, path: str, rank_by: str = "total_pnl_pct"):
+    rows = sorted(results, key=lambda r: r.get(rank_by, 0.0), reverse=rank_by != "max_drawdown_pct")
+    df = pd.DataFrame([{**{c: r.get(c) for c in _RANK_COLUMNS}, "params": json.dumps(r["params"], sort_keys=True)}
+                       for r in rows], columns=_RANK_COLUMNS)
+    tmp = path + ".tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def run_sweep(df: pd.DataFrame, symbol: str, interval: str, space: dict, out_prefix: str,
+              workers: int = None, rank_by: str = "total_pnl_pct", rank_every: int = 20, log=print) -> list:
+    """
+    Evaluate every point of `space` not already in <out_prefix>.ndjson; returns all results.
+    Safe to interrupt: rerun with the same arguments to continue.
+    """
+    log_path, rank_path = out_prefix + ".ndjson", out_prefix + ".csv"
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+
+    points = [(param_id(p), p) for p in expand_space(space)]
+    results = load_results(log_path)
+    done = {r["id"] for r in results}
+    todo = [t for t in points if t[0] not in done]
+    log(f"Sweep: {len(points)} points, {len(points) - len(todo)} already done, {len(todo)} to run.")
+    if not todo:
+        write_ranking(results, rank_path, rank_by)
+        return results
+
+    bars = prepare_bars(df, interval, with_features=False)
+    shm, spec = _publish(bars)
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    ctx = mp.get_context("spawn")
+    pool = ctx.Pool(processes=workers, initializer=_worker_init, initargs=(spec, symbol))
+    t0 = time.perf_counter()
+    try:
+        with open(log_path, "a", encoding="utf-8") as f:
+            for i, r in enumerate(pool.imap_unordered(_evaluate, todo), 1):
+                f.write(json.dumps(r, separators=(",", ":")) + "\n")
+                f.flush()
+                results.append(r)
+                if i % rank_every == 0 or i == len(todo):
+                    write_ranking(results, rank_path, rank_by)
+                    rate = i / max(time.perf_counter() - t0, 1e-9)
+                    log(f"  {i}/{len(todo)} done ({rate:.1f}/s, {workers} workers)")
+        pool.close()
+    except KeyboardInterrupt:
+        log("Interrupted; finished results are saved, rerun to resume.")
+        pool.terminate()
+        write_ranking(results, rank_path, rank_by)
+        raise
+    finally:
+        pool.join()
+        shm.close()
+        shm.unlink()
+    return results
@@ -3,88 +3,100 @@
 # - New helper finalize_close() (used internally only; no renames).
 # - Persist open positions on open/partial/close via open_positions_store.
 # - Save an hourly heartbeat still works as before.
+# - Trade events (open, TP hit, trail update, close) are written once, to the ledger
+#   (logger/ledger.py); trade_log/journal/ml_log are projected from it.
+# - Realized PnL (TP scale-outs and closes) is booked into the balance by engine.mark_to_market;
+#   balance snapshots and the journal's balance column carry the realized balance.
+# - Every function takes the engine.portfolio.Portfolio whose ledger, balance, store, heartbeat
+#   and TP/SL overrides apply (default: the single portfolio on the configured paths).
 
 import os
-import time
-from config import BALANCE_LOG_PATH
-from logger.balance_tracker import load_last_balance, update_balance
-from logger.journal_writer import update_journal
-from logger.trade_logger import log_trade, log_exit
-from utils.ml_logger import log_ml_features
+from logger.balance_tracker import update_balance
+from engine.portfolio import default_portfolio
 from utils.pnl_utils import calc_realistic_pnl
-from utils.terminal_logger import tlog
-from logger.open_positions_store import load_open_positions, save_open_positions, upsert_position, remove_position
+from utils import clock
+from logger.open_positions_store import save_open_positions, upsert_position, remove_position
 
-_HEARTBEAT_FILE = os.path.join(os.path.dirname(os.path.abspath(BALANCE_LOG_PATH)), ".last_heartbeat")
-
-def _should_write_heartbeat(period_sec=3600) -> bool:
+def _should_write_heartbeat(path: str, period_sec=3600) -> bool:
     try:
-        if not os.path.exists(_HEARTBEAT_FILE):
+        if not os.path.exists(path):
             return True
-        mtime = os.path.getmtime(_HEARTBEAT_FILE)
-        return (time.time() - mtime) >= period_sec
+        # File holds the clock time of the last heartbeat (works under replay/simulation clocks too)
+        with open(path, "r", encoding="utf-8") as f:
+            last = float(f.read().strip() or 0)
+        return (clock.now() - last) >= period_sec
     except Exception:
         return True
 
-def _mark_heartbeat_written():
+def _mark_heartbeat_written(path: str, log):
     try:
-        os.makedirs(os.path.dirname(_HEARTBEAT_FILE), exist_ok=True)
-        with open(_HEARTBEAT_FILE, "w", encoding="utf-8") as f:
-            f.write(str(time.time()))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(str(clock.now()))
     except Exception as e:
-        tlog(f"⚠️ Heartbeat mark error: {e}")
+        log(f"⚠️ Heartbeat mark error: {e}")
 
-def finalize_close(trade: dict, atr: float = 0.0):
-    """One place to do the close -> logs/journal/ml/balance updates."""
+def finalize_close(trade: dict, atr: float = 0.0, portfolio=None):
+    """One place to do the close -> realized PnL, ledger event (logs/journal/ml views) and balance updates."""
+    pf = portfolio or default_portfolio()
     pnl_pct = calc_realistic_pnl(trade.get("entry_price"), trade.get("exit_price"), trade.get("side","LONG"), trade.get("leverage",1))
-    tp_hits = ",".join([f"TP{i+1}" for i in trade.get("hit",[])]) if trade.get("hit") else ""
-    log_exit(trade, pnl_pct, tp_hits)
-    update_journal(trade)
-    log_ml_features(trade, trade.get("trend_strength",0), trade.get("volatility",0), atr)
-    update_balance(load_last_balance())
+    pf.mtm.book(trade)
+    trade["balance"] = round(pf.mtm.balance, 2)
+    pf.ledger.record_close(trade, atr, pnl_pct)
+    update_balance(pf.mtm.balance, pf.paths["balance"])
     # remove from persisted store
-    remove_position(trade.get("trade_id",""))
+    remove_position(trade.get("trade_id",""), path=pf.paths["open_positions"])
 
-def maybe_open_new_trade(open_trades: list, trade: dict):
+def maybe_open_new_trade(open_trades: list, trade: dict, portfolio=None):
     """
     Append a freshly created trade to the open list and log it.
     """
+    pf = portfolio or default_portfolio()
+    pf.mtm.stake(trade)
     open_trades.append(trade)
-    log_trade(trade)
+    pf.ledger.record_open(trade)
     # persist
     try:
-        upsert_position(trade, open_trades)
+        upsert_position(trade, open_trades, pf.paths["open_positions"])
     except Exception as e:
-        tlog(f"⚠️ persist open trade failed: {e}")
+        pf.log(f"⚠️ persist open trade failed: {e}")
 
-def check_open_trades(open_trades: list, symbol_candle_map: dict, atr_map: dict):
+def check_open_trades(open_trades: list, symbol_candle_map: dict, atr_map: dict, portfolio=None):
     """
     Iterate and update open trades by symbol candle; close and log if needed.
     """
+    pf = portfolio or default_portfolio()
     just_closed = []
 
     for trade in list(open_trades):
         sym = trade["symbol"]
         candle = symbol_candle_map.get(sym)
         atr = atr_map.get(sym, 0.0)
-        if not candle: 
+        if not candle:
             continue
 
         from engine.position_model import update_position_status
         old_status = trade["status"]
-        trade = update_position_status(trade, candle, atr)
+        old_hits, old_trail = len(trade.get("hit", [])), trade.get("trail_level")
+        trade = update_position_status(trade, candle, atr, params=pf.position_overrides, log=pf.log)
+        if trade["status"] == "open":
+            if len(trade.get("hit", [])) != old_hits:
+                pf.mtm.book(trade)   # TP scale-out
+                pf.ledger.record_tp(trade)
+            elif trade.get("trail_level") != old_trail:
+                pf.ledger.record_trail(trade)
 
         # Persist any state changes on partial TP (still open)
         if trade.get("hit") and old_status == "open" and trade["status"] == "open":
-            update_balance(load_last_balance())  # snapshot
+            update_balance(pf.mtm.balance, pf.paths["balance"])  # snapshot
             try:
-                upsert_position(trade, open_trades)
+                upsert_position(trade, open_trades, pf.paths["open_positions"])
             except Exception as e:
-                tlog(f"⚠️ persist partial update failed: {e}")
+                pf.log(f"⚠️ persist partial update failed: {e}")
 
         if trade["status"] == "closed" and old_status != "closed":
             try:
-                finalize_close(trade, atr)
+                finalize_close(trade, atr, pf)
             finally:
                 just_closed.append(trade)
                 try:
@@ -94,13 +106,13 @@ def check_open_trades(open_trades: list, symbol_candle_map: dict, atr_map: dict)
 
     # Ensure persistence after cycle
     try:
-        save_open_positions(open_trades)
+        save_open_positions(open_trades, pf.paths["open_positions"])
     except Exception as e:
-        tlog(f"⚠️ save_open_positions failed at cycle end: {e}")
+        pf.log(f"⚠️ save_open_positions failed at cycle end: {e}")
 
     # Heartbeat as before
-    if _should_write_heartbeat(3600):
-        update_balance(load_last_balance())
-        _mark_heartbeat_written()
+    if _should_write_heartbeat(pf.paths["heartbeat"], 3600):
+        update_balance(pf.mtm.balance, pf.paths["balance"])
+        _mark_heartbeat_written(pf.paths["heartbeat"], pf.log)
 
     return just_closed
@@ -1,9 +1,11 @@
 # logger/balance_tracker.py
 import os
 import csv
-import time
+from utils import clock
 from typing import Optional
 from config import BALANCE_LOG_PATH, INITIAL_BALANCE
+from utils.metrics import record_bytes
+from logger.schema import columns
 
 def _ensure_parent_dir(path: str):
     parent = os.path.dirname(os.path.abspath(path))
@@ -21,40 +23,47 @@ def _read_last_csv_row(path: str) -> Optional[list]:
     except Exception:
         return None
 
-def load_last_balance() -> float:
+def load_last_balance(path: str = None, initial: float = None) -> float:
     """
-    Returns the most recent balance from file or INITIAL_BALANCE.
+    Returns the most recent balance from file (default BALANCE_LOG_PATH) or the initial
+    balance (default INITIAL_BALANCE).
     """
+    path = path or BALANCE_LOG_PATH
+    initial = INITIAL_BALANCE if initial is None else initial
     try:
-        if not os.path.exists(BALANCE_LOG_PATH) or os.path.getsize(BALANCE_LOG_PATH) == 0:
-            return round(INITIAL_BALANCE, 2)
-        last = _read_last_csv_row(BALANCE_LOG_PATH)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return round(initial, 2)
+        last = _read_last_csv_row(path)
         if not last:
-            return round(INITIAL_BALANCE, 2)
+            return round(initial, 2)
         bal = float(last[1])
         return round(bal, 2)
     except Exception as e:
         print(f"⚠️ load_last_balance error: {e}")
-        return round(INITIAL_BALANCE, 2)
+        return round(initial, 2)
 
-def update_balance(new_balance: float):
+def update_balance(new_balance: float, path: str = None):
     """
-    Append a balance snapshot as (timestamp, balance). Never crashes the loop.
+    Append a balance snapshot as (timestamp, balance) to path (default BALANCE_LOG_PATH).
+    Never crashes the loop.
     """
+    path = path or BALANCE_LOG_PATH
     try:
         balance_value = round(float(new_balance), 2)
     except Exception as e:
         print(f"⚠️ Error rounding balance: {e} | raw value: {new_balance}")
         balance_value = round(INITIAL_BALANCE, 2)
 
-    _ensure_parent_dir(BALANCE_LOG_PATH)
-    new_file = not os.path.exists(BALANCE_LOG_PATH)
+    _ensure_parent_dir(path)
+    new_file = not os.path.exists(path)
 
     try:
-        with open(BALANCE_LOG_PATH, "a", newline="", encoding="utf-8") as f:
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            start = f.tell()
             writer = csv.writer(f)
             if new_file:
-                writer.writerow(["timestamp", "balance"])
-            writer.writerow([time.strftime("%Y-%m-%d %H:%M:%S"), balance_value])
+                writer.writerow(columns("balance"))
+            writer.writerow([clock.strftime("%Y-%m-%d %H:%M:%S"), balance_value])
+            record_bytes("balance", f.tell() - start)
     except Exception as e:
         print(f"⚠️ Error writing balance history: {e}")
@@ -1,40 +1,54 @@
 # logger/journal_writer.py
+# journal.csv view: one row per closed trade, projected from the trade event ledger
+# (logger/ledger.py); the backtester writes the same schema.
 import csv
 import os
-import time
+from utils import clock
 from config import JOURNAL_PATH
 from utils.pnl_utils import calc_realistic_pnl
-from utils.terminal_logger import tlog
+from utils.metrics import record_bytes
+from logger.schema import columns
 
-_FIELDS = [
-    "timestamp","trade_id","symbol","side","entry_price","exit_price",
-    "status","exit_reason","tp_hits","pnl","duration_sec","balance","strategy",
-    "ml_exit_reason","ml_confidence","ml_expected_pnl","atr","adx","rsi","macd","ema_ratio"
-]
+FIELDS = columns("journal")   # logger/schema.py
 
-def _write(path, fields, row):
+def _file_header(path: str) -> list:
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None) or FIELDS
+
+def append_rows(rows: list, path: str = JOURNAL_PATH):
+    """
+    Append journal rows (lists from journal_row) in one write. A journal started under an older
+    schema keeps its own columns (rows are mapped onto its header; newer columns are dropped until
+    it is rebuilt with scripts/project_ledger.py --rebuild).
+    """
+    if not rows:
+        return
     os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
-    new_file = not os.path.exists(path)
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    header = FIELDS if new_file else _file_header(path)
+    if header != FIELDS:
+        pos = [FIELDS.index(c) if c in FIELDS else None for c in header]
+        rows = [[row[i] if i is not None else "" for i in pos] for row in rows]
     with open(path, "a", newline="", encoding="utf-8") as f:
+        start = f.tell()
         w = csv.writer(f, quotechar='"', escapechar='\\')
         if new_file:
-            w.writerow(fields)
-        w.writerow(row)
+            w.writerow(FIELDS)
+        w.writerows(rows)
+        record_bytes("journal", f.tell() - start)
 
-def update_journal(trade: dict):
+def journal_row(trade: dict, timestamp: str = None) -> list:
     """
-    Append a closed-trade record into journal.csv.
+    Journal row (in FIELDS order) for a closed trade; timestamp defaults to now.
+    Shared with the backtester so both write the same schema.
     """
-    if str(trade.get("status","")).lower() != "closed":
-        return
-
     try:
         pnl = calc_realistic_pnl(trade.get("entry_price"), trade.get("exit_price"), trade.get("side","LONG"), trade.get("leverage",1))
     except Exception:
         pnl = 0.0
 
-    row = [
-        time.strftime("%Y-%m-%d %H:%M:%S"),
+    return [
+        timestamp or clock.strftime("%Y-%m-%d %H:%M:%S"),
         trade.get("trade_id"),
         trade.get("symbol"),
         trade.get("side"),
@@ -55,6 +69,6 @@ def update_journal(trade: dict):
         trade.get("rsi",""),
         trade.get("macd",""),
         trade.get("ema_ratio",""),
+        trade.get("mae",""),
+        trade.get("mfe",""),
     ]
-    _write(JOURNAL_PATH, _FIELDS, row)
-    tlog(f"📘 Journal updated: {trade.get('symbol')} | Exit: {trade.get('exit_reason')} | PnL: {pnl:.4f}%")
@@ -0,0 +1,291 @@
+# logger/ledger.py
+# Append-only trade event ledger: the only trade write on the hot path. One compact JSON
+# record per line in LEDGER_PATH:
+#
+#   {"e":"open","t":<time>,"id":<trade_id>,<trade fields known at open>...}
+#   {"e":"adopt",...}   same as open, for a trade opened before the ledger existed (no OPEN row)
+#   {"e":"tp","t":..,"id":..,"hit":[0,1],"trail_active":true,"trail_level":..}
+#   {"e":"trail","t":..,"id":..,"trail_level":..}
+#   {"e":"close","t":..,"id":..,"exit_price":..,"exit_reason":..,"hit":[..],"trail_level":..,
+#    "duration_sec":..,"mae":..,"mfe":..,"balance":..,"close_atr":..}
+#
+# trade_log.csv, journal.csv and ml_log.csv are projections of these events (same row builders
+# as before: logger.trade_logger, logger.journal_writer, utils.ml_logger), so they agree by
+# construction. The Projector folds events from a cursor (ledger byte offset + the state of
+# trades still open) and appends each view once per batch; run_bot drives it from a background
+# thread (LEDGER_PROJECT_SECS), anything else gets it inline after each event. A Ledger bundles
+# a ledger file with its projector and thread (one per paper portfolio, engine/portfolio.py);
+# the module-level functions use the configured paths.
+#
+# Crash safety: the cursor is written atomically with the view sizes *before* a batch is
+# appended ("pending") and again after. A batch interrupted half-way is truncated off the views
+# and re-projected on the next run; rows appended to a view by other tools between batches
+# (e.g. scripts/backfill_ml_log.py) are left alone.
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl   # cross-process projection lock (POSIX); in-process lock only elsewhere
+except ImportError:
+    fcntl = None
+from config import LEDGER_PATH, LEDGER_PROJECT_SECS, TRADE_LOG_PATH, JOURNAL_PATH, ML_LOG_FILE
+from utils import clock
+from utils.metrics import record_bytes
+from utils.terminal_logger import tlog
+from logger import trade_logger, journal_writer
+from utils import ml_logger
+
+# Trade fields that change after the open; everything else is recorded once, in the open event
+_MUTABLE = ("status", "exit_price", "exit_reason", "hit", "trail_active", "trail_level", "duration_sec", "mae", "mfe",
+            "fills_booked", "balance")
+
+
+def _now() -> str:
+    return clock.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class Projector:
+    """Folds ledger events into the CSV views from a persisted cursor."""
+
+    def __init__(self, ledger_path: str = LEDGER_PATH, trade_log_path: str = TRADE_LOG_PATH,
+                 journal_path: str = JOURNAL_PATH, ml_log_path: str = ML_LOG_FILE, cursor_path: str = None):
+        self.ledger_path = ledger_path
+        self.cursor_path = cursor_path or ledger_path + ".cursor"
+        self.views = {"trade_log": trade_log_path, "journal": journal_path, "ml_log": ml_log_path}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.cursor_path)), exist_ok=True)
+            with open(self.cursor_path + ".lock", "w") as lf:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _load_cursor(self) -> dict:
+        try:
+            with open(self.cursor_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {"offset": 0, "open": {}}
+
+    def _save_cursor(self, cursor: dict):
+        tmp = self.cursor_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cursor, f, separators=(",", ":"))
+        os.replace(tmp, self.cursor_path)
+
+    def _rollback(self, pending: dict):
+        for path, size in pending.items():
+            if not os.path.exists(path) or os.path.getsize(path) <= size:
+                continue
+            if size == 0:
+                os.remove(path)   # created by the interrupted batch: recreate with its header
+            else:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _read_events(self, offset: int):
+        """(events, end offset of the last complete line) from offset on."""
+        if not os.path.exists(self.ledger_path):
+            return [], offset
+        with open(self.ledger_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        events = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        return events, offset + end
+
+    def _apply(self, events: list, open_state: dict) -> dict:
+        rows = {"trade_log": [], "journal": [], "ml_log": []}
+        for ev in events:
+            kind, tid, ts = ev.get("e"), str(ev.get("id", "")), ev.get("t")
+            body = {k: v for k, v in ev.items() if k not in ("e", "t", "id")}
+            if kind in ("open", "adopt"):
+                trade = {"trade_id": ev.get("id"), "status": "open", "hit": [], **body}
+                open_state[tid] = trade
+                if kind == "open":
+                    rows["trade_log"].append(trade_logger.trade_log_row(trade, ts))
+            elif kind in ("tp", "trail"):
+                if tid in open_state:
+                    open_state[tid].update(body)
+            elif kind == "close":
+                trade = open_state.pop(tid, {"trade_id": ev.get("id")})
+                close_atr = body.pop("close_atr", 0.0)
+                trade.update(body, status="closed")
+                rows["trade_log"].append(trade_logger.trade_log_row(trade, ts, closed=True))
+                rows["journal"].append(journal_writer.journal_row(trade, ts))
+                ml_row = ml_logger.ml_log_row(trade, ts, trade.get("trend_strength", 0), trade.get("volatility", 0), close_atr)
+                if ml_row:
+                    rows["ml_log"].append(ml_row)
+        return rows
+
+    def project(self) -> int:
+        """Project every complete event not yet projected; returns how many."""
+        with self._locked():
+            cursor = self._load_cursor()
+            if cursor.get("pending"):
+                self._rollback(cursor["pending"])
+            events, end = self._read_events(int(cursor.get("offset", 0)))
+            if not events:
+                return 0
+            # _apply folds into a copy: the pending cursor must keep the state from before this batch
+            open_state = {tid: dict(t) for tid, t in cursor.get("open", {}).items()}
+            rows = self._apply(events, open_state)
+
+            cursor["pending"] = {p: os.path.getsize(p) if os.path.exists(p) else 0 for p in self.views.values()}
+            self._save_cursor(cursor)
+            trade_logger.append_rows(rows["trade_log"], self.views["trade_log"])
+            journal_writer.append_rows(rows["journal"], self.views["journal"])
+            ml_logger.append_rows(rows["ml_log"], self.views["ml_log"])
+            self._save_cursor({"offset": end, "open": open_state})
+            return len(events)
+
+
+class Ledger:
+    """
+    One ledger file, its Projector and (once started) its background projection thread.
+    Each paper portfolio has its own; the module-level functions below use the config paths.
+    """
+
+    def __init__(self, path: str = LEDGER_PATH, trade_log_path: str = TRADE_LOG_PATH,
+                 journal_path: str = JOURNAL_PATH, ml_log_path: str = ML_LOG_FILE, log=tlog):
+        self.path = path
+        self.projector = Projector(path, trade_log_path, journal_path, ml_log_path)
+        self.log = log
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run_projector(self, interval: float):
+        # one batch per interval: a cycle's events reach each view in a single append
+        while not self._stop.wait(interval):
+            try:
+                self.projector.project()
+            except Exception as e:
+                self.log(f"⚠️ ledger projection error: {e}")
+
+    def start_projector(self, interval: float = LEDGER_PROJECT_SECS):
+        """Project in a background thread (at most `interval` s behind); <= 0 keeps projection inline."""
+        if interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self.project()   # catch up with events a previous run didn't project
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_projector, args=(interval,), name="ledger-projector", daemon=True)
+        self._thread.start()
+
+    def stop_projector(self):
+        """Stop the background projector and project whatever is left."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.project()
+
+    def project(self) -> int:
+        """Bring the CSV views up to date with the ledger now (safe alongside a running bot)."""
+        try:
+            return self.projector.project()
+        except Exception as e:
+            self.log(f"⚠️ ledger projection error: {e}")
+            return 0
+
+    def _append(self, event: dict):
+        try:
+            line = json.dumps(event, separators=(",", ":"), default=str) + "\n"
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            record_bytes("ledger", len(line.encode("utf-8")))
+        except Exception as e:
+            # fail-closed: never crash the trading loop
+            self.log(f"⚠️ ledger append error: {e}")
+            return
+        if self._thread is None:
+            self.project()
+
+    def open_trade_ids(self) -> set:
+        """Ids of trades the ledger holds as open (after projecting everything pending)."""
+        self.project()
+        return set(self.projector._load_cursor().get("open", {}))
+
+    def adopt_open_trades(self, open_trades: list) -> int:
+        """Register rehydrated open trades the ledger has never seen, so their closes project fully."""
+        known = self.open_trade_ids()
+        n = 0
+        for trade in open_trades:
+            if str(trade.get("trade_id", "")) not in known:
+                self._append({"e": "adopt", "t": _now(), "id": trade.get("trade_id"),
+                              **{k: v for k, v in trade.items() if k not in _MUTABLE and k != "trade_id"},
+                              "hit": list(trade.get("hit", [])), "trail_active": bool(trade.get("trail_active")),
+                              "trail_level": trade.get("trail_level")})
+                n += 1
+        return n
+
+    def record_open(self, trade: dict):
+        self._append({"e": "open", "t": _now(), "id": trade.get("trade_id"),
+                      **{k: v for k, v in trade.items() if k not in _MUTABLE and k != "trade_id"}})
+        self.log(f"📝 Trade open logged: {trade.get('symbol')} {trade.get('side')} @ {trade.get('entry_price')}")
+
+    def record_tp(self, trade: dict):
+        self._append({"e": "tp", "t": _now(), "id": trade.get("trade_id"), "hit": list(trade.get("hit", [])),
+                      "trail_active": bool(trade.get("trail_active")), "trail_level": trade.get("trail_level")})
+
+    def record_trail(self, trade: dict):
+        self._append({"e": "trail", "t": _now(), "id": trade.get("trade_id"), "trail_level": trade.get("trail_level")})
+
+    def record_close(self, trade: dict, atr: float = 0.0, pnl_pct: float = None):
+        self._append({"e": "close", "t": _now(), "id": trade.get("trade_id"),
+                      "exit_price": trade.get("exit_price"), "exit_reason": trade.get("exit_reason"),
+                      "hit": list(trade.get("hit", [])), "trail_level": trade.get("trail_level"),
+                      "duration_sec": trade.get("duration_sec", 0), "mae": trade.get("mae"), "mfe": trade.get("mfe"),
+                      "balance": trade.get("balance"), "close_atr": atr})
+        if pnl_pct is not None:
+            self.log(f"📉 Trade closed: {trade.get('symbol')} | Exit: {trade.get('exit_reason')} | PnL: {pnl_pct:.2f}%")
+
+
+_default = Ledger()
+
+
+def start_projector(interval: float = LEDGER_PROJECT_SECS):
+    _default.start_projector(interval)
+
+
+def stop_projector():
+    _default.stop_projector()
+
+
+def project() -> int:
+    return _default.project()
+
+
+def open_trade_ids() -> set:
+    return _default.open_trade_ids()
+
+
+def adopt_open_trades(open_trades: list) -> int:
+    return _default.adopt_open_trades(open_trades)
+
+
+def record_open(trade: dict):
+    _default.record_open(trade)
+
+
+def record_tp(trade: dict):
+    _default.record_tp(trade)
+
+
+def record_trail(trade: dict):
+    _default.record_trail(trade)
+
+
+def record_close(trade: dict, atr: float = 0.0, pnl_pct: float = None):
+    _default.record_close(trade, atr, pnl_pct)
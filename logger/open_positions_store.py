@@ -1,40 +1,45 @@
 # logger/open_positions_store.py
 # New file: JSON-backed store for open trades. Atomic writes; fail-closed.
+# Every function takes an optional path (default STORE_PATH; one store per portfolio).
 
 import os, json, tempfile
 from typing import List, Dict, Optional
 from config import LOG_DIR
+from utils.metrics import record_bytes
 
 STORE_PATH = os.path.join(LOG_DIR, "open_positions.json")
 
-def _ensure_dir():
-    os.makedirs(LOG_DIR, exist_ok=True)
+def _ensure_dir(path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
 
-def load_open_positions() -> List[Dict]:
-    _ensure_dir()
-    if not os.path.exists(STORE_PATH) or os.path.getsize(STORE_PATH) == 0:
+def load_open_positions(path: str = None) -> List[Dict]:
+    path = path or STORE_PATH
+    _ensure_dir(path)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
         return []
     try:
-        with open(STORE_PATH, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
         return data if isinstance(data, list) else []
     except Exception:
         return []
 
-def save_open_positions(positions: List[Dict]):
-    _ensure_dir()
-    tmp = STORE_PATH + ".tmp"
+def save_open_positions(positions: List[Dict], path: str = None):
+    path = path or STORE_PATH
+    _ensure_dir(path)
+    tmp = path + ".tmp"
     try:
         with open(tmp, "w", encoding="utf-8") as f:
             json.dump(positions, f, ensure_ascii=False)
-        os.replace(tmp, STORE_PATH)
+            record_bytes("open_positions", f.tell())
+        os.replace(tmp, path)
     except Exception as e:
         # fail-closed: do nothing but avoid crashing trading loop
         print(f"⚠️ save_open_positions error: {e}")
 
-def upsert_position(pos: Dict, positions: Optional[List[Dict]] = None) -> List[Dict]:
+def upsert_position(pos: Dict, positions: Optional[List[Dict]] = None, path: str = None) -> List[Dict]:
     if positions is None:
-        positions = load_open_positions()
+        positions = load_open_positions(path)
     tid = str(pos.get("trade_id",""))
     out = []
     found = False
@@ -45,12 +50,12 @@ def upsert_position(pos: Dict, positions: Optional[List[Dict]] = None) -> List[D
             out.append(p)
     if not found:
         out.append(pos)
-    save_open_positions(out)
+    save_open_positions(out, path)
     return out
 
-def remove_position(trade_id: str, positions: Optional[List[Dict]] = None) -> List[Dict]:
+def remove_position(trade_id: str, positions: Optional[List[Dict]] = None, path: str = None) -> List[Dict]:
     if positions is None:
-        positions = load_open_positions()
+        positions = load_open_positions(path)
     out = [p for p in positions if str(p.get("trade_id","")) != str(trade_id)]
-    save_open_positions(out)
+    save_open_positions(out, path)
     return out
@@ -0,0 +1,134 @@
+# logger/schema.py
+# Column order and dtypes of every CSV log, shared by the writers (logger.trade_logger,
+# logger.journal_writer, utils.ml_logger, logger.balance_tracker) and the readers (read_log()):
+#
+#   category  low-cardinality labels (symbol, side, status, exit_reason, strategy, ...)
+#   float64   prices and balances (float32 keeps ~7 significant digits: 65432.12345 would not survive)
+#   float32   every other number: pnl %, indicators, ATR, ML outputs, durations
+#   int8      0/1 flags
+#   str       timestamps and trade ids
+#
+# A column a file has but the schema doesn't know is read with pandas' own inference. pandas is
+# imported inside the readers, so the writers (hot path) never load it.
+
+_CAT, _PRICE, _NUM, _FLAG, _STR = "category", "float64", "float32", "int8", "str"
+
+SCHEMAS = {
+    "trade_log": {
+        "timestamp": _STR, "trade_id": _STR, "symbol": _CAT, "side": _CAT,
+        "entry_price": _PRICE, "sl": _PRICE, "tp1": _PRICE, "tp2": _PRICE, "tp3": _PRICE,  # planned levels (known at open)
+        "exit_price": _PRICE, "status": _CAT, "exit_reason": _CAT, "tp_hits": _CAT, "pnl": _NUM,  # filled on close
+        "strategy": _CAT, "ml_exit_reason": _CAT, "ml_confidence": _NUM, "ml_expected_pnl": _NUM,
+        "atr": _NUM, "adx": _NUM, "rsi": _NUM, "macd": _NUM, "ema_ratio": _NUM,
+    },
+    "journal": {
+        "timestamp": _STR, "trade_id": _STR, "symbol": _CAT, "side": _CAT, "entry_price": _PRICE, "exit_price": _PRICE,
+        "status": _CAT, "exit_reason": _CAT, "tp_hits": _CAT, "pnl": _NUM, "duration_sec": _NUM, "balance": _PRICE,
+        "strategy": _CAT, "ml_exit_reason": _CAT, "ml_confidence": _NUM, "ml_expected_pnl": _NUM,
+        "atr": _NUM, "adx": _NUM, "rsi": _NUM, "macd": _NUM, "ema_ratio": _NUM,
+        "mae": _NUM, "mfe": _NUM,   # worst / best unrealized PnL % while open
+    },
+    "ml_log": {
+        "timestamp": _STR, "id": _STR, "symbol": _CAT, "side": _CAT, "entry_price": _PRICE, "exit_price": _PRICE,
+        "exit_reason": _CAT, "sl": _PRICE, "tp1": _PRICE, "tp2": _PRICE, "tp3": _PRICE,
+        "atr": _NUM, "trend_strength": _NUM, "volatility": _NUM, "adx": _NUM, "rsi": _NUM, "macd": _NUM,
+        "ema_ratio": _NUM, "pnl_pct": _NUM, "raw_profit": _NUM, "duration_sec": _NUM, "strategy": _CAT,
+        "leverage": _NUM, "is_partial": _FLAG,
+    },
+    "balance": {"timestamp": _STR, "balance": _PRICE},
+}
+
+# config attribute holding each log's default path (looked up at read time)
+_PATH_SETTINGS = {"trade_log": "TRADE_LOG_PATH", "journal": "JOURNAL_PATH", "ml_log": "ML_LOG_FILE",
+                  "balance": "BALANCE_LOG_PATH"}
+
+
+def columns(log: str) -> list:
+    """Column order of `log`: the header every writer emits."""
+    return list(SCHEMAS[log])
+
+
+def default_path(log: str) -> str:
+    import config
+    return getattr(config, _PATH_SETTINGS[log])
+
+
+def _header(path) -> list:
+    import pandas as pd
+    pos = path.tell() if hasattr(path, "seek") else None
+    header = pd.read_csv(path, nrows=0, encoding="utf-8").columns
+    if pos is not None:
+        path.seek(pos)
+    return list(header)
+
+
+def _finish(df, dtypes: dict):
+    """Coerce what the fast path couldn't parse (stray text -> NaN) and give label columns str categories."""
+    import pandas as pd
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if dtype in (_PRICE, _NUM, _FLAG) and df[col].dtype != dtype:
+            values = pd.to_numeric(df[col], errors="coerce")
+            df[col] = values.astype(_NUM if dtype == _FLAG and values.isna().any() else dtype)
+        elif dtype == _CAT and df[col].cat.categories.dtype != "str":
+            # an all-empty column parses with non-string categories, which .str can't handle
+            df[col] = df[col].cat.set_categories(df[col].cat.categories.astype(str))
+    return df
+
+
+def _chunks(reader, dtypes: dict):
+    for chunk in reader:
+        yield _finish(chunk, dtypes)
+
+
+def read_log(log: str, path=None, columns=None, chunksize: int = None, typed: bool = True, **kwargs):
+    """
+    `log` (a SCHEMAS key) read with its schema dtypes: only the `columns` (None = all) the file
+    actually has, in file order. With chunksize, an iterator of DataFrames. typed=False reads every
+    column as str (for heuristics on raw text). Extra kwargs go to pd.read_csv (e.g.
+    on_bad_lines="skip"). `path` defaults to the log's configured path; a file object works too.
+    """
+    import pandas as pd
+    path = default_path(log) if path is None else path
+    header = _header(path)
+    use = header if columns is None else [c for c in header if c in set(columns)]
+    kwargs.setdefault("encoding", "utf-8")
+    if not typed:
+        return pd.read_csv(path, usecols=use, dtype=str, chunksize=chunksize, **kwargs)
+
+    dtypes = {c: SCHEMAS[log][c] for c in use if c in SCHEMAS[log]}
+    labels = {c: t for c, t in dtypes.items() if t in (_CAT, _STR)}
+    if chunksize:
+        return _chunks(pd.read_csv(path, usecols=use, dtype=labels, chunksize=chunksize, **kwargs), dtypes)
+    # numbers are parsed straight to their dtype; a stray non-numeric cell (legacy or hand-edited
+    # rows) makes that fail, and the fallback parses them loosely and coerces afterwards
+    pos = path.tell() if hasattr(path, "seek") else None
+    try:
+        return _finish(pd.read_csv(path, usecols=use, dtype=dtypes, **kwargs), dtypes)
+    except (ValueError, TypeError):
+        if pos is not None:
+            path.seek(pos)
+    return _finish(pd.read_csv(path, usecols=use, dtype=labels, **kwargs), dtypes)
+
+
+def read_appended(log: str, path: str, offset: int = 0, columns=None, **kwargs):
+    """
+    Rows of an append-only log from byte `offset` on (0 = whole file), typed like read_log(); the
+    header is always taken from the first line. Returns (df, end): `end` is the byte offset just
+    past the last complete line read, i.e. the `offset` for the next call (a row being appended
+    is left for it). Raises ValueError if `offset` isn't a row boundary (the log was rewritten).
+    """
+    import io
+    with open(path, "rb") as f:
+        header = f.readline()
+        if offset <= len(header):
+            f.seek(len(header))
+        else:
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                raise ValueError(f"{path} changed since byte {offset} was recorded")
+        start = f.tell()
+        body = f.read()
+    body = body[:body.rfind(b"\n") + 1]
+    return read_log(log, io.BytesIO(header + body), columns, **kwargs), start + len(body)
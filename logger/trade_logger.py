@@ -1,38 +1,51 @@
 # logger/trade_logger.py
+# trade_log.csv view: one OPEN row and one CLOSED row per trade, projected from the trade
+# event ledger (logger/ledger.py) — the hot path never writes this file directly.
 import csv
 import os
-import time
 from config import TRADE_LOG_PATH
-from utils.terminal_logger import tlog
+from utils.pnl_utils import calc_realistic_pnl
+from utils.metrics import record_bytes
+from logger.schema import columns
 
-# A single, stable schema used for both OPEN and CLOSED rows
-_FIELDS = [
-    "timestamp","trade_id","symbol","side",
-    "entry_price","sl","tp1","tp2","tp3",     # planned levels (known at open)
-    "exit_price","status","exit_reason","tp_hits","pnl",  # filled on close
-    "strategy","ml_exit_reason","ml_confidence","ml_expected_pnl",
-    "atr","adx","rsi","macd","ema_ratio"
-]
+# A single, stable schema used for both OPEN and CLOSED rows (logger/schema.py)
+FIELDS = columns("trade_log")
 
 def _ensure_header(path):
     os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
     new_file = not os.path.exists(path)
     if new_file or os.path.getsize(path) == 0:
         with open(path, "w", newline="", encoding="utf-8") as f:
-            csv.writer(f, quotechar='"', escapechar='\\').writerow(_FIELDS)
+            csv.writer(f, quotechar='"', escapechar='\\').writerow(FIELDS)
 
-def _append_row(path, row_dict):
+def append_rows(rows: list, path: str = TRADE_LOG_PATH):
+    """Append trade_log rows (dicts from trade_log_row) in one write."""
+    if not rows:
+        return
     _ensure_header(path)
     with open(path, "a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=_FIELDS, extrasaction="ignore", quotechar='"', escapechar='\\')
-        w.writerow(row_dict)
+        start = f.tell()
+        w = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore", quotechar='"', escapechar='\\')
+        w.writerows(rows)
+        record_bytes("trade_log", f.tell() - start)
 
-def log_trade(trade: dict):
+def trade_log_row(trade: dict, timestamp: str, closed: bool = False) -> dict:
     """
-    Log an OPEN trade using the unified schema (exit columns left blank).
+    OPEN row (exit columns left blank) or CLOSED row (exit columns filled) in the unified schema.
     """
-    row = {
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    if closed:
+        pnl_pct = calc_realistic_pnl(trade.get("entry_price"), trade.get("exit_price"), trade.get("side","LONG"), trade.get("leverage",1))
+        exit_cols = {
+            "exit_price": trade.get("exit_price"),
+            "status": "closed",
+            "exit_reason": trade.get("exit_reason"),
+            "tp_hits": ",".join([f"TP{i+1}" for i in trade.get("hit",[])]) if trade.get("hit") else "",
+            "pnl": round(float(pnl_pct),4),
+        }
+    else:
+        exit_cols = {"exit_price": "", "status": trade.get("status","open"), "exit_reason": "", "tp_hits": "", "pnl": ""}
+    return {
+        "timestamp": timestamp,
         "trade_id": trade.get("trade_id"),
         "symbol": trade.get("symbol"),
         "side": trade.get("side"),
@@ -41,11 +54,7 @@ def log_trade(trade: dict):
         "tp1": trade.get("tp1"),
         "tp2": trade.get("tp2"),
         "tp3": trade.get("tp3"),
-        "exit_price": "",
-        "status": trade.get("status","open"),
-        "exit_reason": "",
-        "tp_hits": "",
-        "pnl": "",
+        **exit_cols,
         "strategy": trade.get("strategy","unknown"),
         "ml_exit_reason": trade.get("ml_exit_reason",""),
         "ml_confidence": trade.get("ml_confidence",""),
@@ -56,37 +65,3 @@ def log_trade(trade: dict):
         "macd": trade.get("macd",""),
         "ema_ratio": trade.get("ema_ratio",""),
     }
-    _append_row(TRADE_LOG_PATH, row)
-    tlog(f"📝 Trade open logged: {trade.get('symbol')} {trade.get('side')} @ {trade.get('entry_price')}")
-
-def log_exit(trade: dict, pnl_pct: float, tp_hits: str):
-    """
-    Log a CLOSED trade using the same schema (fills exit columns).
-    """
-    row = {
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "trade_id": trade.get("trade_id"),
-        "symbol": trade.get("symbol"),
-        "side": trade.get("side"),
-        "entry_price": trade.get("entry_price"),
-        "sl": trade.get("sl"),
-        "tp1": trade.get("tp1"),
-        "tp2": trade.get("tp2"),
-        "tp3": trade.get("tp3"),
-        "exit_price": trade.get("exit_price"),
-        "status": "closed",
-        "exit_reason": trade.get("exit_reason"),
-        "tp_hits": tp_hits,
-        "pnl": round(float(pnl_pct),4),
-        "strategy": trade.get("strategy","unknown"),
-        "ml_exit_reason": trade.get("ml_exit_reason",""),
-        "ml_confidence": trade.get("ml_confidence",""),
-        "ml_expected_pnl": trade.get("ml_expected_pnl",""),
-        "atr": trade.get("atr",""),
-        "adx": trade.get("adx",""),
-        "rsi": trade.get("rsi",""),
-        "macd": trade.get("macd",""),
-        "ema_ratio": trade.get("ema_ratio",""),
-    }
-    _append_row(TRADE_LOG_PATH, row)
-    tlog(f"📉 Trade closed: {trade.get('symbol')} | Exit: {trade.get('exit_reason')} | PnL: {pnl_pct:.2f}%")
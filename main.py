@@ -3,66 +3,92 @@
 TitanBot-Paper main loop (paper trading)
 
 Key points:
-- Fetch per-symbol latest candle (for entries) and recent candles (for ATR/features)
+- Candle-close aligned: entries are evaluated ENTRY_DELAY_MS after each TIMEFRAME bar closes,
+  on the closed bar; a lighter EVALUATION_INTERVAL cadence monitors open trades in between
+- Fetch per-symbol latest closed candle (for entries) and recent candles (for ATR/features)
 - Update open trades via check_open_trades() using per-symbol candle/ATR maps
-- ML gating: skip if classifier predicts SL or confidence < 0.5 (configurable by editing thresholds)
+- Optional SHARD_WORKERS > 1: the per-symbol scan runs on worker processes (engine.sharding)
+- ML gating (one batched predict_trades call per entry cycle): skip if classifier predicts SL or
+  confidence < ML_MIN_CONFIDENCE (env, default 0.5; each portfolio may override it in PORTFOLIOS_FILE)
+- Model hot reload: a newly activated bundle is pre-loaded in the background and swapped in between cycles
 - Cooldown per symbol after a close
+- Optional PORTFOLIOS_FILE: N paper portfolios (engine.portfolio), each with its own config
+  overrides, open trades, cooldowns and LOG_DIR, fed by one shared scan and ML batch per cycle
+- Mark-to-market every cycle (engine.mark_to_market): open trades valued at the cycle's closes,
+  realized PnL booked on TP scale-outs/closes, equity sampled to a binary curve
+- Warm restart: cooldowns, ATR cache, last bars and MTF candle buffers are checkpointed
+  every cycle (engine.checkpoint); on start only the bars since the checkpoint are fetched
 - All logging/writing is fail-closed (writers handle headers/dirs)
+- Trade events are written once to the ledger (logger.ledger); trade_log/journal/ml_log CSVs are
+  projected from it in the background
+- Per-stage/per-symbol latency, overruns and logger bytes exported via utils.metrics
+- Lazy startup: pandas/ta, python-binance and the model are imported on first use and pre-warmed
+  in the background while waiting for the first bar close (scripts/profile_startup.py)
 """
 
-import os
-import time
-import uuid
-import pandas as pd
 from dotenv import load_dotenv
 from threading import Thread  # ✅ added
 
 from config import (
-    SYMBOLS,
     TIMEFRAME,
+    ENTRY_DELAY_MS,
     EVALUATION_INTERVAL,
-    COOLDOWN_SECONDS,
     MIN_TREND_STRENGTH,
     MIN_VOLATILITY,
+    SHARD_WORKERS,
+    MTF_ENABLED,
+    RECORD_KLINES,
+    CHECKPOINT_PATH,
+    PORTFOLIOS_FILE,
 )
 
 from data.price_feed import get_latest_candle
-from core.signal_engine import generate_signal
-from core.indicator_utils import fetch_recent_candles, calculate_atr
 from engine.position_model import build_fake_trade  # construct paper trade object
 from engine.trade_tracker import check_open_trades, maybe_open_new_trade
 from telegram.bot import send_live_alert, send_startup_notice, run_telegram_polling  # ✅ added run_telegram_polling
 from logger.open_positions_store import load_open_positions, save_open_positions
 from engine.trade_tracker import finalize_close
 from engine.position_model import update_position_status
+from engine.scheduler import CandleScheduler
+from data.resampler import install_feed
+from data.recorder import install_recorder
+from engine.checkpoint import load_checkpoint, save_checkpoint
+from engine.portfolio import load_portfolios, scan_symbols, scan_signal_params
+from engine import pipeline
+from engine.pipeline import get_features_for_symbol as _get_features_for_symbol, normalize_candle as _normalize_candle
+from engine.sharding import ShardCoordinator, scan_serial
 from utils.terminal_logger import tlog
+from utils import clock, metrics
+from utils.metrics import timed
 
-# Optional: use ML predictor if available
-try:
-    from ml_predictor import predict_trade
-    _HAS_ML = True
-except Exception as _e:
-    tlog(f"⚠️ ML predictor unavailable, running without ML gating: {_e}")
-    _HAS_ML = False
-
-# Optional: TA feature builder (used for ML features if available)
-try:
-    from ml.feature_builder import build_features as build_ml_features
-    _HAS_FB = True
-except Exception as _e:
-    tlog(f"⚠️ Feature builder unavailable, ML features limited: {_e}")
-    _HAS_FB = False
-
-def _catch_up_open_positions(open_trades: list):
+# Optional ML predictor / TA feature builder are resolved in engine.pipeline
+if not pipeline.has_ml():
+    tlog(f"⚠️ ML predictor unavailable, running without ML gating: {pipeline.ml_error()}")
+if not pipeline.HAS_FB:
+    tlog(f"⚠️ Feature builder unavailable, ML features limited: {pipeline.FB_ERROR}")
+
+def _catch_up_open_positions(portfolio, last_bar_ms: dict = None, atr_cache: dict = None, fetched: dict = None):
     """
-    On restart, replay recent candles through each open trade so any SL/TP
+    On restart, replay recent candles through each of the portfolio's open trades so any SL/TP
     hit during downtime is honored. Uses a fixed ATR snapshot per symbol (safe enough for catch-up).
+    With a checkpoint (last processed bar + ATR per symbol) only the bars closed since are fetched.
+    `fetched` ({symbol: (df, atr)}) shares the fetches between portfolios.
     """
-    for trade in list(open_trades):
+    pf = portfolio
+    last_bar_ms, atr_cache = last_bar_ms or {}, atr_cache or {}
+    fetched = {} if fetched is None else fetched
+    for trade in list(pf.open_trades):
         try:
             symbol = trade["symbol"]
-            # Fetch a reasonable window; if TIMEFRAME is 3m/5m this covers 6–10 hours
-            df, feats, atr_val = _get_features_for_symbol(symbol, interval=TIMEFRAME, limit=200)
+            if symbol not in fetched:
+                if symbol in last_bar_ms and atr_cache.get(symbol, 0.0) > 0:
+                    from data.backfill import fetch_candle_history
+                    fetched[symbol] = fetch_candle_history(symbol, TIMEFRAME, int(last_bar_ms[symbol]) + 1), atr_cache[symbol]
+                else:
+                    # Fetch a reasonable window; if TIMEFRAME is 3m/5m this covers 6–10 hours
+                    df, feats, atr_val = _get_features_for_symbol(symbol, interval=TIMEFRAME, limit=200)
+                    fetched[symbol] = df, atr_val
+            df, atr_val = fetched[symbol]
             if df is None or df.empty:
                 continue
             atr_val = atr_val or 0.0
@@ -71,226 +97,315 @@ def _catch_up_open_positions(open_trades: list):
             for _, row in df.iterrows():
                 candle = {"open": float(row["open"]), "high": float(row["high"]), "low": float(row["low"]), "close": float(row["close"])}
                 old_status = trade["status"]
-                trade = update_position_status(trade, candle, atr_val)
+                trade = update_position_status(trade, candle, atr_val, params=pf.position_overrides, log=pf.log)
                 if trade["status"] == "closed" and old_status != "closed":
-                    finalize_close(trade, atr_val)
+                    finalize_close(trade, atr_val, pf)
                     try:
-                        open_trades.remove(trade)
+                        pf.open_trades.remove(trade)
                     except ValueError:
                         pass
                     break
         except Exception as e:
-            tlog(f"⚠️ catch-up error for {trade.get('symbol','?')}: {e}")
+            pf.log(f"⚠️ catch-up error for {trade.get('symbol','?')}: {e}")
 
     # Persist residual opens
     try:
-        save_open_positions(open_trades)
+        save_open_positions(pf.open_trades, pf.paths["open_positions"])
     except Exception as e:
-        tlog(f"⚠️ catch-up save_open_positions failed: {e}")
+        pf.log(f"⚠️ catch-up save_open_positions failed: {e}")
 
-def _get_features_for_symbol(symbol: str, interval: str = None, limit: int = 100):
+def _update_open_trades(portfolio, symbol_candle_map: dict, atr_map: dict) -> float:
     """
-    Helper: fetch recent candles and compute indicators for ML.
-    Returns (df, last_features_dict, atr_value).
+    Update the portfolio's open trades against *their own* symbol candle and ATR, mark what is
+    still open to market, then start cooldowns for anything that just closed. Returns the
+    timestamp used for the cooldowns.
     """
+    pf = portfolio
     try:
-        df = fetch_recent_candles(symbol, interval=interval or TIMEFRAME, limit=limit)
-        if df is None or df.empty:
-            return None, None, 0.0
-
-        atr_val = calculate_atr(df, period=14) or 0.0
-
-        # Build ML features if available
-        feats = None
-        if _HAS_FB:
-            try:
-                fdf = build_ml_features(df.rename(columns={"open": "open", "high": "high", "low": "low", "close": "close"}))
-                if fdf is not None and not fdf.empty:
-                    last = fdf.tail(1).to_dict("records")[0]
-                    feats = {
-                        "atr": float(last.get("atr", 0.0)),
-                        "adx": float(last.get("adx", 0.0)),
-                        "rsi": float(last.get("rsi", 0.0)),
-                        "macd": float(last.get("macd", 0.0)),
-                        "ema_ratio": float(last.get("ema_ratio", 1.0)),
-                        "volatility": float(last.get("volatility", 0.0)),
-                    }
-            except Exception as e:
-                tlog(f"⚠️ Feature build error for {symbol}: {e}")
-                feats = None
-
-        return df, feats, atr_val
+        with timed("check_open_trades"):
+            just_closed = check_open_trades(pf.open_trades, symbol_candle_map, atr_map, pf)
     except Exception as e:
-        tlog(f"❌ _get_features_for_symbol error [{symbol}]: {e}")
-        return None, None, 0.0
-
+        pf.log(f"❌ check_open_trades error: {e}")
+        just_closed = []
 
-def run_bot():
-    load_dotenv()
-    tlog("🚀 TitanBot-Paper starting…")
     try:
-        Thread(target=run_telegram_polling, daemon=True).start()
-        send_startup_notice()
-        tlog("☎️ Telegram polling started (background).")
+        with timed("mark_to_market"):
+            pf.mtm.mark(pf.open_trades, symbol_candle_map)
     except Exception as e:
-        tlog(f"⚠️ Telegram startup notice failed (continuing): {e}")
-
-    # ✅ Rehydrate open trades from disk (if any)
-    open_trades = load_open_positions()
-    if open_trades:
-        tlog(f"🔁 Rehydrated {len(open_trades)} open trade(s) from last session.")
-        _catch_up_open_positions(open_trades)
-    else:
-        open_trades = []
-    symbol_cooldowns = {}            # {symbol: epoch_until}
-    symbol_atr_cache = {}            # {symbol: last_atr_val}
-
-    while True:
-        cycle_start = time.time()
-        symbol_candle_map = {}       # {symbol: latest candle dict}
-        atr_map = {}                 # {symbol: atr}
-
-        # 1) Fetch latest candle (for entries) + recent candles (for ATR/features)
-        for symbol in SYMBOLS:
-            try:
-                candle = get_latest_candle(symbol, TIMEFRAME)
-                if not candle or "open" not in candle:
-                    tlog(f"⚠️ Skipping {symbol}: no valid candle data")
-                    continue
+        pf.log(f"❌ mark_to_market error: {e}")
 
-                # Normalize types
-                candle = {
-                    "open": float(candle["open"]),
-                    "high": float(candle["high"]),
-                    "low": float(candle["low"]),
-                    "close": float(candle["close"]),
-                    "volume": float(candle.get("volume", 0.0)),
-                    "volatility": float(candle.get("volatility", 0.0)),
-                }
-                symbol_candle_map[symbol] = candle
-
-                # Pull recent candles for ATR/features once per cycle
-                _, feats, atr_val = _get_features_for_symbol(symbol, interval=TIMEFRAME, limit=100)
-                if atr_val and atr_val > 0:
-                    atr_map[symbol] = atr_val
-                    symbol_atr_cache[symbol] = atr_val
-                else:
-                    # If ATR fails for this cycle, fall back to last cache
-                    atr_map[symbol] = symbol_atr_cache.get(symbol, 0.0)
+    # Apply cooldowns for just-closed symbols
+    now = clock.now()
+    for tr in just_closed:
+        sym = tr.get("symbol")
+        if sym:
+            pf.cooldowns[sym] = now + pf.params["COOLDOWN_SECONDS"]
+    return now
+
+
+def _monitor_cycle(portfolios: list, symbol_atr_cache: dict):
+    """
+    Light cadence between bar closes: only symbols with open trades (in any portfolio, fetched
+    once), forming-bar candle for intra-bar SL/TP hits, ATR from the last entry cycle (no history fetch).
+    """
+    symbols = sorted({t["symbol"] for pf in portfolios for t in pf.open_trades
+                      if str(t.get("status", "")).lower() == "open"})
+    if not symbols:
+        return
+
+    symbol_candle_map = {}
+    for symbol in symbols:
+        try:
+            with timed("fetch", symbol):
+                candle = get_latest_candle(symbol, TIMEFRAME)
+            if candle and "open" in candle:
+                symbol_candle_map[symbol] = _normalize_candle(candle)
+        except Exception as e:
+            tlog(f"❌ Monitor candle fetch error for {symbol}: {e}")
 
-                # Log the candle snapshot for visibility
-                tlog(f"🧠 {symbol} Candle: O={candle['open']} C={candle['close']} H={candle['high']} L={candle['low']} | ATR≈{atr_map[symbol]}")
+    atr_map = {s: symbol_atr_cache.get(s, 0.0) for s in symbols}
+    for pf in portfolios:
+        _update_open_trades(pf, symbol_candle_map, atr_map)
 
-            except Exception as e:
-                tlog(f"❌ Candle/ATR fetch error for {symbol}: {e}")
 
+def _entry_cycle(portfolios: list, symbol_atr_cache: dict, scanner=None) -> dict:
+    """
+    Full pipeline on the bar that just closed: candles/ATR, open-trade update, entries.
+    The per-symbol scan (fetch -> features -> signal -> ML) runs once for all portfolios,
+    in-process or on shard workers; then each portfolio updates its trades and takes its entries.
+    Everything that writes (trade updates, opens, logs) happens here.
+    Returns {symbol: closed candle} for the symbols that had one this cycle.
+    """
+    symbol_candle_map = {}       # {symbol: latest closed candle dict}
+    atr_map = {}                 # {symbol: atr}
+
+    # 1) Scan: latest closed candle + recent closed candles (ATR/features); signal for symbols free
+    #    in any portfolio, with the loosest thresholds so every portfolio's candidates get ML scores
+    now = clock.now()
+    symbols = scan_symbols(portfolios)
+    entry_symbols = set().union(*(pf.entry_symbols(now) for pf in portfolios))
+    signal_params = scan_signal_params(portfolios)
+    results = (scanner.scan(symbols, entry_symbols, use_ml=False, signal_params=signal_params) if scanner
+               else scan_serial(symbols, entry_symbols, use_ml=False, signal_params=signal_params))
+
+    # ML for all of this cycle's candidates in one batch (one classifier + one regressor call)
+    with timed("ml_batch"):
+        pipeline.score_candidates(results)
+
+    for r in results:
+        symbol = r["symbol"]
+        for note in r["notes"]:
+            tlog(note)
+        for stage, secs in r["timings"].items():
+            metrics.observe("titanbot_stage_seconds", secs, stage=stage, symbol=symbol)
+        candle = r["candle"]
+        if not candle:
+            continue
+        symbol_candle_map[symbol] = candle
+        atr_val = r["atr"]
+        if atr_val and atr_val > 0:
+            atr_map[symbol] = atr_val
+            symbol_atr_cache[symbol] = atr_val
+        else:
+            # If ATR fails for this cycle, fall back to last cache
+            atr_map[symbol] = symbol_atr_cache.get(symbol, 0.0)
+
+        # Log the candle snapshot for visibility
+        tlog(f"🧠 {symbol} Candle: O={candle['open']} C={candle['close']} H={candle['high']} L={candle['low']} | ATR≈{atr_map[symbol]}")
+
+    for pf in portfolios:
         # 2) Update open trades against *their own* symbol candle and ATR
+        now = _update_open_trades(pf, symbol_candle_map, atr_map)
+        # 3) Entries on this portfolio's symbols
+        _enter(pf, results, now)
+    return symbol_candle_map
+
+
+def _enter(portfolio, results: list, now: float):
+    """Evaluate each scanned symbol for a new trade in `portfolio` (its own signal, ML gate and TP/SL)."""
+    pf = portfolio
+    allowed = set(pf.symbols)
+    for r in results:
+        symbol = r["symbol"]
+        if symbol not in allowed:
+            continue
         try:
-            just_closed = check_open_trades(open_trades, symbol_candle_map, atr_map)
-        except Exception as e:
-            tlog(f"❌ check_open_trades error: {e}")
-            just_closed = []
-
-        # Apply cooldowns for just-closed symbols
-        now = time.time()
-        for tr in just_closed:
-            sym = tr.get("symbol")
-            if sym:
-                symbol_cooldowns[sym] = now + COOLDOWN_SECONDS
-
-        # 3) Entry: evaluate each symbol if it has no open trade and not cooling down
-        for symbol in SYMBOLS:
-            try:
-                # Skip if candle not present this cycle
-                candle = symbol_candle_map.get(symbol)
-                if not candle:
+            # Skip if candle not present this cycle
+            candle = r["candle"]
+            if not candle:
+                continue
+
+            # Skip if we just closed or cooling
+            if symbol in pf.cooldowns:
+                if now < pf.cooldowns[symbol]:
+                    pf.log(f"⏳ {symbol} still in cooldown — skipping new entry.")
                     continue
+                else:
+                    pf.cooldowns.pop(symbol, None)
+
+            # Skip if already has an open trade
+            has_open = any(t["symbol"] == symbol and str(t.get("status","")).lower() == "open" for t in pf.open_trades)
+            if has_open:
+                pf.log(f"📌 {symbol} already has an open trade.")
+                continue
+
+            # Baseline signal (trend/vol filters): the scan found one at the loosest thresholds,
+            # re-checked against this portfolio's own
+            signal = pf.signal(symbol, candle) if r["signal"] else None
+            if not signal:
+                pf.log(f"❌ No valid signal for {symbol}")
+                continue
+
+            atr_val = r["atr"]
+            if atr_val <= 0:
+                # If ATR is zero, skip opening (we need ATR for TP/SL construction)
+                pf.log(f"⚠️ ATR invalid for {symbol}, skipping entry.")
+                continue
 
-                # Skip if we just closed or cooling
-                if symbol in symbol_cooldowns:
-                    if now < symbol_cooldowns[symbol]:
-                        tlog(f"⏳ {symbol} still in cooldown — skipping new entry.")
+            ml_features = r["ml_input"]
+
+            # ML gating (optional)
+            ml_result = r["ml"]
+            if ml_result is not None:
+                try:
+                    if "error" in ml_result:
+                        raise RuntimeError(ml_result["error"])
+                    conf = float(ml_result.get("confidence", 0.0))
+                    pred_exit = str(ml_result.get("exit_reason",""))
+                    exp_pnl = float(ml_result.get("expected_pnl", 0.0))
+                    pf.log(f"[ML] {symbol} Pred: {pred_exit} | Conf: {conf:.2f} | ExpPnL: {exp_pnl:.2f}% | Model: {ml_result.get('model_version') or 'fallback'}")
+
+                    if pred_exit.upper() == "SL" or conf < pf.params["ML_MIN_CONFIDENCE"]:
+                        pf.log(f"[ML] Skipping {symbol} due to low confidence or SL prediction.")
                         continue
-                    else:
-                        symbol_cooldowns.pop(symbol, None)
 
-                # Skip if already has an open trade
-                has_open = any(t["symbol"] == symbol and str(t.get("status","")).lower() == "open" for t in open_trades)
-                if has_open:
-                    tlog(f"📌 {symbol} already has an open trade.")
-                    continue
+                    # Attach ML metadata to the soon-to-open trade (stored in signal)
+                    signal["ml_exit_reason"] = pred_exit
+                    signal["ml_confidence"] = conf
+                    signal["ml_expected_pnl"] = exp_pnl
+                    signal["ml_model_version"] = ml_result.get("model_version")
+                except Exception as e:
+                    pf.log(f"⚠️ ML gating error (continuing without ML): {e}")
+
+            # Build trade object (includes TPs/SL); attach indicators for logging/ML
+            signal["leverage"] = 1  # update if you simulate leverage
+            signal["adx"] = ml_features["adx"]
+            signal["rsi"] = ml_features["rsi"]
+            signal["macd"] = ml_features["macd"]
+            signal["ema_ratio"] = ml_features["ema_ratio"]
+            signal["trend_strength"] = ml_features["trend_strength"]   # ml_log inputs, as the model saw them
+            signal["volatility"] = ml_features["volatility"]
+
+            trade = build_fake_trade(signal, candle, atr_val, params=pf.position_overrides, log=pf.log)
+            # Pass through ML metadata if present
+            if "ml_exit_reason" in signal:
+                trade["ml_exit_reason"] = signal["ml_exit_reason"]
+                trade["ml_confidence"] = signal["ml_confidence"]
+                trade["ml_expected_pnl"] = signal["ml_expected_pnl"]
+                trade["ml_model_version"] = signal["ml_model_version"]
+
+            with timed("open_trade", symbol):
+                maybe_open_new_trade(pf.open_trades, trade, pf)
 
-                # Generate baseline signal (trend/vol filters)
-                signal = generate_signal(symbol, candle)
-                if not signal:
-                    tlog(f"❌ No valid signal for {symbol}")
-                    continue
+        except Exception as e:
+            pf.log(f"❌ Entry error for {symbol}: {e}")
 
-                # Build ML feature vector if possible
-                feats_df, feats, atr_val = _get_features_for_symbol(symbol, interval=TIMEFRAME, limit=100)
-                if atr_val <= 0:
-                    # If ATR is zero, skip opening (we need ATR for TP/SL construction)
-                    tlog(f"⚠️ ATR invalid for {symbol}, skipping entry.")
-                    continue
 
-                # Compose ML input
-                ml_features = {
-                    "symbol": symbol,
-                    "side": signal["direction"],
-                    "entry_price": candle["close"],
-                    "atr": atr_val,
-                    "trend_strength": float(signal.get("confidence", 0.0)),
-                    "volatility": float(candle.get("volatility", 0.0)),
-                    "duration_sec": 0,
-                    "adx": feats.get("adx", 0.0) if feats else 0.0,
-                    "rsi": feats.get("rsi", 0.0) if feats else 50.0,
-                    "macd": feats.get("macd", 0.0) if feats else 0.0,
-                    "ema_ratio": feats.get("ema_ratio", 1.0) if feats else 1.0,
-                }
-
-                # ML gating (optional)
-                if _HAS_ML:
-                    try:
-                        ml_result = predict_trade(ml_features)
-                        conf = float(ml_result.get("confidence", 0.0))
-                        pred_exit = str(ml_result.get("exit_reason",""))
-                        exp_pnl = float(ml_result.get("expected_pnl", 0.0))
-                        tlog(f"[ML] {symbol} Pred: {pred_exit} | Conf: {conf:.2f} | ExpPnL: {exp_pnl:.2f}%")
-
-                        if pred_exit.upper() == "SL" or conf < 0.5:
-                            tlog(f"[ML] Skipping {symbol} due to low confidence or SL prediction.")
-                            continue
-
-                        # Attach ML metadata to the soon-to-open trade (stored in signal)
-                        signal["ml_exit_reason"] = pred_exit
-                        signal["ml_confidence"] = conf
-                        signal["ml_expected_pnl"] = exp_pnl
-                    except Exception as e:
-                        tlog(f"⚠️ ML gating error (continuing without ML): {e}")
-
-                # Build trade object (includes TPs/SL); attach indicators for logging/ML
-                signal["leverage"] = 1  # update if you simulate leverage
-                signal["adx"] = ml_features["adx"]
-                signal["rsi"] = ml_features["rsi"]
-                signal["macd"] = ml_features["macd"]
-                signal["ema_ratio"] = ml_features["ema_ratio"]
-
-                trade = build_fake_trade(signal, candle, atr_val)
-                # Pass through ML metadata if present
-                if "ml_exit_reason" in signal:
-                    trade["ml_exit_reason"] = signal["ml_exit_reason"]
-                    trade["ml_confidence"] = signal["ml_confidence"]
-                    trade["ml_expected_pnl"] = signal["ml_expected_pnl"]
-
-                maybe_open_new_trade(open_trades, trade)
-
-            except Exception as e:
-                tlog(f"❌ Entry error for {symbol}: {e}")
-
-        # 4) Sleep until next cycle (respect evaluation interval)
-        elapsed = time.time() - cycle_start
-        to_sleep = max(1.0, EVALUATION_INTERVAL - elapsed)
-        time.sleep(to_sleep)
+def run_bot(telegram: bool = True):
+    load_dotenv()
+    tlog("🚀 TitanBot-Paper starting…")
+    if telegram:
+        try:
+            Thread(target=run_telegram_polling, daemon=True).start()
+            send_startup_notice()
+            tlog("☎️ Telegram polling started (background).")
+        except Exception as e:
+            tlog(f"⚠️ Telegram startup notice failed (continuing): {e}")
+
+    # Kline sources stack: live/replay -> recorder -> resampler (recorder sees raw base fetches)
+    if RECORD_KLINES:
+        install_recorder(RECORD_KLINES)
+        tlog(f"📼 Recording klines to {RECORD_KLINES}")
+    feed = None
+    if MTF_ENABLED:
+        feed = install_feed()
+        tlog(f"🕯️ Multi-timeframe feed on: {feed.base_interval} base stream, {TIMEFRAME} derived locally.")
+
+    # Paper portfolios (PORTFOLIOS_FILE; else the single one on the configured paths)
+    portfolios = load_portfolios()
+    if PORTFOLIOS_FILE:
+        tlog(f"📚 {len(portfolios)} portfolio(s) sharing one market feed: "
+             + ", ".join(f"{pf.name} ({pf.log_dir})" for pf in portfolios))
+
+    # Warm restart from the engine checkpoint (empty dicts on a cold start)
+    checkpoint = load_checkpoint(clock.now())
+    for pf in portfolios:                                       # {symbol: epoch_until}
+        pf.cooldowns = (checkpoint.get("portfolio_cooldowns", {}).get(pf.name, {}) if PORTFOLIOS_FILE
+                        else checkpoint.get("cooldowns", {}))
+    symbol_atr_cache = checkpoint.get("atr", {})                # {symbol: last_atr_val}
+    symbol_last_bar = checkpoint.get("last_bar_ms", {})         # {symbol: close ms of last entry bar}
+    if checkpoint:
+        restored = 0
+        if feed is not None and checkpoint.get("feed", {}).get("base_interval") == feed.base_interval:
+            restored = feed.restore(checkpoint["feed"]["bars"])
+        tlog(f"♻️ Restored checkpoint from {CHECKPOINT_PATH}: {sum(len(pf.cooldowns) for pf in portfolios)} cooldown(s), "
+             f"{len(symbol_atr_cache)} ATR(s), {restored} buffered bar(s).")
+
+    # ✅ Rehydrate open trades from disk (if any); catch-up fetches are shared between portfolios
+    fetched = {}
+    for pf in portfolios:
+        pf.open_trades = load_open_positions(pf.paths["open_positions"])
+        pf.ledger.start_projector()
+        if pf.open_trades:
+            pf.log(f"🔁 Rehydrated {len(pf.open_trades)} open trade(s) from last session.")
+            pf.ledger.adopt_open_trades(pf.open_trades)
+            _catch_up_open_positions(pf, symbol_last_bar, symbol_atr_cache, fetched)
+    del fetched
+    metrics.start_http_server()
+
+    # Optional multi-process scan; this process stays the single writer for logs/store
+    scanner = ShardCoordinator(SHARD_WORKERS) if SHARD_WORKERS > 1 and not RECORD_KLINES else None
+
+    # Wake ENTRY_DELAY_MS after each TIMEFRAME close for entries; EVALUATION_INTERVAL ticks in between for SL/TP
+    scheduler = CandleScheduler(TIMEFRAME, ENTRY_DELAY_MS, EVALUATION_INTERVAL)
+    tlog(f"⏱️ Entries on {TIMEFRAME} closes (+{ENTRY_DELAY_MS}ms); SL/TP monitor every {EVALUATION_INTERVAL}s.")
+
+    # New ACTIVE model bundles are loaded/warmed off-loop; swapped in at the top of a cycle
+    pipeline.start_model_watcher()
+    # Heavy imports (pandas, ta, the model) happen off-loop before the first entry cycle needs them
+    Thread(target=pipeline.prewarm, name="prewarm", daemon=True).start()
+
+    try:
+        while True:
+            kind = scheduler.wait()
+            cycle_start = clock.now()
+
+            swapped = pipeline.swap_model()
+            if swapped:
+                tlog(f"🔄 ML model swapped: {swapped[0] or 'fallback'} -> {swapped[1]}")
+                metrics.inc("titanbot_model_swaps_total")
+
+            if kind == "entry":
+                seen = _entry_cycle(portfolios, symbol_atr_cache, scanner)
+                symbol_last_bar.update({s: int(scheduler.last_bar_close * 1000) - 1 for s in seen})
+                metrics.observe("titanbot_bar_close_to_decision_seconds", clock.now() - scheduler.last_bar_close)
+            else:
+                _monitor_cycle(portfolios, symbol_atr_cache)
+
+            with timed("checkpoint"):
+                save_checkpoint({} if PORTFOLIOS_FILE else portfolios[0].cooldowns, symbol_atr_cache,
+                                symbol_last_bar, feed, now=clock.now(),
+                                portfolio_cooldowns={pf.name: pf.cooldowns for pf in portfolios} if PORTFOLIOS_FILE else None)
+
+            elapsed = clock.now() - cycle_start
+            metrics.record_cycle(elapsed, EVALUATION_INTERVAL, kind=kind)
+            if scheduler.missed_ticks:
+                metrics.inc("titanbot_scheduler_missed_ticks_total", scheduler.missed_ticks)
+                scheduler.missed_ticks = 0
+            metrics.write_textfile()
+    finally:
+        for pf in portfolios:
+            pf.ledger.stop_projector()   # views complete on exit (incl. end of simulation/replay)
 
 
 if __name__ == "__main__":
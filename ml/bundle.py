@@ -0,0 +1,133 @@
+# ml/bundle.py
+# Versioned model bundle: everything the predictor needs, written once by retrain_ml.py.
+#
+#   MODEL_DIR/
+#     ACTIVE                      <- name of the bundle to load (written last, atomically)
+#     <version>/
+#       bundle.json               <- format, version, feature order, encoder classes, training metadata
+#       xgb_classifier.json       <- exit-reason classifier (XGBoost JSON)
+#       lgb_regressor.txt         <- expected-PnL regressor (LightGBM text)
+#
+# Encoders are stored as their class lists (code = index in the list: sorted like LabelEncoder's
+# classes_ after a full retrain, new symbols appended by incremental ones), so loading needs
+# neither the training CSV nor sklearn, and codes can't drift from training.
+# Anything in `extras` (e.g. walk_forward.json from ml/training.py) is stored next to the models.
+
+import json
+import os
+import shutil
+from config import MODEL_DIR, ML_BACKEND
+
+BUNDLE_FORMAT = 1
+CLASSIFIER_FILE = "xgb_classifier.json"
+REGRESSOR_FILE = "lgb_regressor.txt"
+MANIFEST_FILE = "bundle.json"
+ACTIVE_FILE = "ACTIVE"
+
+
+def _write_atomic(path: str, text: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def save_bundle(clf, reg, encoders: dict, feature_order: list, metadata: dict,
+                model_dir: str = MODEL_DIR, activate: bool = True, extras: dict = None) -> str:
+    """
+    Write a bundle to MODEL_DIR/<metadata["version"]>/ and (optionally) point ACTIVE at it.
+    clf: fitted XGBClassifier or xgboost Booster; reg: LightGBM Booster;
+    encoders: {"symbol": [...], "side": [...], "exit_reason": [...]}; extras: {file name: text} stored alongside.
+    """
+    version = str(metadata["version"])
+    final = os.path.join(model_dir, version)
+    tmp = os.path.join(model_dir, f".tmp-{version}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    clf.save_model(os.path.join(tmp, CLASSIFIER_FILE))
+    reg.save_model(os.path.join(tmp, REGRESSOR_FILE))
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": version,
+        "feature_order": list(feature_order),
+        "encoders": {k: [str(c) for c in v] for k, v in encoders.items()},
+        "metadata": metadata,
+    }
+    _write_atomic(os.path.join(tmp, MANIFEST_FILE), json.dumps(manifest, indent=2, default=str))
+    for name, text in (extras or {}).items():
+        _write_atomic(os.path.join(tmp, name), text)
+
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(tmp, final)
+    if activate:
+        set_active(version, model_dir)
+    return final
+
+
+def set_active(version: str, model_dir: str = MODEL_DIR):
+    if not os.path.exists(os.path.join(model_dir, version, MANIFEST_FILE)):
+        raise FileNotFoundError(f"no model bundle {version} in {model_dir}")
+    _write_atomic(os.path.join(model_dir, ACTIVE_FILE), version + "\n")
+
+
+def active_version(model_dir: str = MODEL_DIR):
+    try:
+        with open(os.path.join(model_dir, ACTIVE_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(model_dir: str = MODEL_DIR) -> list:
+    """Bundle versions present in model_dir, oldest first (versions start with their UTC timestamp)."""
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(v for v in os.listdir(model_dir)
+                  if not v.startswith(".") and os.path.exists(os.path.join(model_dir, v, MANIFEST_FILE)))
+
+
+def read_manifest(path: str) -> dict:
+    with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"unsupported model bundle format {manifest.get('format')} in {path}")
+    return manifest
+
+
+def _load_native(path: str):
+    import xgboost as xgb
+    import lightgbm as lgb
+    clf = xgb.XGBClassifier()
+    clf.load_model(os.path.join(path, CLASSIFIER_FILE))
+    reg = lgb.Booster(model_file=os.path.join(path, REGRESSOR_FILE))
+    return clf, reg
+
+
+def _load_numpy(path: str):
+    from ml.tree_inference import XGBTreeClassifier, LGBTreeRegressor
+    return XGBTreeClassifier(os.path.join(path, CLASSIFIER_FILE)), LGBTreeRegressor(os.path.join(path, REGRESSOR_FILE))
+
+
+def load_bundle(path: str, backend: str = ML_BACKEND) -> dict:
+    """
+    Load models + manifest from one bundle directory. Both backends expose
+    clf.predict_proba(X) / reg.predict(X); "numpy" falls back to "native" for models it can't compile.
+    """
+    manifest = read_manifest(path)
+    if backend == "numpy":
+        try:
+            clf, reg = _load_numpy(path)
+        except NotImplementedError as e:
+            print(f"⚠️ NumPy tree backend can't load {manifest['version']} ({e}); using xgboost/lightgbm.")
+            backend = "native"
+    if backend != "numpy":
+        clf, reg = _load_native(path)
+    return {**manifest, "path": path, "backend": backend, "clf": clf, "reg": reg}
+
+
+def load_active_bundle(model_dir: str = MODEL_DIR, backend: str = ML_BACKEND) -> dict:
+    version = active_version(model_dir)
+    if not version:
+        raise FileNotFoundError(f"no active model bundle in {model_dir} (run retrain_ml.py)")
+    return load_bundle(os.path.join(model_dir, version), backend)
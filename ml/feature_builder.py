@@ -1,14 +1,32 @@
 import pandas as pd
 import ta
 
-def build_features(df):
-    df['atr'] = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'], window=14).average_true_range()
-    df['adx'] = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14).adx()
-    df['rsi'] = ta.momentum.RSIIndicator(df['close'], window=14).rsi()
-    df['macd'] = ta.trend.MACD(df['close']).macd_diff()
-    ema_fast = ta.trend.EMAIndicator(df['close'], window=12).ema_indicator()
-    ema_slow = ta.trend.EMAIndicator(df['close'], window=26).ema_indicator()
-    df['ema_ratio'] = ema_fast / ema_slow
-    df['volatility'] = df['close'].pct_change().rolling(window=14).std()
-    df = df.bfill().fillna(0)
-    return df[['atr', 'adx', 'rsi', 'macd', 'ema_ratio', 'volatility']]
+
+# name -> f(OHLC frame) -> Series; causal (row i only uses rows <= i). Adding an entry here plus one
+# scripts/build_feature_store.py run makes the feature available to training (ml/feature_store.py)
+# and to live inference (engine.pipeline passes every feature to the model that asks for it).
+FEATURE_FUNCS = {
+    'atr': lambda df: ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'], window=14).average_true_range(),
+    'adx': lambda df: ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14).adx(),
+    'rsi': lambda df: ta.momentum.RSIIndicator(df['close'], window=14).rsi(),
+    'macd': lambda df: ta.trend.MACD(df['close']).macd_diff(),
+    'ema_ratio': lambda df: (ta.trend.EMAIndicator(df['close'], window=12).ema_indicator()
+                             / ta.trend.EMAIndicator(df['close'], window=26).ema_indicator()),
+    'volatility': lambda df: df['close'].pct_change().rolling(window=14).std(),
+}
+
+
+def compute_features(df, names=None):
+    """Point-in-time feature columns (NaN during each indicator's warm-up, no back-fill)."""
+    return pd.DataFrame({name: FEATURE_FUNCS[name](df) for name in (names or FEATURE_FUNCS)}, index=df.index)
+
+
+def build_features(df=None, symbol=None, timeframe=None, limit=100):
+    """
+    TA features for each row of an OHLC frame. Pass symbol/timeframe instead of df to
+    build them on closed bars of any (derived) timeframe.
+    """
+    if df is None:
+        from core.indicator_utils import fetch_recent_candles
+        df = fetch_recent_candles(symbol, interval=timeframe or "5m", limit=limit, closed_only=True)
+    return compute_features(df).bfill().fillna(0)
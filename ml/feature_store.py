@@ -0,0 +1,179 @@
+# ml/feature_store.py
+# Point-in-time feature store: ml.feature_builder features computed once from candle history,
+# one columnar file per (symbol, timeframe), keyed by bar.
+#
+#   FEATURE_STORE_DIR/<timeframe>/<SYMBOL>.npz
+#     timestamp  int64   bar open (epoch ms)
+#     close_ms   int64   bar close (epoch ms) — the join key: a bar's features exist from here on
+#     <feature>  float64 one array per feature, NaN during the indicator's warm-up
+#
+# Features are causal (row i only uses bars <= i) and never back-filled, so joining a trade to the
+# last bar that closed at or before its entry gives exactly what was knowable at entry time.
+# Backfilling merges on timestamp: stored bars are kept (also those outside the given history), a
+# new feature is computed over the history, and new bars get the stored columns computed on just
+# themselves plus WARMUP_BARS earlier bars of the history.
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from config import FEATURE_STORE_DIR
+from ml.feature_builder import FEATURE_FUNCS, compute_features
+
+# The model's own "atr"/"volatility" inputs are the entry-candle values built in
+# engine.pipeline.build_ml_input (SMA ATR, candle range), not these TA columns, so joins skip them.
+MODEL_INPUT_COLS = ("atr", "volatility")
+_KEYS = ("timestamp", "close_ms")
+# Bars before the first new one that its features are computed over; the longest-memory
+# indicators (EMA-26, Wilder-14 smoothing) have converged to float precision well before this.
+WARMUP_BARS = 500
+
+
+def joinable_features() -> list:
+    return [f for f in FEATURE_FUNCS if f not in MODEL_INPUT_COLS]
+
+
+def store_path(symbol: str, timeframe: str, root: str = FEATURE_STORE_DIR) -> str:
+    return os.path.join(root, timeframe, f"{symbol}.npz")
+
+
+def load_features(symbol: str, timeframe: str, root: str = FEATURE_STORE_DIR, columns=None) -> pd.DataFrame:
+    """Stored bars as a DataFrame (timestamp, close_ms + features); empty if nothing stored."""
+    path = store_path(symbol, timeframe, root)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=list(_KEYS))
+    with np.load(path) as z:
+        names = list(_KEYS) + [c for c in z.files if c not in _KEYS and (columns is None or c in columns)]
+        return pd.DataFrame({c: z[c] for c in names})
+
+
+def _save(path: str, frame: pd.DataFrame):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **{c: frame[c].to_numpy() for c in frame.columns})
+    os.replace(tmp, path)
+
+
+def backfill_features(history: pd.DataFrame, symbol: str, timeframe: str, features=None,
+                      root: str = FEATURE_STORE_DIR, force: bool = False) -> dict:
+    """
+    Bring the store for (symbol, timeframe) up to date with an OHLCV history (timestamp = bar open,
+    epoch ms), merged on timestamp: stored bars are kept, including those the history doesn't
+    cover. Features not stored yet (every requested one with force) are computed over the whole
+    history; bars not stored yet get the stored features computed over them plus a WARMUP_BARS tail.
+    Returns {"bars", "new_bars", "computed"} (computed = columns recomputed over the whole history).
+    """
+    from engine.scheduler import timeframe_seconds
+    features = list(features or FEATURE_FUNCS)
+    unknown = [f for f in features if f not in FEATURE_FUNCS]
+    if unknown:
+        raise ValueError(f"Unknown feature(s): {', '.join(unknown)} (known: {', '.join(FEATURE_FUNCS)})")
+
+    hist = history.sort_values("timestamp").drop_duplicates("timestamp").reset_index(drop=True)
+    ts = hist["timestamp"].to_numpy(dtype="int64")
+    stored = load_features(symbol, timeframe, root)
+    stored_ts = stored["timestamp"].to_numpy(dtype="int64")
+    stored_cols = [c for c in stored.columns if c not in _KEYS]
+    todo = [f for f in features if force or f not in stored_cols]
+    new = np.flatnonzero(~np.isin(ts, stored_ts))
+    if not todo and not len(new):
+        return {"bars": len(stored_ts), "new_bars": 0, "computed": []}
+
+    ohlc = hist[["open", "high", "low", "close"]].astype(float)
+    all_ts = np.union1d(stored_ts, ts)
+    at_stored, at_hist = np.searchsorted(all_ts, stored_ts), np.searchsorted(all_ts, ts)
+    frame = pd.DataFrame({"timestamp": all_ts, "close_ms": all_ts + timeframe_seconds(timeframe) * 1000 - 1})
+    for c in dict.fromkeys(stored_cols + todo):
+        col = np.full(len(all_ts), np.nan)
+        if c in stored_cols:
+            col[at_stored] = stored[c].to_numpy(dtype=np.float64)
+        frame[c] = col
+
+    tail = [c for c in stored_cols if c in FEATURE_FUNCS and c not in todo]
+    if tail and len(new):
+        lo, hi = max(0, int(new[0]) - WARMUP_BARS), int(new[-1]) + 1
+        computed = compute_features(ohlc.iloc[lo:hi], tail)
+        for c in tail:
+            frame.loc[at_hist[new], c] = computed[c].to_numpy(dtype=np.float64)[new - lo]
+    if todo:
+        computed = compute_features(ohlc, todo)
+        for c in todo:
+            frame.loc[at_hist, c] = computed[c].to_numpy(dtype=np.float64)
+    _save(store_path(symbol, timeframe, root), frame)
+    return {"bars": len(all_ts), "new_bars": int(len(new)), "computed": todo}
+
+
+def _local_ms(stamps: pd.Series) -> np.ndarray:
+    """Epoch ms of local-time "%Y-%m-%d %H:%M:%S" strings (as the loggers write them); NaN if unparsable."""
+    parsed = pd.to_datetime(stamps, errors="coerce")
+    epoch = {t: time.mktime(t.timetuple()) * 1000 for t in parsed.dropna().unique()}
+    return parsed.map(epoch).to_numpy(dtype=np.float64)
+
+
+def trade_log_entry_times(path: str = None) -> dict:
+    """{trade_id: open-row timestamp} from trade_log.csv (the only log that records entry time)."""
+    from config import TRADE_LOG_PATH
+    path = path or TRADE_LOG_PATH
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return {}
+    from logger.schema import read_log
+    df = read_log("trade_log", path, columns=["timestamp", "trade_id", "status"], on_bad_lines="skip")
+    opens = df[df["status"].str.lower() == "open"].dropna(subset=["trade_id"])
+    return dict(zip(opens["trade_id"], opens["timestamp"]))
+
+
+def entry_time_ms(trades: pd.DataFrame, entry_times: dict = None) -> np.ndarray:
+    """
+    Entry time (epoch ms) of ml_log / journal rows: the trade's open timestamp from entry_times
+    ({trade id: timestamp}) when known, else the close-time "timestamp" minus duration_sec.
+    NaN where no timestamp can be parsed.
+    """
+    closed = _local_ms(trades["timestamp"])
+    duration = pd.to_numeric(trades.get("duration_sec", 0), errors="coerce")
+    duration = np.nan_to_num(np.broadcast_to(np.asarray(duration, dtype=np.float64), closed.shape))
+    out = closed - duration * 1000
+    id_col = "trade_id" if "trade_id" in trades.columns else "id"
+    if entry_times and id_col in trades.columns:
+        opened = _local_ms(trades[id_col].astype(str).map(entry_times))
+        out = np.where(np.isnan(opened), out, opened)
+    return out
+
+
+def join_features(trades: pd.DataFrame, timeframe: str, features=None, root: str = FEATURE_STORE_DIR,
+                  entry_times: dict = None, max_staleness_bars: int = 2) -> pd.DataFrame:
+    """
+    As-of join: each trade gets the stored features of the last bar of its symbol that closed at or
+    before its entry time (entry_time_ms(); no more than max_staleness_bars bars earlier). Log
+    stamps are whole seconds, so a bar closing within the entry's second is left out. Joined
+    columns replace the logged ones; trades without a matching bar keep their logged values.
+    Adds "_feature_bar_ms" (close of the joined bar, NaN if none).
+    """
+    from engine.scheduler import timeframe_seconds
+    names = list(features or joinable_features())
+    out = trades.copy()
+    out["_entry_ms"] = entry_time_ms(out, entry_times)
+    out["_row"] = np.arange(len(out))
+    tolerance = max_staleness_bars * timeframe_seconds(timeframe) * 1000
+
+    parts = []
+    for symbol, group in out[out["_entry_ms"].notna()].groupby("symbol", sort=False):
+        store = load_features(str(symbol), timeframe, root, columns=names)
+        if store.empty:
+            continue
+        store = store.rename(columns={"close_ms": "_feature_bar_ms"}).drop(columns="timestamp")
+        store["_feature_bar_ms"] = store["_feature_bar_ms"].astype(np.float64)
+        left = group[["_row", "_entry_ms"]].sort_values("_entry_ms")
+        parts.append(pd.merge_asof(left, store, left_on="_entry_ms", right_on="_feature_bar_ms",
+                                   direction="backward", tolerance=float(tolerance)))
+    out["_feature_bar_ms"] = np.nan
+    if parts:
+        joined = pd.concat(parts).set_index("_row").reindex(out["_row"])
+        hit = joined["_feature_bar_ms"].notna().to_numpy()
+        out.loc[hit, "_feature_bar_ms"] = joined.loc[hit, "_feature_bar_ms"].to_numpy()
+        for c in names:
+            if c in joined.columns:
+                vals = joined[c].to_numpy(dtype=np.float64)
+                base = out[c].to_numpy(dtype=np.float64) if c in out.columns else np.full(len(out), np.nan)
+                out[c] = np.where(hit, vals, base)
+    return out.drop(columns=["_entry_ms", "_row"])
@@ -1,4 +1,8 @@
 # ml/label_generator.py
+import multiprocessing as mp
+import os
+import time
+import numpy as np
 import pandas as pd
 
 def normalize_exit_reason(x: str) -> str:
@@ -22,3 +26,146 @@ def generate_labels(trade_df: pd.DataFrame) -> pd.DataFrame:
         df["exit_reason"] = "Other"
     df["exit_reason"] = df["exit_reason"].apply(normalize_exit_reason)
     return df
+
+
+# ---------- bulk labels from candle history ----------
+# Every closed bar where generate_signal() fires (and ATR > 0) becomes one independent paper
+# trade: build_fake_trade() levels, exits via update_position_status() semantics, no cooldown or
+# one-trade-per-symbol limit. Rows use the ml_log schema (utils/ml_logger.py) with the
+# entry-time inputs predict_trade() sees (ATR, |trend| as trend_strength, candle volatility).
+#
+# Fast path: for all candidates at once, a window of the next _SL_WINDOW bars is gathered into a
+# 2-D array and the first SL and first TP1 event bars are found with masks. A trade whose SL comes
+# no later than TP1 is an "SL" close at that bar (update_position_status checks SL first) and
+# needs no Python. The rest go through engine.backtest.run_exits() one by one.
+
+_SL_WINDOW = 64
+_CHUNK = 1 << 16     # candidates per fast-path batch (bounds the window arrays to a few MB)
+
+
+def _fast_sl_exits(bars: dict, entries, is_long, sl, tp1, buf: float):
+    """Exit bar index for trades decided by an SL before any TP (else -1)."""
+    high, low = bars["high"], bars["low"]
+    n = len(high)
+    out = np.full(len(entries), -1, dtype=np.int64)
+    offs = np.arange(1, _SL_WINDOW + 1)
+    for lo in range(0, len(entries), _CHUNK):
+        hi = min(len(entries), lo + _CHUNK)
+        idx = entries[lo:hi, None] + offs
+        valid = idx < n
+        idx = np.minimum(idx, n - 1)
+        H, L = high[idx], low[idx]
+        lg = is_long[lo:hi, None]
+        s, t = sl[lo:hi, None], tp1[lo:hi, None]
+        sl_ev = valid & np.where(lg, L <= s * (1 + buf), H >= s * (1 - buf))
+        tp_ev = valid & np.where(lg, H >= t * (1 - buf), L <= t * (1 + buf))
+        first_sl = np.where(sl_ev.any(axis=1), sl_ev.argmax(axis=1), _SL_WINDOW)
+        first_tp = np.where(tp_ev.any(axis=1), tp_ev.argmax(axis=1), _SL_WINDOW)
+        done = (first_sl < _SL_WINDOW) & (first_sl <= first_tp)
+        out[lo:hi] = np.where(done, entries[lo:hi] + 1 + first_sl, -1)
+    return out
+
+
+def generate_signal_labels(df: pd.DataFrame, symbol: str, interval: str, params: dict = None) -> pd.DataFrame:
+    """
+    ml_log-schema rows for every signal bar of one symbol's OHLCV history (timestamp = bar open,
+    epoch ms). Trades still open at the end of the history are dropped. `params` overrides
+    TP/SL/trailing/filter settings like engine.backtest.simulate().
+    """
+    from engine.backtest import prepare_bars, backtest_params, run_exits, fmt_ms, quiet
+    from engine.position_model import build_fake_trade
+    from utils.ml_logger import HEADERS
+
+    p = backtest_params(params)
+    bars = prepare_bars(df, interval)
+    o, h, l, c, atr = bars["open"], bars["high"], bars["low"], bars["close"], bars["atr"]
+    close_ms = bars["close_ms"]
+
+    # generate_signal() filter, vectorized (as in engine.backtest.simulate)
+    ref = np.maximum(o, 1e-9)
+    trend = (c - o) / ref
+    entries = np.flatnonzero((np.abs(trend) >= p["MIN_TREND_STRENGTH"]) & ((h - l) / ref >= p["MIN_VOLATILITY"]) & (atr > 0))
+    if not len(entries):
+        return pd.DataFrame(columns=HEADERS)
+
+    # build_fake_trade() levels (python round() to 6 places, exactly as stored on the trade)
+    is_long = trend[entries] > 0
+    e_close, e_atr = c[entries], atr[entries]
+    sign = np.where(is_long, 1.0, -1.0)
+    tp_mult, sl_mult = p["TP_MULTIPLIERS"], p["SL_MULTIPLIER"]
+    levels = {k: np.array([round(x, 6) for x in (e_close + sign * m * e_atr).tolist()])
+              for k, m in (("tp1", tp_mult[0]), ("tp2", tp_mult[1]), ("tp3", tp_mult[2]), ("sl", -sl_mult))}
+
+    exit_bar = _fast_sl_exits(bars, entries, is_long, levels["sl"], levels["tp1"], p["PRICE_BUFFER_PCT"])
+    exit_price = levels["sl"].copy()
+    exit_reason = np.full(len(entries), "SL", dtype=object)
+    for j in np.flatnonzero(exit_bar < 0):
+        e = int(entries[j])
+        signal = {"symbol": symbol, "direction": "LONG" if is_long[j] else "SHORT",
+                  "confidence": abs(float(trend[e])), "strategy_name": "basic_trend", "leverage": 1}
+        trade = build_fake_trade(signal, {"open": o[e], "high": h[e], "low": l[e], "close": c[e]},
+                                 float(atr[e]), params=p, log=quiet)
+        k = run_exits(trade, bars, e + 1, p)
+        if k >= 0:
+            exit_bar[j], exit_price[j], exit_reason[j] = k, trade["exit_price"], trade["exit_reason"]
+
+    keep = exit_bar >= 0
+    entries, exit_bar = entries[keep], exit_bar[keep]
+    side = np.where(is_long[keep], "LONG", "SHORT")
+    entry_price, exit_price = c[entries], exit_price[keep].astype(float)
+    pnl = (exit_price - entry_price) / entry_price * 100 * np.where(is_long[keep], 1.0, -1.0)
+    exit_reason = exit_reason[keep]
+    out = pd.DataFrame({
+        "timestamp": [fmt_ms(ms) for ms in close_ms[exit_bar].tolist()],
+        # generated rows are recognizable (and re-runs deduplicable) by their id
+        "id": [f"gen-{symbol}-{ms}" for ms in close_ms[entries].tolist()],
+        "symbol": symbol,
+        "side": side,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "exit_reason": exit_reason,
+        "sl": levels["sl"][keep], "tp1": levels["tp1"][keep], "tp2": levels["tp2"][keep], "tp3": levels["tp3"][keep],
+        "atr": np.round(atr[entries], 5),
+        "trend_strength": np.round(np.abs(trend[entries]), 5),
+        "volatility": np.round((h[entries] - l[entries]) / c[entries], 5),
+        **{name: np.round(bars[name][entries], 5) for name in ("adx", "rsi", "macd", "ema_ratio")},
+        "pnl_pct": np.round(pnl, 4),
+        "raw_profit": 0.0,
+        "duration_sec": (close_ms[exit_bar] - close_ms[entries]) // 1000,
+        "strategy": "basic_trend",
+        "leverage": 1,
+        "is_partial": np.array(["Partial" in str(r) for r in exit_reason], dtype=int),
+    })
+    return out[HEADERS]
+
+
+def _label_task(task):
+    symbol, path, interval, params = task
+    from engine.backtest import load_history
+    t0 = time.perf_counter()
+    rows = generate_signal_labels(load_history(path), symbol, interval, params)
+    return symbol, rows, time.perf_counter() - t0
+
+
+def generate_labels_parallel(histories: dict, interval: str, out_path: str, params: dict = None,
+                             workers: int = None, log=print) -> int:
+    """
+    Label every symbol's history ({symbol: OHLCV CSV path}) on a process pool, one symbol per
+    task, appending each finished symbol to out_path (ml_log schema, header when new).
+    Returns the number of rows written.
+    """
+    tasks = [(s, path, interval, params) for s, path in sorted(histories.items())]
+    workers = max(1, min(len(tasks), int(workers or os.cpu_count() or 1)))
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    total = 0
+    t0 = time.perf_counter()
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(processes=workers) as pool:
+        for symbol, rows, secs in pool.imap_unordered(_label_task, tasks):
+            new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+            rows.to_csv(out_path, mode="a", header=new_file, index=False)
+            total += len(rows)
+            counts = rows["exit_reason"].value_counts().to_dict()
+            log(f"  {symbol}: {len(rows)} rows in {secs:.1f}s {counts}")
+    log(f"Labels: {total} rows from {len(tasks)} symbol(s) in {time.perf_counter() - t0:.1f}s ({workers} workers)")
+    return total
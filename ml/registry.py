@@ -0,0 +1,179 @@
+# ml/registry.py
+# Hot-reloadable model registry over MODEL_DIR (ml/bundle.py layout).
+#
+# A background thread polls MODEL_DIR/ACTIVE; when it names a new version, that bundle is
+# loaded and warmed off the main loop and parked as "pending". The bot calls swap() between
+# cycles, which replaces the single `current` reference, so a cycle always scores with one
+# model and a rollout never blocks or skips a cycle. A bundle that fails to load (e.g. ACTIVE
+# read while the bundle was still being copied) is retried with a doubling backoff, up to
+# RETRY_MAX_SECS apart; the running model stays meanwhile.
+
+import os
+import threading
+import time
+import numpy as np
+from config import MODEL_DIR, ML_BACKEND, MODEL_POLL_SECS
+from ml.bundle import load_bundle, active_version
+
+RETRY_MAX_SECS = 600
+
+
+class LoadedModel:
+    """One bundle ready to score: models, encoder lookups and feature order. Never mutated."""
+
+    def __init__(self, bundle: dict):
+        self.bundle = bundle
+        self.version = bundle["version"]
+        self.backend = bundle["backend"]
+        self.clf = bundle["clf"]
+        self.reg = bundle["reg"]
+        self.feature_order = bundle["feature_order"]
+        # LabelEncoder codes = position in the sorted classes list
+        self.symbol_codes = {c: i for i, c in enumerate(bundle["encoders"]["symbol"])}
+        self.side_codes = {c: i for i, c in enumerate(bundle["encoders"]["side"])}
+        self.exit_classes = list(bundle["encoders"]["exit_reason"])
+
+    def encode(self, signal_data):
+        symbol, side = signal_data['symbol'], signal_data['side']
+        if symbol not in self.symbol_codes or side not in self.side_codes:
+            unseen = [x for x, codes in ((symbol, self.symbol_codes), (side, self.side_codes)) if x not in codes]
+            raise ValueError(f"y contains previously unseen labels: {unseen}")
+        row = []
+        for name in self.feature_order:
+            if name == 'symbol_enc':
+                row.append(self.symbol_codes[symbol])
+            elif name == 'side_enc':
+                row.append(self.side_codes[side])
+            else:
+                row.append(signal_data[name])
+        return row
+
+    def predict_trades(self, batch):
+        """
+        Score many candidates with one classifier and one regressor call.
+        Returns one result per input, in order; a candidate that cannot be encoded
+        gets {'error': ...} without affecting the others.
+        """
+        results = [None] * len(batch)
+        rows, where = [], []
+        for i, signal_data in enumerate(batch):
+            try:
+                rows.append(self.encode(signal_data))
+                where.append(i)
+            except Exception as e:
+                results[i] = {'error': str(e), 'model_version': self.version}
+        if not rows:
+            return results
+
+        X = np.ascontiguousarray(rows, dtype=np.float64)
+        probs = self.clf.predict_proba(X)
+        pnls = self.reg.predict(X)
+        idx = np.argmax(probs, axis=1)
+        for k, i in enumerate(where):
+            results[i] = {
+                'exit_reason': self.exit_classes[idx[k]],
+                'confidence': round(probs[k, idx[k]], 6),
+                'expected_pnl': round(pnls[k], 6),
+                'model_version': self.version,
+            }
+        return results
+
+    def warm(self):
+        """Run one throwaway batch so first-call costs (lazy init, page faults) are paid off the main loop."""
+        X = np.zeros((1, len(self.feature_order)), dtype=np.float64)
+        self.clf.predict_proba(X)
+        self.reg.predict(X)
+
+
+class ModelRegistry:
+    def __init__(self, model_dir: str = MODEL_DIR, backend: str = ML_BACKEND, poll_secs: float = MODEL_POLL_SECS):
+        self.model_dir = model_dir
+        self.backend = backend
+        self.poll_secs = poll_secs
+        self.current = None          # LoadedModel scoring this cycle (replaced only by swap())
+        self.last_error = None       # (version, message) of the last failed load
+        self._pending = None
+        self._seen = None            # last ACTIVE value loaded successfully
+        self._retry = (None, 0.0, 0.0)   # (failed version, monotonic time of next attempt, backoff secs)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load(self, version: str) -> LoadedModel:
+        model = LoadedModel(load_bundle(os.path.join(self.model_dir, version), self.backend))
+        model.warm()
+        return model
+
+    def load_active(self) -> LoadedModel:
+        """Synchronous startup load of the ACTIVE bundle; raises if there is none or it can't load."""
+        version = active_version(self.model_dir)
+        if not version:
+            raise FileNotFoundError(f"no active model bundle in {self.model_dir} (run retrain_ml.py)")
+        self.current = self._load(version)
+        self._seen = version
+        return self.current
+
+    def check(self) -> bool:
+        """
+        Load + warm the ACTIVE bundle if it changed since the last check. Returns True when
+        a new model is pending. Safe to call from the watcher thread (never touches `current`).
+        """
+        version = active_version(self.model_dir)
+        if not version or version == self._seen:
+            return False
+        if self.current is not None and version == self.current.version:
+            self._seen = version
+            return False
+        failed, retry_at, backoff = self._retry
+        now = time.monotonic()
+        if version == failed and now < retry_at:
+            return False
+        try:
+            model = self._load(version)
+        except Exception as e:
+            backoff = min(backoff * 2, RETRY_MAX_SECS) if version == failed else max(self.poll_secs, 1.0)
+            self._retry = (version, now + backoff, backoff)
+            self.last_error = (version, str(e))
+            print(f"⚠️ Model bundle {version} failed to load, keeping {self.version or 'fallback'} "
+                  f"(retry in {backoff:.0f}s): {e}")
+            return False
+        self._seen = version
+        with self._lock:
+            self._pending = model
+        return True
+
+    def swap(self):
+        """
+        Install the pending model, if any (call between cycles). Returns (old_version, new_version)
+        on a swap, else None.
+        """
+        with self._lock:
+            model, self._pending = self._pending, None
+        if model is None:
+            return None
+        old = self.version
+        self.current = model
+        return old, model.version
+
+    @property
+    def version(self):
+        model = self.current
+        return model.version if model is not None else None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_secs):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Model registry check failed: {e}")
+
+    def start(self):
+        """Start the background watcher (daemon). No-op if polling is disabled or already running."""
+        if self.poll_secs <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,445 @@
+# ml/training.py
+# Retraining pipeline behind retrain_ml.py.
+#
+#   full         fit both models from scratch on ml_log.csv (balanced per class)
+#   incremental  continue boosting the ACTIVE bundle's models on the rows appended since it was
+#                trained: the log is read from the byte offset recorded in the bundle, so a run
+#                costs the new rows only. "auto" only takes this path when every exit class has
+#                MIN_ROWS_PER_CLASS new rows and the parent stays under MAX_ROUNDS.
+#   holdout      every run keeps the most recent HOLDOUT_FRACTION of its rows (all rows for full,
+#                the new ones for incremental) out of fitting and scores on them; the new bundle
+#                only becomes ACTIVE when it beats the parent bundle on that holdout, and is then
+#                boosted on the holdout as well so no row is skipped by the next incremental run.
+#                A losing bundle leaves the offset where it was: its rows are retried once more
+#                have been appended, not refitted as-is.
+#   walk-forward time-ordered expanding windows (train on folds[:i], test on fold i), fitted and
+#                scored in parallel on a process pool; per-window metrics are written to
+#                <bundle>/walk_forward.json. Rows are never shuffled across time.
+#   feature store with feature_store=<timeframe>, indicator features come from an as-of join of
+#                each row's entry time against ml/feature_store.py instead of the logged values,
+#                and any extra feature backfilled there becomes a model input.
+#
+# Models are trained through the native xgboost/lightgbm APIs (Booster objects), so a
+# continued model keeps the same objective and class count, and a batch of new rows that lacks
+# some exit class is still valid. Both save in the formats ml/bundle.py and ml/tree_inference.py read.
+
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import platform
+import signal as _signal
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from config import MODEL_DIR
+from ml.bundle import save_bundle, active_version, list_versions, read_manifest, CLASSIFIER_FILE, REGRESSOR_FILE
+from ml.feature_store import joinable_features
+from logger import schema
+
+REQUIRED_COLS = ['exit_reason', 'pnl_pct', 'atr', 'trend_strength', 'volatility']
+OPTIONAL_COLS = ['adx', 'rsi', 'macd', 'ema_ratio']
+BASE_FEATURES = ['symbol_enc', 'side_enc', 'entry_price', 'atr', 'trend_strength', 'volatility', 'duration_sec']
+WALK_FORWARD_FILE = "walk_forward.json"
+
+# Same capacity as the old XGBClassifier()/LGBMRegressor() defaults
+CLF_ROUNDS = 100
+REG_ROUNDS = 100
+
+MIN_ROWS_PER_CLASS = 20   # fewer and a class is not balanced on (nor an auto incremental run taken)
+HOLDOUT_FRACTION = 0.2    # most recent share of the rows scored before they are fitted
+MAX_ROUNDS = 500          # auto: full retrain instead of growing a parent past this many rounds
+
+
+# ---------- data ----------
+def read_log(path: str, offset: int = 0):
+    """
+    ml_log rows from byte `offset` on (0 = whole file) and the offset for the next run; see
+    logger.schema.read_appended. Raises ValueError if the log was rewritten since `offset`.
+    """
+    return schema.read_appended("ml_log", path, offset, on_bad_lines='skip')
+
+
+def prepare_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows missing a required column; stable time order (the log's own order breaks ties)."""
+    df = df.dropna(subset=REQUIRED_COLS)
+    if "timestamp" in df.columns:
+        ts = pd.to_datetime(df["timestamp"], errors="coerce")
+        df = df.assign(_ts=ts).sort_values("_ts", kind="stable").drop(columns="_ts")
+    return df.reset_index(drop=True)
+
+
+def balance(df: pd.DataFrame, seed: int = 42, min_class_rows: int = MIN_ROWS_PER_CLASS) -> pd.DataFrame:
+    """
+    Downsample every exit class to the rarest one present (keeps time order). When that class has
+    fewer than min_class_rows rows the frame is returned as is: downsampling a small batch to its
+    rarest class would throw most of it away.
+    """
+    if df.empty:
+        return df
+    counts = df['exit_reason'].value_counts()
+    min_size = counts[counts > 0].min()   # a categorical column also counts absent classes
+    if min_size < min_class_rows:
+        return df
+    return df.groupby('exit_reason', observed=True).sample(min_size, random_state=seed).sort_index()
+
+
+def split_holdout(df: pd.DataFrame, fraction: float = HOLDOUT_FRACTION):
+    """(fit rows, holdout rows): the holdout is the most recent `fraction` of the time-ordered rows."""
+    n_hold = int(np.ceil(len(df) * fraction)) if len(df) > 1 else 0
+    return df.iloc[:len(df) - n_hold], df.iloc[len(df) - n_hold:]
+
+
+def feature_columns(df: pd.DataFrame, extra=()) -> list:
+    return BASE_FEATURES + [c for c in OPTIONAL_COLS if c in df.columns] + [c for c in extra if c not in OPTIONAL_COLS]
+
+
+def fit_encoders(df: pd.DataFrame) -> dict:
+    # Sorted class lists, i.e. what LabelEncoder().fit() stores in classes_
+    return {k: sorted(df[k].dropna().astype(str).unique()) for k in ("symbol", "side", "exit_reason")}
+
+
+def extend_encoders(encoders: dict, df: pd.DataFrame) -> dict:
+    """
+    Append unseen symbols/sides after the existing classes, so existing codes never move.
+    A new exit class changes the classifier's output size and needs a full retrain.
+    """
+    new_exits = sorted(set(df['exit_reason'].astype(str)) - set(encoders["exit_reason"]))
+    if new_exits:
+        raise ValueError(f"new exit class(es) {new_exits}; run a full retrain")
+    out = dict(encoders)
+    for k in ("symbol", "side"):
+        seen = set(encoders[k])
+        out[k] = list(encoders[k]) + sorted(set(df[k].astype(str)) - seen)
+    return out
+
+
+def encode(df: pd.DataFrame, encoders: dict, feature_order: list):
+    """(X, y_class, y_pnl) as float64/int arrays in the bundle's feature order."""
+    codes = {k: {c: i for i, c in enumerate(encoders[k])} for k in encoders}
+    cols = {
+        'symbol_enc': df['symbol'].astype(str).map(codes["symbol"]),
+        'side_enc': df['side'].astype(str).map(codes["side"]),
+    }
+    X = np.column_stack([cols[c] if c in cols else df[c] for c in feature_order]).astype(np.float64)
+    y_class = df['exit_reason'].astype(str).map(codes["exit_reason"]).to_numpy(dtype=np.int64)
+    return X, y_class, df['pnl_pct'].to_numpy(dtype=np.float64)
+
+
+# ---------- models ----------
+def fit_models(X, y_class, y_pnl, n_classes: int, init_path: str = None,
+               clf_rounds: int = CLF_ROUNDS, reg_rounds: int = REG_ROUNDS, threads: int = 0,
+               init_models: tuple = None):
+    """
+    Boost `clf_rounds`/`reg_rounds` trees; with init_path (a bundle directory) or init_models
+    (a (clf, reg) pair from an earlier fit_models call) the new trees are added to those models
+    instead of starting from scratch. Returns (xgb Booster, lgb Booster).
+    """
+    import xgboost as xgb
+    import lightgbm as lgb
+    clf_params = {"objective": "multi:softprob", "num_class": n_classes, "eval_metric": "mlogloss"}
+    reg_params = {"objective": "regression", "verbose": -1}
+    if threads:
+        clf_params["nthread"] = threads
+        reg_params["num_threads"] = threads
+    init_clf, init_reg = init_models or (None, None)
+    if init_path:
+        init_clf = xgb.Booster(model_file=os.path.join(init_path, CLASSIFIER_FILE))
+        init_reg = os.path.join(init_path, REGRESSOR_FILE)
+    clf = xgb.train(clf_params, xgb.DMatrix(X, label=y_class), num_boost_round=clf_rounds, xgb_model=init_clf)
+    reg = lgb.train(reg_params, lgb.Dataset(X, label=y_pnl), num_boost_round=reg_rounds, init_model=init_reg)
+    return clf, reg
+
+
+def score(clf, reg, X, y_class, y_pnl) -> dict:
+    import xgboost as xgb
+    if len(X) == 0:
+        return {"rows": 0}
+    probs = clf.predict(xgb.DMatrix(X))
+    p_true = np.clip(probs[np.arange(len(y_class)), y_class], 1e-15, 1.0)
+    return {
+        "rows": int(len(X)),
+        "classifier_accuracy": round(float((probs.argmax(axis=1) == y_class).mean()), 4),
+        "classifier_logloss": round(float(-np.log(p_true).mean()), 4),
+        "regressor_mae": round(float(np.abs(reg.predict(X) - y_pnl).mean()), 4),
+    }
+
+
+def beats(new: dict, old: dict) -> bool:
+    """`new` scored better than `old` on the same rows: lower classifier log-loss, regressor MAE no worse."""
+    if not new.get("rows") or not old.get("rows"):
+        return False
+    return (new["classifier_logloss"] < old["classifier_logloss"]
+            and new["regressor_mae"] <= old["regressor_mae"])
+
+
+# ---------- walk-forward ----------
+def walk_forward_windows(n_rows: int, n_windows: int, min_train: int = 50) -> list:
+    """
+    Expanding windows over time-ordered rows: n_windows + 1 equal folds, window i trains on
+    folds[0..i] and tests on fold i+1. Windows whose training part is under min_train rows are dropped.
+    """
+    edges = np.linspace(0, n_rows, n_windows + 2).astype(int)
+    return [(0, int(edges[i + 1]), int(edges[i + 1]), int(edges[i + 2]))
+            for i in range(n_windows) if edges[i + 1] >= min_train and edges[i + 2] > edges[i + 1]]
+
+
+_worker = {}
+
+
+def _worker_init(df: pd.DataFrame, encoders: dict, feature_order: list, threads: int):
+    _signal.signal(_signal.SIGINT, _signal.SIG_IGN)
+    _worker.update(df=df, encoders=encoders, feature_order=feature_order, threads=threads)
+
+
+def _evaluate_window(window):
+    train_lo, train_hi, test_lo, test_hi = window
+    df, encoders, order = _worker["df"], _worker["encoders"], _worker["feature_order"]
+    t0 = time.perf_counter()
+    train = balance(df.iloc[train_lo:train_hi])
+    test = df.iloc[test_lo:test_hi]
+    clf, reg = fit_models(*encode(train, encoders, order), len(encoders["exit_reason"]), threads=_worker["threads"])
+    out = score(clf, reg, *encode(test, encoders, order))
+    out.update({
+        "train_rows": int(train_hi - train_lo), "train_rows_balanced": int(len(train)),
+        "test_from": str(test["timestamp"].iloc[0]) if "timestamp" in test else test_lo,
+        "test_to": str(test["timestamp"].iloc[-1]) if "timestamp" in test else test_hi - 1,
+        "sec": round(time.perf_counter() - t0, 3),
+    })
+    return out
+
+
+def walk_forward(df: pd.DataFrame, encoders: dict, feature_order: list, n_windows: int,
+                 workers: int = None, log=print) -> list:
+    """Fit + score every window on a process pool; results in window order."""
+    windows = walk_forward_windows(len(df), n_windows)
+    if not windows:
+        log(f"Walk-forward: {len(df)} rows is too few for {n_windows} windows, skipped.")
+        return []
+    workers = max(1, min(len(windows), int(workers or os.cpu_count() or 1)))
+    # Split the cores between the workers instead of every fit using all of them
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    ctx = mp.get_context("spawn")
+    pool = ctx.Pool(processes=workers, initializer=_worker_init, initargs=(df, encoders, feature_order, threads))
+    try:
+        results = pool.map(_evaluate_window, windows)
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    for i, r in enumerate(results):
+        r["window"] = i
+        log(f"  window {i}: train {r['train_rows']} rows, test {r['rows']} rows -> "
+            f"acc {r.get('classifier_accuracy', '-')} | mae {r.get('regressor_mae', '-')}")
+    return results
+
+
+# ---------- runs ----------
+def _data_hash(df: pd.DataFrame, feature_order: list) -> str:
+    cols = [c for c in feature_order if c in df.columns] + ['symbol', 'side', 'exit_reason', 'pnl_pct']
+    return hashlib.sha1(pd.util.hash_pandas_object(df[cols], index=False).values.tobytes()).hexdigest()
+
+
+def _libs() -> dict:
+    import xgboost as xgb
+    import lightgbm as lgb
+    return {"xgboost": xgb.__version__, "lightgbm": lgb.__version__, "python": platform.python_version()}
+
+
+def _load_rows(ml_log: str, offset: int, feature_store: str, log=print):
+    """prepare_rows() of the log from `offset`, joined to the feature store when one is given."""
+    df, end = read_log(ml_log, offset)
+    df = prepare_rows(df)
+    if feature_store and not df.empty:
+        from ml.feature_store import join_features, trade_log_entry_times
+        # live ml_log rows carry no entry time (duration_sec is 0); trade_log.csv has the open rows
+        df = join_features(df, feature_store, entry_times=trade_log_entry_times())
+        matched = int(df["_feature_bar_ms"].notna().sum())
+        log(f"Feature store ({feature_store}): {matched}/{len(df)} rows matched a bar at entry time.")
+        df = df.drop(columns="_feature_bar_ms")
+    return df, end
+
+
+def _parent_rounds(parent_path: str) -> int:
+    import xgboost as xgb
+    return xgb.Booster(model_file=os.path.join(parent_path, CLASSIFIER_FILE)).num_boosted_rounds()
+
+
+def _score_parent(parent_path: str, rows: pd.DataFrame, encoders: dict, feature_order: list, log=print):
+    """The parent bundle's score on `rows`, or None when it can't score them (other features/classes)."""
+    if rows.empty or [c for c in feature_order if c not in BASE_FEATURES[:2] and c not in rows.columns]:
+        return None
+    if set(rows['exit_reason'].astype(str)) - set(encoders["exit_reason"]):
+        return None
+    from ml.bundle import load_bundle
+    try:
+        current = load_bundle(parent_path, "native")
+    except Exception as e:
+        log(f"⚠️ Can't load parent bundle {parent_path} to compare against ({e}).")
+        return None
+    return score(current["clf"].get_booster(), current["reg"], *encode(rows, encoders, feature_order))
+
+
+def _rejected_version(model_dir: str, parent: str, source_bytes: int):
+    """A bundle already trained from `parent` on the log up to source_bytes that did not beat it."""
+    for version in reversed(list_versions(model_dir)):
+        meta = read_manifest(os.path.join(model_dir, version)).get("metadata", {})
+        if (meta.get("parent") == parent and meta.get("source_bytes") == source_bytes
+                and meta.get("beat_parent") is False):
+            return version
+    return None
+
+
+def retrain(ml_log: str = "ml_log.csv", mode: str = "auto", windows: int = 0, workers: int = None,
+            rounds: int = 50, model_dir: str = MODEL_DIR, activate: bool = True,
+            feature_store: str = None, log=print) -> dict:
+    """
+    Train a new bundle and return its metadata. mode: "full", "incremental", or "auto"
+    (incremental when the active bundle records a log offset, the log only grew since, every
+    exit class has MIN_ROWS_PER_CLASS new rows and the parent has room under MAX_ROUNDS).
+    `rounds` = trees added per model by an incremental run; windows > 0 adds a walk-forward
+    evaluation over the whole log (which then has to be read in full). feature_store = timeframe
+    of the store to take indicator features from (None = the values logged at entry).
+    Once the new models beat the parent on the holdout, they are boosted on the holdout too, so
+    the next incremental run can start at source_bytes without skipping rows. With activate=True,
+    ACTIVE only moves to a bundle that beat its parent (metadata["activated"] says whether it did).
+    """
+    parent = active_version(model_dir)
+    parent_path = os.path.join(model_dir, parent) if parent else None
+    manifest = read_manifest(parent_path) if parent_path else None
+    offset = (manifest or {}).get("metadata", {}).get("source_bytes") if manifest else None
+
+    if offset is not None and not feature_store:
+        # a continued model keeps its parent's feature source
+        feature_store = manifest["metadata"].get("feature_store")
+    if mode == "incremental" and offset is None:
+        raise ValueError(f"active bundle {parent or '(none)'} has no log offset; run a full retrain first")
+    new = None
+    if mode in ("incremental", "auto") and offset is not None:
+        try:
+            if os.path.getsize(ml_log) < offset:
+                raise ValueError(f"{ml_log} is smaller than when {parent} was trained")
+            new, source_bytes = _load_rows(ml_log, offset, feature_store, log)
+            encoders = extend_encoders(manifest["encoders"], new)
+            feature_order = list(manifest["feature_order"])
+            missing = [c for c in feature_order if c not in BASE_FEATURES[:2] and c not in new.columns]
+            if missing:
+                raise ValueError(f"new rows lack feature column(s) {missing}")
+            if mode == "auto" and not new.empty:
+                counts = new['exit_reason'].astype(str).value_counts()
+                short = {c: int(counts.get(c, 0)) for c in encoders["exit_reason"] if counts.get(c, 0) < MIN_ROWS_PER_CLASS}
+                if short:
+                    raise ValueError(f"too few new rows per exit class {short}, need {MIN_ROWS_PER_CLASS}")
+                # + the rounds the holdout is folded in with
+                if _parent_rounds(parent_path) + rounds + max(1, round(rounds * HOLDOUT_FRACTION)) > MAX_ROUNDS:
+                    raise ValueError(f"{parent} would grow past {MAX_ROUNDS} rounds")
+        except ValueError as e:
+            if mode == "incremental":
+                raise
+            log(f"Incremental retrain not possible ({e}); doing a full retrain.")
+            new = None
+    if new is not None and new.empty:
+        log(f"No new rows in {ml_log} since {parent}; nothing to train.")
+        return manifest["metadata"]
+    if new is not None:
+        rejected = _rejected_version(model_dir, parent, source_bytes)
+        if rejected:
+            # ACTIVE (and so the offset) stays put until a bundle wins; don't refit the same rows
+            log(f"{rejected} was already trained on these rows and did not beat {parent}; "
+                f"waiting for more rows in {ml_log}.")
+            return read_manifest(os.path.join(model_dir, rejected))["metadata"]
+
+    trained_at = datetime.now(timezone.utc)
+    if new is not None:
+        # Continue boosting on the older new rows; the parent and the result are scored on the rest
+        fit_part, holdout = split_holdout(new)
+        # no holdout to compare on (a tiny batch) counts as not beating the parent
+        prev = _score_parent(parent_path, holdout, encoders, feature_order, log) or {"rows": 0}
+        fit_rows = balance(fit_part)
+        clf, reg = fit_models(*encode(fit_rows, encoders, feature_order), len(encoders["exit_reason"]),
+                              init_path=parent_path, clf_rounds=rounds, reg_rounds=rounds)
+        metadata = {
+            "mode": "incremental",
+            "parent": parent,
+            "rows_total": int(manifest["metadata"].get("rows_total", 0)) + int(len(new)),
+            "rows_new": int(len(new)),
+            "rounds_added": rounds,
+            "class_counts": {str(k): int(v) for k, v in new['exit_reason'].value_counts().items()},
+        }
+        all_rows = None
+    else:
+        all_rows, source_bytes = _load_rows(ml_log, 0, feature_store, log)
+        encoders = fit_encoders(all_rows)
+        feature_order = feature_columns(all_rows, joinable_features() if feature_store else ())
+        fit_part, holdout = split_holdout(all_rows)
+        # a parent trained on other features/classes is compared on its own encoding of the holdout
+        prev = _score_parent(parent_path, holdout, manifest["encoders"], list(manifest["feature_order"]), log) \
+            if manifest else None
+        fit_rows = balance(fit_part)
+        clf, reg = fit_models(*encode(fit_rows, encoders, feature_order), len(encoders["exit_reason"]))
+        metadata = {
+            "mode": "full",
+            "parent": parent,
+            "rows_total": int(len(all_rows)),
+            "class_counts": {str(k): int(v) for k, v in all_rows['exit_reason'].value_counts().items()},
+        }
+    held = score(clf, reg, *encode(holdout, encoders, feature_order))
+    metadata.update({
+        "rows_fit": int(len(fit_part)),
+        "rows_balanced": int(len(fit_rows)),
+        # out-of-sample: the most recent rows, scored before they are fitted on below
+        "classifier_accuracy": held.get("classifier_accuracy"),
+        "regressor_mae": held.get("regressor_mae"),
+        "holdout": held,
+        "parent_on_holdout": prev,
+    })
+    passed = prev is None or beats(held, prev)
+    if passed and not holdout.empty:
+        # Fold the holdout in with rounds in proportion to its share of the rows, so every row
+        # read up to source_bytes has been fitted exactly once
+        base = rounds if new is not None else CLF_ROUNDS
+        extra = max(1, round(base * len(holdout) / (len(fit_part) + len(holdout))))
+        clf, reg = fit_models(*encode(holdout, encoders, feature_order), len(encoders["exit_reason"]),
+                              init_models=(clf, reg), clf_rounds=extra, reg_rounds=extra)
+        fit_rows = pd.concat([fit_rows, holdout])
+        metadata["holdout_rounds"] = extra
+    data_hash = _data_hash(fit_rows, feature_order)
+    if activate and not passed:
+        log(f"New bundle does not beat {parent} on the {held['rows']}-row holdout "
+            f"(logloss {held.get('classifier_logloss', '-')} vs {prev.get('classifier_logloss', '-')}, "
+            f"mae {held.get('regressor_mae', '-')} vs {prev.get('regressor_mae', '-')}); ACTIVE left at {parent}.")
+        activate = False
+    metadata["beat_parent"] = passed
+    metadata["activated"] = activate
+
+    extras = {}
+    if windows > 0:
+        if all_rows is None:
+            all_rows = _load_rows(ml_log, 0, feature_store, log)[0]
+        log(f"Walk-forward: {windows} window(s) over {len(all_rows)} rows…")
+        wf = walk_forward(all_rows, encoders, feature_order, windows, workers, log=log)
+        if wf:
+            extras[WALK_FORWARD_FILE] = json.dumps({"windows": wf}, indent=2)
+            last = wf[-1]
+            metadata["walk_forward"] = {"windows": len(wf), "file": WALK_FORWARD_FILE,
+                                        "last_window_accuracy": last.get("classifier_accuracy"),
+                                        "last_window_mae": last.get("regressor_mae")}
+
+    metadata = {
+        "version": f"{trained_at:%Y%m%d-%H%M%S}-{data_hash[:6]}",
+        "trained_at": trained_at.isoformat(timespec="seconds"),
+        "source": ml_log,
+        # the next incremental run reads the log from here
+        "source_bytes": source_bytes,
+        "feature_store": feature_store,
+        "data_sha1": data_hash,
+        **metadata,
+        "libs": _libs(),
+    }
+    path = save_bundle(clf, reg, encoders=encoders, feature_order=feature_order, metadata=metadata,
+                       model_dir=model_dir, activate=activate, extras=extras)
+    metadata["path"] = path
+    return metadata
@@ -0,0 +1,207 @@
+# ml/tree_inference.py
+# Pure-NumPy inference for the saved tree ensembles (no xgboost / lightgbm import).
+#
+# Both model files are compiled into one flat node table per model:
+#   feature, threshold, children (right, left), default_left, missing type, leaf value
+# Leaves point to themselves, so a batch is evaluated by stepping every (row, tree) pair one
+# level per iteration for max-depth iterations; each step is a handful of NumPy gathers.
+#
+# Split semantics follow the libraries:
+#   XGBoost : go left if x < threshold (float32), NaN -> default_left
+#   LightGBM: go left if x <= threshold (float64), NaN/zero handling by decision_type bits
+# Unsupported models (categorical splits, dart, other objectives) raise NotImplementedError,
+# so callers can fall back to the native libraries.
+
+import json
+import numpy as np
+
+_MISSING_NONE, _MISSING_ZERO, _MISSING_NAN = 0, 1, 2
+_ZERO_THRESHOLD = 1e-35   # LightGBM kZeroThreshold
+
+
+class _Forest:
+    """
+    Flat node table for many trees; leaves(X) returns the leaf slot per (row, tree).
+    Nodes are addressed by slot = 2 * node and every per-node array is stored twice, so a
+    step is children[slot + go_left] with no extra multiply (numpy call overhead dominates
+    single-row scoring).
+    """
+
+    def __init__(self, nodes: dict, roots, dtype):
+        twice = lambda a, t: np.repeat(np.asarray(a, dtype=t), 2)
+        self.dtype = dtype
+        self.feature = twice(nodes["feature"], np.intp)
+        self.threshold = twice(nodes["threshold"], dtype)
+        self.children = 2 * np.column_stack([nodes["right"], nodes["left"]]).astype(np.intp).ravel()
+        self.default_left = twice(nodes["default_left"], bool)
+        self.missing = twice(nodes["missing"], np.int8)
+        self.value = twice(nodes["value"], np.float64)
+        self.roots = 2 * np.asarray(roots, dtype=np.intp)
+        self.depth = self._max_depth()
+        self._zero_missing = bool((self.missing == _MISSING_ZERO).any())
+
+    def _max_depth(self) -> int:
+        """Steps from the roots to the deepest leaf (leaves are the slots that point to themselves)."""
+        internal = lambda sl: sl[self.children[sl] != sl]
+        depth, slot = 0, internal(self.roots)
+        while len(slot):
+            depth += 1
+            slot = internal(np.concatenate([self.children[slot], self.children[slot + 1]]))
+        return depth
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=self.dtype)
+        feature, threshold, children = self.feature, self.threshold, self.children
+        exact = self._zero_missing or np.isnan(X).any()
+        if X.shape[0] == 1 and not exact:
+            # single candidate: 1-D gathers only
+            xr, slot = X[0], self.roots
+            for _ in range(self.depth):
+                slot = children[slot + (xr[feature[slot]] < threshold[slot])]
+            return slot[None, :]
+        rows = np.arange(X.shape[0])[:, None]
+        slot = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+        for _ in range(self.depth):
+            x = X[rows, feature[slot]]
+            go_left = x < threshold[slot]
+            if exact:
+                go_left = self._missing_rule(slot, x, go_left)
+            slot = children[slot + go_left]
+        return slot
+
+    def _missing_rule(self, slot, x, go_left):
+        missing = self.missing[slot]
+        isnan = np.isnan(x)
+        # LightGBM compares NaN as 0 unless NaN is the missing marker
+        as_zero = isnan & (missing != _MISSING_NAN)
+        if as_zero.any():
+            x = np.where(as_zero, 0.0, x)
+            go_left = np.where(as_zero, x < self.threshold[slot], go_left)
+        use_default = ((missing == _MISSING_NAN) & isnan) | ((missing == _MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD))
+        return np.where(use_default, self.default_left[slot], go_left)
+
+
+def _leaf_node(nodes, value):
+    i = len(nodes["feature"])
+    nodes["feature"].append(0)
+    nodes["threshold"].append(np.inf)
+    nodes["left"].append(i)
+    nodes["right"].append(i)
+    nodes["default_left"].append(True)
+    nodes["missing"].append(_MISSING_NONE)
+    nodes["value"].append(value)
+    return i
+
+
+def _empty_nodes():
+    return {k: [] for k in ("feature", "threshold", "left", "right", "default_left", "missing", "value")}
+
+
+class XGBTreeClassifier:
+    """predict_proba() for an XGBoost multi:softprob / binary:logistic model saved as JSON."""
+
+    def __init__(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            learner = json.load(f)["learner"]
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise NotImplementedError(f"xgboost booster {booster['name']} not supported")
+        self.objective = learner["objective"]["name"]
+        if self.objective not in ("multi:softprob", "multi:softmax", "binary:logistic"):
+            raise NotImplementedError(f"xgboost objective {self.objective} not supported")
+        params = learner["learner_model_param"]
+        self.n_classes = max(1, int(params.get("num_class", "0") or 0))
+        base = np.atleast_1d(np.asarray(json.loads(params["base_score"].replace("E", "e")), dtype=np.float64))
+        if self.objective == "binary:logistic":
+            p = float(base[0])
+            base = np.array([np.log(p / (1 - p))]) if 0 < p < 1 else np.zeros(1)
+        n_out = self.n_classes if self.objective.startswith("multi") else 1
+        self.base_margin = np.broadcast_to(base, (n_out,)).astype(np.float64)
+
+        nodes, roots = _empty_nodes(), []
+        trees = booster["model"]["trees"]
+        for tree in trees:
+            if any(int(t) != 0 for t in tree.get("split_type", [])):
+                raise NotImplementedError("categorical splits not supported")
+            offset = len(nodes["feature"])
+            left, right = tree["left_children"], tree["right_children"]
+            for i in range(len(left)):
+                if left[i] == -1:
+                    _leaf_node(nodes, float(tree["split_conditions"][i]))
+                    continue
+                nodes["feature"].append(int(tree["split_indices"][i]))
+                nodes["threshold"].append(float(np.float32(tree["split_conditions"][i])))
+                nodes["left"].append(offset + left[i])
+                nodes["right"].append(offset + right[i])
+                nodes["default_left"].append(bool(tree["default_left"][i]))
+                nodes["missing"].append(_MISSING_NAN)
+                nodes["value"].append(0.0)
+            roots.append(offset)
+        self.forest = _Forest(nodes, roots, np.float32)
+        tree_info = np.asarray(booster["model"]["tree_info"], dtype=np.intp)
+        self.tree_class = np.zeros((len(trees), n_out))
+        self.tree_class[np.arange(len(trees)), tree_info] = 1.0
+
+    def predict_margin(self, X) -> np.ndarray:
+        leaves = self.forest.leaves(X)
+        return self.forest.value[leaves] @ self.tree_class + self.base_margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        margin = self.predict_margin(X)
+        if self.objective == "binary:logistic":
+            p = 1.0 / (1.0 + np.exp(-margin[:, 0]))
+            return np.column_stack([1 - p, p])
+        e = np.exp(margin - margin.max(axis=1, keepdims=True))
+        return e / e.sum(axis=1, keepdims=True)
+
+
+class LGBTreeRegressor:
+    """predict() for a LightGBM regression model saved as text (Booster.save_model)."""
+
+    def __init__(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        header, _, body = text.partition("\nTree=")
+        head = dict(line.split("=", 1) for line in header.splitlines() if "=" in line)
+        objective = head.get("objective", "").split(" ")[0]
+        if not objective.startswith("regression") or int(head.get("num_class", "1")) != 1:
+            raise NotImplementedError(f"lightgbm objective {objective} not supported")
+        body = body.split("\nend of trees", 1)[0]
+
+        nodes, roots = _empty_nodes(), []
+        for block in body.split("\nTree="):
+            t = dict(line.split("=", 1) for line in block.splitlines() if "=" in line)
+            if int(t.get("num_cat", "0")) > 0:
+                raise NotImplementedError("categorical splits not supported")
+            num_leaves = int(t["num_leaves"])
+            leaf_value = [float(v) for v in t["leaf_value"].split()]
+            offset = len(nodes["feature"])
+            if num_leaves == 1:
+                roots.append(_leaf_node(nodes, leaf_value[0]))
+                continue
+            leaf_base = offset + num_leaves - 1
+            feature = t["split_feature"].split()
+            threshold = t["threshold"].split()
+            decision = t["decision_type"].split()
+            left, right = t["left_child"].split(), t["right_child"].split()
+
+            def child(c):
+                c = int(c)
+                return offset + c if c >= 0 else leaf_base + ~c
+            for i in range(num_leaves - 1):
+                d = int(decision[i])
+                nodes["feature"].append(int(feature[i]))
+                # x <= t  <=>  x < nextafter(t, +inf), so one comparison serves both libraries
+                nodes["threshold"].append(np.nextafter(float(threshold[i]), np.inf))
+                nodes["left"].append(child(left[i]))
+                nodes["right"].append(child(right[i]))
+                nodes["default_left"].append(bool(d & 2))
+                nodes["missing"].append((d >> 2) & 3)
+                nodes["value"].append(0.0)
+            for v in leaf_value:
+                _leaf_node(nodes, v)
+            roots.append(offset)
+        self.forest = _Forest(nodes, roots, np.float64)
+
+    def predict(self, X) -> np.ndarray:
+        return self.forest.value[self.forest.leaves(X)].sum(axis=1)
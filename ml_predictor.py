@@ -1,64 +1,74 @@
-import pandas as pd
-import numpy as np
-import os
+# Everything comes from the model registry (ml/registry.py): the ACTIVE bundle in MODEL_DIR
+# (models, encoders and the feature order written by retrain_ml.py). No training data is read
+# at startup. A newly activated bundle is loaded in the background and swapped in by the bot
+# between cycles (swap_model()), so always go through `registry.current`, never cache it.
+#
+# Importing this module is cheap: the registry (numpy, the bundle files) is created and the
+# ACTIVE bundle loaded on first use — the first prediction, start_model_watcher() or
+# engine.pipeline.prewarm() — once, under a lock.
+import threading
 
-try:
-    import xgboost as xgb
-    import lightgbm as lgb
-    from sklearn.preprocessing import LabelEncoder
+_registry = None
+_registry_lock = threading.Lock()
 
-    clf = xgb.XGBClassifier()
-    clf.load_model('xgb_classifier.model')
-    reg = lgb.Booster(model_file='lgb_regressor.txt')
 
-    # === Encoders
-    symbol_encoder = LabelEncoder()
-    side_encoder = LabelEncoder()
-    exit_encoder = LabelEncoder()
+def get_registry():
+    """The process-wide ModelRegistry, with the ACTIVE bundle loaded on first call."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from ml.registry import ModelRegistry
+            registry = ModelRegistry()
+            try:
+                registry.load_active()
+            except Exception as e:
+                print(f"⚠️ ML model not available — running in fallback mode: {e}")
+            _registry = registry
+    return _registry
 
-    def prepare_encoders(data_path='ml_log.csv'):
-        data = pd.read_csv(data_path, on_bad_lines='skip')
-        symbol_encoder.fit(data['symbol'])
-        side_encoder.fit(data['side'])
-        exit_encoder.fit(data['exit_reason'])
 
-    prepare_encoders()
+def __getattr__(name):
+    # `ml_predictor.registry` still works (loads on first access)
+    if name == "registry":
+        return get_registry()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    def predict_trade(signal_data):
-        features = {
-            'symbol_enc': symbol_encoder.transform([signal_data['symbol']])[0],
-            'side_enc': side_encoder.transform([signal_data['side']])[0],
-            'entry_price': signal_data['entry_price'],
-            'atr': signal_data['atr'],
-            'trend_strength': signal_data['trend_strength'],
-            'volatility': signal_data['volatility'],
-            'duration_sec': signal_data['duration_sec'],
-            'adx': signal_data['adx'],
-            'rsi': signal_data['rsi'],
-            'macd': signal_data['macd'],
-            'ema_ratio': signal_data['ema_ratio']
-        }
 
-        df = pd.DataFrame([features])
-        pred_class_probs = clf.predict_proba(df)[0]
-        pred_class_idx = np.argmax(pred_class_probs)
-        pred_class_label = exit_encoder.inverse_transform([pred_class_idx])[0]
-        pred_class_confidence = pred_class_probs[pred_class_idx]
-        pred_pnl = reg.predict(df)[0]
+def _fallback():
+    # Safe defaults while no model is loaded
+    return {
+        'exit_reason': 'TP1-Partial',
+        'confidence': 1.0,
+        'expected_pnl': 0.5
+    }
 
-        return {
-            'exit_reason': pred_class_label,
-            'confidence': round(pred_class_confidence, 6),
-            'expected_pnl': round(pred_pnl, 6)
-        }
 
-except Exception as e:
-    print(f"⚠️ ML model not available — running in fallback mode: {e}")
+def predict_trades(batch):
+    """
+    Score many candidates with one classifier and one regressor call (see LoadedModel.predict_trades).
+    Each result carries the 'model_version' that produced it.
+    """
+    model = get_registry().current
+    if model is None:
+        return [_fallback() for _ in batch]
+    return model.predict_trades(batch)
 
-    def predict_trade(signal_data):
-        # Return safe defaults if model is not loaded
-        return {
-            'exit_reason': 'TP1-Partial',
-            'confidence': 1.0,
-            'expected_pnl': 0.5
-        }
+
+def predict_trade(signal_data):
+    result = predict_trades([signal_data])[0]
+    if 'error' in result:
+        raise ValueError(result['error'])
+    return result
+
+
+def start_model_watcher():
+    """
+    Load the ACTIVE bundle and poll MODEL_DIR/ACTIVE (MODEL_POLL_SECS) on a background thread,
+    so startup doesn't wait for the model; a prediction made before it is ready waits for it.
+    """
+    threading.Thread(target=lambda: get_registry().start(), name="model-load", daemon=True).start()
+
+
+def swap_model():
+    """Install a pre-loaded new version, if any. Returns (old_version, new_version) or None."""
+    return _registry.swap() if _registry is not None else None
@@ -1,55 +1,53 @@
-import pandas as pd
-import numpy as np
-import xgboost as xgb
-import lightgbm as lgb
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-
-# Load data
-df = pd.read_csv('ml_log.csv')
-
-# Basic columns always required
-required_cols = ['exit_reason', 'pnl_pct', 'atr', 'trend_strength', 'volatility']
-
-# Optional new features
-optional_cols = ['adx', 'rsi', 'macd', 'ema_ratio']
-
-# Filter available optional features
-available_optional_cols = [col for col in optional_cols if col in df.columns]
-
-# Drop rows with missing basic columns
-df = df.dropna(subset=required_cols)
-
-# Balance dataset
-min_size = df['exit_reason'].value_counts().min()
-balanced_df = df.groupby('exit_reason').apply(lambda x: x.sample(min_size, random_state=42)).reset_index(drop=True)
-
-# Encode categorical
-le_exit = LabelEncoder()
-balanced_df['exit_reason_enc'] = le_exit.fit_transform(balanced_df['exit_reason'])
-balanced_df['symbol_enc'] = LabelEncoder().fit_transform(balanced_df['symbol'])
-balanced_df['side_enc'] = LabelEncoder().fit_transform(balanced_df['side'])
-
-# Final feature list
-feature_cols = ['symbol_enc', 'side_enc', 'entry_price', 'atr', 'trend_strength', 'volatility', 'duration_sec'] + available_optional_cols
-
-# Prepare data
-X = balanced_df[feature_cols]
-y_class = balanced_df['exit_reason_enc']
-y_reg = balanced_df['pnl_pct']
-
-# Train/test split
-X_train_c, X_test_c, y_train_c, y_test_c = train_test_split(X, y_class, test_size=0.2, random_state=42)
-X_train_r, X_test_r, y_train_r, y_test_r = train_test_split(X, y_reg, test_size=0.2, random_state=42)
-
-# Train XGBoost classifier
-clf = xgb.XGBClassifier(objective='multi:softprob', eval_metric='mlogloss', use_label_encoder=False)
-clf.fit(X_train_c, y_train_c)
-clf.save_model('xgb_classifier.model')
-
-# Train LightGBM regressor
-reg = lgb.LGBMRegressor(objective='regression')
-reg.fit(X_train_r, y_train_r)
-reg.booster_.save_model('lgb_regressor.txt')
-
-print("✅ Retrained models saved!")
+# retrain_ml.py
+# Train a new model bundle from ml_log.csv and make it ACTIVE if it beats the current one on the
+# most recent rows (a running bot swaps it in between cycles). Pipeline in ml/training.py:
+#
+#   python retrain_ml.py                       # incremental when there are enough new rows, else full
+#   python retrain_ml.py --full                # always train from scratch
+#   python retrain_ml.py --full --windows 5    # + 5 walk-forward windows in parallel
+#   python retrain_ml.py --incremental --rounds 30
+#   python retrain_ml.py --feature-store 5m    # indicator features from the feature store
+import argparse
+import os
+from ml.bundle import CLASSIFIER_FILE, REGRESSOR_FILE
+from ml.training import retrain
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Retrain the exit-reason classifier and PnL regressor.")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--full", action="store_true", help="train from scratch on the whole log")
+    mode.add_argument("--incremental", action="store_true",
+                      help="only continue the active bundle on rows added since it was trained")
+    mode.add_argument("--auto", action="store_true",
+                      help="incremental when every exit class has enough new rows, else full (default)")
+    ap.add_argument("--ml-log", default="ml_log.csv")
+    ap.add_argument("--rounds", type=int, default=50, help="trees added per model by an incremental run")
+    ap.add_argument("--windows", type=int, default=0, help="walk-forward validation windows (0 = none)")
+    ap.add_argument("--workers", type=int, default=0, help="walk-forward processes (default: all cores)")
+    ap.add_argument("--feature-store", metavar="TIMEFRAME",
+                    help="join indicator features from the feature store by entry time (scripts/build_feature_store.py)")
+    ap.add_argument("--no-activate", action="store_true", help="write the bundle but leave ACTIVE as is")
+    args = ap.parse_args()
+
+    meta = retrain(args.ml_log, mode="incremental" if args.incremental else "full" if args.full else "auto",
+                   windows=args.windows, workers=args.workers or None, rounds=args.rounds,
+                   activate=not args.no_activate, feature_store=args.feature_store)
+    if "path" not in meta:
+        return
+    detail = f"+{meta['rows_new']} rows on {meta['parent']}" if meta["mode"] == "incremental" else f"{meta['rows_total']} rows"
+    print(f"✅ Retrained models saved! Bundle {meta['version']} ({meta['mode']}, {detail}) -> {meta['path']}"
+          f"{' (active)' if meta['activated'] else ''} | holdout acc {meta.get('classifier_accuracy', '-')} "
+          f"| mae {meta.get('regressor_mae', '-')}")
+    if not meta["activated"]:
+        return
+
+    # Legacy files for the standalone TitanBot_ML_* scripts (the bot itself only reads the bundle)
+    import xgboost as xgb
+    import lightgbm as lgb
+    xgb.Booster(model_file=os.path.join(meta["path"], CLASSIFIER_FILE)).save_model('xgb_classifier.model')
+    lgb.Booster(model_file=os.path.join(meta["path"], REGRESSOR_FILE)).save_model('lgb_regressor.txt')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,14 @@
 # scripts/backfill_ml_log.py
 # Fixes: Adds project-root to sys.path; backfills ml_log.csv from journal.csv (closed trades only).
+# --feature-store 5m takes adx/rsi/macd/ema_ratio from the feature store (ml/feature_store.py) at
+# each trade's entry time instead of the journal's (often empty -> 0) values.
+# --enrich 5m [--history-dir DIR] recomputes every entry-time input (atr, trend_strength,
+# volatility, adx, rsi, macd, ema_ratio) from candle history, one history load per symbol, exactly
+# as engine.pipeline built them live; all new rows are appended in one write.
+# --fix-zero --enrich 5m rewrites the existing ml_log rows logged with trend_strength and volatility
+# both 0 (live rows from before the bot logged them) with the values recomputed from history; other
+# fields are written back unchanged. Run it with the bot stopped, then do a full retrain.
+import argparse
 import os
 import sys
 import csv
@@ -13,17 +22,13 @@ if PROJ not in sys.path:
     sys.path.insert(0, PROJ)
 
 from config import JOURNAL_PATH, ML_LOG_FILE  # now resolves
+from utils.ml_logger import HEADERS as ML_HEADERS
+from logger.schema import read_log
 
-ML_HEADERS = [
-    "timestamp","id","symbol","side","entry_price","exit_price","exit_reason",
-    "sl","tp1","tp2","tp3","atr","trend_strength","volatility","adx","rsi",
-    "macd","ema_ratio","pnl_pct","raw_profit","duration_sec","strategy","leverage","is_partial"
-]
-
-def _read_csv(path):
+def _read_csv(log, path, columns=None):
     if not os.path.exists(path) or os.path.getsize(path) == 0:
         return None
-    return pd.read_csv(path, encoding="utf-8")
+    return read_log(log, path, columns)
 
 def _ensure_ml_headers(path):
     new_file = not os.path.exists(path)
@@ -32,18 +37,156 @@ def _ensure_ml_headers(path):
         with open(path, "w", newline="", encoding="utf-8") as f:
             csv.writer(f).writerow(ML_HEADERS)
 
+def _history_for(symbol, interval, entry_ms, history_dir, limit):
+    """Candles covering every entry of one symbol: <history_dir>/<SYMBOL>_<interval>.csv or fetched."""
+    if history_dir:
+        path = os.path.join(history_dir, f"{symbol}_{interval}.csv")
+        if not os.path.exists(path):
+            return None
+        from engine.backtest import load_history
+        return load_history(path)
+    from data.backfill import fetch_candle_history
+    from engine.scheduler import timeframe_seconds
+    step_ms = timeframe_seconds(interval) * 1000
+    return fetch_candle_history(symbol, interval, int(min(entry_ms)) - (limit + 1) * step_ms, int(max(entry_ms)) + 1)
+
+
+def _enrich_task(task):
+    """(row positions, feature dicts or None) for one symbol's trades."""
+    symbol, rows, entry_ms, interval, history_dir, limit = task
+    from engine.pipeline import entry_features_from_history
+    try:
+        hist = _history_for(symbol, interval, entry_ms, history_dir, limit)
+    except Exception as e:
+        print(f"⚠️ History fetch failed for {symbol}: {e}")
+        hist = None
+    if hist is None or hist.empty:
+        return rows, [None] * len(rows)
+    return rows, entry_features_from_history(symbol, hist, entry_ms, interval=interval, limit=limit)
+
+
+def enrich(df, interval, history_dir=None, workers=1, limit=100):
+    """
+    Replace the indicator columns of df (journal rows) with the entry-time values recomputed from
+    candle history, one history load per symbol. Only trades with a known entry time (trade_log
+    open row, or a journal duration_sec) are enriched; returns (df, enriched row count).
+    """
+    import numpy as np
+    from ml.feature_store import entry_time_ms, trade_log_entry_times
+    times = trade_log_entry_times()
+    entry_ms = entry_time_ms(df, times)
+    known = (df["trade_id"].astype(str).isin(times.keys()).to_numpy()
+             | (pd.to_numeric(df["duration_sec"], errors="coerce").fillna(0).to_numpy() > 0)) & ~np.isnan(entry_ms)
+
+    pos = np.flatnonzero(known)
+    tasks = [(str(sym), idx.tolist(), entry_ms[idx].tolist(), interval, history_dir, limit)
+             for sym, idx in pd.Series(pos).groupby(df["symbol"].to_numpy()[pos]) if len(idx)]
+    if workers > 1 and len(tasks) > 1:
+        import multiprocessing as mp
+        with mp.get_context("spawn").Pool(processes=min(workers, len(tasks))) as pool:
+            results = pool.map(_enrich_task, tasks)
+    else:
+        results = [_enrich_task(t) for t in tasks]
+
+    hit, feats = [], []
+    for rows, out in results:
+        for r, f in zip(rows, out):
+            if f is not None:
+                hit.append(r)
+                feats.append(f)
+    if hit:
+        fdf = pd.DataFrame(feats)
+        for col in fdf.columns:
+            if col not in df.columns:
+                df[col] = np.nan
+            vals = df[col].to_numpy(dtype=object)
+            vals[hit] = fdf[col].to_numpy()
+            df[col] = vals
+    return df, len(hit)
+
+
+def _is_zero(value) -> bool:
+    try:
+        return float(value or 0) == 0
+    except ValueError:
+        return False
+
+
+def fix_zero_features(path, interval, history_dir=None, workers=1):
+    """
+    Recompute trend_strength/volatility of the ml_log rows where both are 0 and rewrite the file
+    (tmp + os.replace; every other field kept as written). Returns (zero rows, rows fixed).
+    """
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields, rows = reader.fieldnames, list(reader)
+    zero = [i for i, r in enumerate(rows) if _is_zero(r.get("trend_strength")) and _is_zero(r.get("volatility"))]
+    if not zero:
+        return 0, 0
+    sub = pd.DataFrame({"timestamp": [rows[i]["timestamp"] for i in zero],
+                        "trade_id": [rows[i]["id"] for i in zero],
+                        "symbol": [rows[i]["symbol"] for i in zero],
+                        "duration_sec": [rows[i].get("duration_sec") or 0 for i in zero],
+                        "trend_strength": 0.0, "volatility": 0.0})
+    sub, _ = enrich(sub, interval, history_dir=history_dir, workers=workers)
+    fixed = 0
+    for i, ts, vol in zip(zero, _num(sub["trend_strength"], 0.0), _num(sub["volatility"], 0.0)):
+        if ts or vol:
+            rows[i]["trend_strength"], rows[i]["volatility"] = round(float(ts), 5), round(float(vol), 5)
+            fixed += 1
+    if fixed:
+        tmp = path + ".tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=fields)
+            w.writeheader()
+            w.writerows(rows)
+        os.replace(tmp, path)
+    return len(zero), fixed
+
+
+def _num(s, default):
+    return pd.to_numeric(s, errors="coerce").fillna(default)
+
+
+def _text(s):
+    # label columns are categorical: leave the categories before filling blanks
+    return s.astype(object).fillna("")
+
+
 def main():
-    jdf = _read_csv(JOURNAL_PATH)
+    ap = argparse.ArgumentParser(description="Backfill ml_log.csv from closed journal trades.")
+    ap.add_argument("--feature-store", metavar="TIMEFRAME", help="fill indicator features from the feature store")
+    ap.add_argument("--enrich", metavar="TIMEFRAME",
+                    help="recompute entry-time features (atr, trend_strength, volatility, adx, ...) from candle history")
+    ap.add_argument("--history-dir", help="with --enrich: read <SYMBOL>_<TIMEFRAME>.csv from here instead of fetching")
+    ap.add_argument("--workers", type=int, default=1, help="with --enrich: symbols processed in parallel")
+    ap.add_argument("--fix-zero", action="store_true",
+                    help="with --enrich: rewrite existing rows whose trend_strength and volatility are 0, then exit")
+    args = ap.parse_args()
+
+    if args.fix_zero:
+        if not args.enrich:
+            ap.error("--fix-zero needs --enrich TIMEFRAME (the candles to recompute from)")
+        if not os.path.exists(ML_LOG_FILE) or os.path.getsize(ML_LOG_FILE) == 0:
+            print(f"No {ML_LOG_FILE} to fix.")
+            return
+        n_zero, n_fixed = fix_zero_features(ML_LOG_FILE, args.enrich, history_dir=args.history_dir, workers=args.workers)
+        print(f"Fixed {n_fixed}/{n_zero} zero-feature rows in {ML_LOG_FILE}"
+              f"{'' if n_fixed == n_zero else ' (the rest: no entry time or no history; left as is)'}."
+              f"{' Run a full retrain (retrain_ml.py --full).' if n_fixed else ''}")
+        return
+
+    jdf = _read_csv("journal", JOURNAL_PATH)
     if jdf is None or jdf.empty:
         print("No journal to backfill from.")
         return
     if "status" in jdf.columns:
-        jdf = jdf[jdf["status"].astype(str).str.lower() == "closed"].copy()
+        jdf = jdf[jdf["status"].str.lower() == "closed"].copy()
     if jdf.empty:
         print("No closed trades to backfill.")
         return
 
-    mdf = _read_csv(ML_LOG_FILE)
+    mdf = _read_csv("ml_log", ML_LOG_FILE, columns=["id"])
     existing_ids = set()
     if mdf is not None and not mdf.empty and "id" in mdf.columns:
         existing_ids = set(mdf["id"].dropna().astype(str))
@@ -52,57 +195,56 @@ def main():
     for col in ["atr","adx","rsi","macd","ema_ratio","strategy","duration_sec","exit_reason","entry_price","exit_price","pnl","side","symbol","trade_id"]:
         if col not in jdf.columns:
             jdf[col] = 0
+    for col in ["trend_strength", "volatility"]:
+        if col not in jdf.columns:
+            jdf[col] = 0.0
+
+    jdf["trade_id"] = jdf["trade_id"].fillna("").astype(str).str.strip()
+    jdf = jdf[(jdf["trade_id"] != "") & ~jdf["trade_id"].isin(existing_ids)]
+    jdf = jdf.drop_duplicates("trade_id").reset_index(drop=True)
+    if jdf.empty:
+        print("Backfill complete. Added 0 missing ML rows.")
+        return
+
+    if args.feature_store:
+        from ml.feature_store import join_features, trade_log_entry_times
+        jdf = join_features(jdf, args.feature_store, entry_times=trade_log_entry_times())
+        print(f"Feature store ({args.feature_store}): {int(jdf['_feature_bar_ms'].notna().sum())}/{len(jdf)} trades matched.")
+    if args.enrich:
+        jdf, n = enrich(jdf, args.enrich, history_dir=args.history_dir, workers=args.workers)
+        print(f"Enriched from {args.enrich} candles: {n}/{len(jdf)} trades"
+              f"{'' if n == len(jdf) else ' (the rest: no entry time or no history; logged values kept)'}.")
+
+    exit_reason = _text(jdf["exit_reason"]).astype(str)
+    out = pd.DataFrame({
+        # close time from the journal, so entry time = timestamp - duration_sec stays joinable
+        "timestamp": jdf["timestamp"].fillna(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                     if "timestamp" in jdf.columns else datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "id": jdf["trade_id"],
+        "symbol": _text(jdf["symbol"]),
+        "side": _text(jdf["side"]),
+        "entry_price": _num(jdf["entry_price"], 0.0),
+        "exit_price": _num(jdf["exit_price"], 0.0),
+        "exit_reason": exit_reason,
+        "sl": "", "tp1": "", "tp2": "", "tp3": "",
+        "atr": _num(jdf["atr"], 0.0),
+        "trend_strength": _num(jdf["trend_strength"], 0.0),
+        "volatility": _num(jdf["volatility"], 0.0),
+        "adx": _num(jdf["adx"], 0.0),
+        "rsi": _num(jdf["rsi"], 0.0),
+        "macd": _num(jdf["macd"], 0.0),
+        "ema_ratio": _num(jdf["ema_ratio"], 1.0).replace(0, 1.0),
+        "pnl_pct": _num(jdf["pnl"], 0.0),           # journal PnL already in percent
+        "raw_profit": 0.0,
+        "duration_sec": _num(jdf["duration_sec"], 0).astype(int),
+        "strategy": _text(jdf["strategy"]),
+        "leverage": 1,
+        "is_partial": exit_reason.str.lower().str.contains("partial").astype(int),
+    }, columns=ML_HEADERS)
 
     _ensure_ml_headers(ML_LOG_FILE)
-    added = 0
-
-    with open(ML_LOG_FILE, "a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=ML_HEADERS, extrasaction="ignore")
-
-        for _, r in jdf.iterrows():
-            tid = str(r.get("trade_id","")).strip()
-            if not tid or tid in existing_ids:
-                continue
-
-            exit_reason = str(r.get("exit_reason",""))
-            is_partial = 1 if "partial" in exit_reason.lower() else 0
-            try:
-                entry = float(r.get("entry_price", 0) or 0)
-                exitp = float(r.get("exit_price", 0) or 0)
-                pnl   = float(r.get("pnl", 0) or 0)
-            except Exception:
-                entry, exitp, pnl = 0.0, 0.0, 0.0
-
-            row = {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "id": tid,
-                "symbol": r.get("symbol",""),
-                "side": r.get("side",""),
-                "entry_price": entry,
-                "exit_price": exitp,
-                "exit_reason": exit_reason,
-                "sl": "",
-                "tp1": "",
-                "tp2": "",
-                "tp3": "",
-                "atr": float(r.get("atr",0) or 0),
-                "trend_strength": 0.0,
-                "volatility": 0.0,
-                "adx": float(r.get("adx",0) or 0),
-                "rsi": float(r.get("rsi",0) or 0),
-                "macd": float(r.get("macd",0) or 0),
-                "ema_ratio": float(r.get("ema_ratio",1) or 1),
-                "pnl_pct": pnl,           # journal PnL already in percent
-                "raw_profit": 0.0,
-                "duration_sec": int(r.get("duration_sec",0) or 0),
-                "strategy": r.get("strategy",""),
-                "leverage": 1,
-                "is_partial": is_partial
-            }
-            w.writerow(row)
-            added += 1
-
-    print(f"Backfill complete. Added {added} missing ML rows.")
+    out.to_csv(ML_LOG_FILE, mode="a", header=False, index=False, encoding="utf-8")
+    print(f"Backfill complete. Added {len(out)} missing ML rows.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,52 @@
+# scripts/backtest.py
+# Backtest the live signal + TP/SL/trailing rules over history for one symbol.
+#
+#   python scripts/backtest.py BTCUSDT --days 365 --save-history data/BTCUSDT_5m.csv
+#   python scripts/backtest.py BTCUSDT --history data/BTCUSDT_5m.csv --out backtest_journal.csv
+import argparse
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+from config import TIMEFRAME
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Vectorized backtest of the paper-trading rules.")
+    ap.add_argument("symbol")
+    ap.add_argument("--interval", default=TIMEFRAME)
+    ap.add_argument("--history", help="OHLCV CSV (timestamp in ms); fetched from Binance when omitted")
+    ap.add_argument("--days", type=float, default=365, help="history to fetch when --history is not given")
+    ap.add_argument("--save-history", help="write the fetched history here for later runs")
+    ap.add_argument("--out", default="backtest_journal.csv", help="journal-schema CSV of closed trades")
+    ap.add_argument("--seed", type=int, default=0, help="trade id seed")
+    args = ap.parse_args()
+
+    from engine.backtest import load_history, run_backtest
+    if args.history:
+        df = load_history(args.history)
+    else:
+        from data.backfill import fetch_candle_history
+        end_ms = int(time.time() * 1000)
+        t0 = time.perf_counter()
+        df = fetch_candle_history(args.symbol, args.interval, end_ms - int(args.days * 86_400_000), end_ms)
+        print(f"Fetched {len(df)} {args.interval} bars in {time.perf_counter() - t0:.1f}s")
+        if args.save_history:
+            df.to_csv(args.save_history, index=False)
+    if df.empty:
+        print("No history to backtest.")
+        return
+
+    summary = run_backtest(df, args.symbol, args.interval, journal_path=args.out, seed=args.seed)
+    print(json.dumps(summary, indent=2))
+    print(f"Journal: {os.path.abspath(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# scripts/bench_ml.py
+# Per-candidate ML scoring cost: one-row DataFrame calls (the old predict_trade path)
+# vs predict_trades() batches, and the NumPy tree backend vs xgboost/lightgbm
+# (output parity + single-candidate latency). Run from the directory holding the models.
+#
+#   python scripts/bench_ml.py --sizes 1,3,10,50,200
+import argparse
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+
+def _candidates(ml, n, rng):
+    symbols = list(ml.symbol_codes)
+    sides = list(ml.side_codes)
+    return [{
+        "symbol": rng.choice(symbols), "side": rng.choice(sides),
+        "entry_price": rng.uniform(1, 60000), "atr": rng.uniform(0.01, 200),
+        "trend_strength": rng.uniform(0.0008, 0.01), "volatility": rng.uniform(0.0009, 0.02),
+        "duration_sec": 0, "adx": rng.uniform(5, 60), "rsi": rng.uniform(10, 90),
+        "macd": rng.uniform(-5, 5), "ema_ratio": rng.uniform(0.98, 1.02),
+    } for _ in range(n)]
+
+
+def _one_row(ml, c):
+    import numpy as np
+    import pandas as pd
+    features = {
+        "symbol_enc": ml.symbol_codes[c["symbol"]],
+        "side_enc": ml.side_codes[c["side"]],
+        **{k: c[k] for k in ml.feature_order[2:]},
+    }
+    df = pd.DataFrame([features])
+    probs = ml.clf.predict_proba(df)[0]
+    return int(np.argmax(probs)), float(ml.reg.predict(df)[0])
+
+
+def _per_call(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _compare_backends(ml, rng, n=2000, repeat=500):
+    import numpy as np
+    from ml.bundle import load_bundle
+    native = load_bundle(ml.bundle["path"], "native")
+    fast = load_bundle(ml.bundle["path"], "numpy")
+    X = np.asarray([ml.encode(c) for c in _candidates(ml, n, rng)], dtype=np.float64)
+    dp = np.abs(native["clf"].predict_proba(X) - fast["clf"].predict_proba(X)).max()
+    dr = np.abs(native["reg"].predict(X) - fast["reg"].predict(X)).max()
+    print(f"parity on {n} rows: max |proba diff| {dp:.2e}, max |pnl diff| {dr:.2e}")
+    x1 = X[:1]
+    for name, b in (("native", native), ("numpy", fast)):
+        secs = _per_call(lambda: (b["clf"].predict_proba(x1), b["reg"].predict(x1)), repeat)
+        print(f"{name:>7} single candidate: {secs * 1e6:.1f} us (classifier + regressor)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark single vs batched ML scoring.")
+    ap.add_argument("--sizes", default="1,3,10,50,200", help="candidates per cycle")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--backends", action="store_true", help="compare the numpy and native backends")
+    args = ap.parse_args()
+
+    import ml_predictor
+    ml = ml_predictor.registry.current
+    if ml is None:
+        print("ML models not loaded (fallback mode); run from the directory with the model files.")
+        return
+
+    rng = random.Random(0)
+    print(f"backend: {ml.backend} | bundle {ml.version}")
+    if args.backends:
+        _compare_backends(ml, rng)
+    print(f"{'batch':>6} {'one-row us/cand':>16} {'batched us/cand':>16} {'speedup':>8}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        cands = _candidates(ml, n, rng)
+        # same predictions either way
+        batched = ml.predict_trades(cands)
+        for c, b in zip(cands, batched):
+            idx, pnl = _one_row(ml, c)
+            assert ml.exit_classes[idx] == b["exit_reason"] and abs(pnl - b["expected_pnl"]) < 1e-5
+        single = _per_call(lambda: [_one_row(ml, c) for c in cands], args.repeat) / n
+        batch = _per_call(lambda: ml.predict_trades(cands), args.repeat) / n
+        print(f"{n:>6} {single * 1e6:>16.1f} {batch * 1e6:>16.1f} {single / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# scripts/build_feature_store.py
+# Compute ml.feature_builder features once from candle history into the point-in-time feature
+# store (ml/feature_store.py). Rerunning after adding a feature only computes the new column, and
+# a rerun on a shorter or later window only computes the bars not stored yet (older ones are kept).
+#
+#   python scripts/build_feature_store.py --history-dir hist --interval 5m
+#   python scripts/build_feature_store.py --symbols BTCUSDT,ETHUSDT --interval 5m --days 365
+#   python retrain_ml.py --full --feature-store 5m
+import argparse
+import glob
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+from config import TIMEFRAME, SYMBOLS
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backfill the point-in-time ML feature store.")
+    ap.add_argument("--history-dir", help="<SYMBOL>_<interval>.csv files (timestamp in ms); fetched when omitted")
+    ap.add_argument("--symbols", help="comma-separated (default: every history file, else SYMBOLS)")
+    ap.add_argument("--interval", default=TIMEFRAME)
+    ap.add_argument("--days", type=float, default=365, help="history to fetch when --history-dir is not given")
+    ap.add_argument("--features", help="comma-separated subset (default: all registered features)")
+    ap.add_argument("--force", action="store_true", help="recompute columns that are already stored")
+    args = ap.parse_args()
+
+    from engine.backtest import load_history
+    from ml.feature_store import backfill_features, store_path
+
+    if args.history_dir:
+        paths = {os.path.basename(p)[:-len(f"_{args.interval}.csv")]: p
+                 for p in glob.glob(os.path.join(args.history_dir, f"*_{args.interval}.csv"))}
+        symbols = args.symbols.split(",") if args.symbols else sorted(paths)
+    else:
+        symbols = args.symbols.split(",") if args.symbols else SYMBOLS
+    features = args.features.split(",") if args.features else None
+
+    for symbol in symbols:
+        t0 = time.perf_counter()
+        if args.history_dir:
+            if symbol not in paths:
+                print(f"  {symbol}: no {symbol}_{args.interval}.csv in {args.history_dir}, skipped")
+                continue
+            df = load_history(paths[symbol])
+        else:
+            from data.backfill import fetch_candle_history
+            end_ms = int(time.time() * 1000)
+            df = fetch_candle_history(symbol, args.interval, end_ms - int(args.days * 86_400_000), end_ms)
+        if df.empty:
+            print(f"  {symbol}: no history, skipped")
+            continue
+        res = backfill_features(df, symbol, args.interval, features, force=args.force)
+        done = ", ".join(res["computed"]) or ("new bars" if res["new_bars"] else "up to date")
+        print(f"  {symbol}: {res['bars']} bars (+{res['new_bars']}) -> {store_path(symbol, args.interval)} "
+              f"({done}) in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
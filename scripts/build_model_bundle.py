@@ -0,0 +1,60 @@
+# scripts/build_model_bundle.py
+# One-off migration: package existing xgb_classifier.model / lgb_regressor.txt as a model
+# bundle (ml/bundle.py) so ml_predictor can load without reading ml_log.csv. The encoders are
+# fitted from ml_log.csv once, exactly as the old predictor did at every startup.
+# New models should come from retrain_ml.py, which writes its bundle directly.
+#
+#   python scripts/build_model_bundle.py --ml-log ml_log.csv
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+# Column order the old predictor fed the models
+LEGACY_FEATURES = ['symbol_enc', 'side_enc', 'entry_price', 'atr', 'trend_strength', 'volatility',
+                   'duration_sec', 'adx', 'rsi', 'macd', 'ema_ratio']
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Package legacy model files as a model bundle.")
+    ap.add_argument("--classifier", default="xgb_classifier.model")
+    ap.add_argument("--regressor", default="lgb_regressor.txt")
+    ap.add_argument("--ml-log", default="ml_log.csv")
+    ap.add_argument("--no-activate", action="store_true")
+    args = ap.parse_args()
+
+    import xgboost as xgb
+    import lightgbm as lgb
+    from ml.bundle import save_bundle
+    from logger.schema import read_log
+
+    data = read_log("ml_log", args.ml_log, columns=["symbol", "side", "exit_reason"], on_bad_lines='skip')
+    clf = xgb.XGBClassifier()
+    clf.load_model(args.classifier)
+    reg = lgb.Booster(model_file=args.regressor)
+
+    now = datetime.now(timezone.utc)
+    metadata = {
+        "version": f"{now:%Y%m%d-%H%M%S}-legacy",
+        "trained_at": None,
+        "packaged_at": now.isoformat(timespec="seconds"),
+        "source": f"legacy files {args.classifier}, {args.regressor}; encoders from {args.ml_log}",
+        "rows_total": int(len(data)),
+    }
+    path = save_bundle(
+        clf, reg,
+        encoders={k: sorted(data[k].dropna().astype(str).unique()) for k in ("symbol", "side", "exit_reason")},
+        feature_order=LEGACY_FEATURES,
+        metadata=metadata,
+        activate=not args.no_activate,
+    )
+    print(f"✅ Bundle {metadata['version']} written to {path}")
+
+
+if __name__ == "__main__":
+    main()
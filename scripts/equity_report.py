@@ -0,0 +1,60 @@
+# scripts/equity_report.py
+# Summary of the mark-to-market equity curve (engine/mark_to_market.py): start/end equity, return,
+# max drawdown and the worst unrealized PnL, from the per-cycle samples. --csv exports the samples.
+#
+#   python scripts/equity_report.py
+#   python scripts/equity_report.py --curve sim_logs/equity_curve.bin --csv equity.csv
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+import numpy as np
+from config import EQUITY_CURVE_PATH
+from engine.mark_to_market import read_curve
+
+
+def _stamp(t: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summary of the mark-to-market equity curve.")
+    ap.add_argument("--curve", default=EQUITY_CURVE_PATH)
+    ap.add_argument("--csv", default="", help="also write the samples (timestamp,balance,unrealized,equity,open) here")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    curve = read_curve(args.curve)
+    if not len(curve):
+        print(f"No equity samples at {args.curve}")
+        return
+    equity = curve["balance"] + curve["unrealized"]
+    peak = np.maximum.accumulate(equity)
+    dd = (peak - equity) / peak
+    worst = int(np.argmin(curve["unrealized"]))
+    t1 = time.perf_counter()
+
+    print(f"=== Equity curve: {args.curve} ===")
+    print(f"Samples: {len(curve)} ({_stamp(curve['t'][0])} -> {_stamp(curve['t'][-1])})")
+    print(f"Equity: ${equity[0]:,.2f} -> ${equity[-1]:,.2f} ({(equity[-1] / equity[0] - 1) * 100:+.2f}%) | "
+          f"realized balance ${curve['balance'][-1]:,.2f}")
+    print(f"Max drawdown: {dd.max() * 100:.2f}% (at {_stamp(curve['t'][int(np.argmax(dd))])})")
+    print(f"Worst unrealized: ${curve['unrealized'][worst]:+,.2f} on {curve['open'][worst]} open "
+          f"(at {_stamp(curve['t'][worst])}) | max open: {curve['open'].max()}")
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8") as f:
+            f.write("timestamp,balance,unrealized,equity,open\n")
+            for rec, eq in zip(curve, equity):
+                f.write(f"{_stamp(rec['t'])},{rec['balance']:.2f},{rec['unrealized']:.4f},{eq:.2f},{rec['open']}\n")
+        print(f"Wrote {len(curve)} samples to {args.csv}")
+    print(f"[PERF] {len(curve)} samples ({os.path.getsize(args.curve):,} bytes): read+summary {(t1 - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# scripts/generate_labels.py
+# Bulk ML training rows: every signal bar of each stored history, with its simulated exit,
+# in the ml_log schema (ml/label_generator.generate_signal_labels). One process per symbol.
+#
+#   python scripts/backtest.py BTCUSDT --days 365 --save-history hist/BTCUSDT_5m.csv
+#   python scripts/generate_labels.py --history-dir hist --out labels.csv
+#   python retrain_ml.py --full --ml-log labels.csv
+import argparse
+import glob
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+from config import TIMEFRAME
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate ml_log-schema labels from candle history.")
+    ap.add_argument("--history-dir", required=True, help="<SYMBOL>_<interval>.csv files (timestamp in ms)")
+    ap.add_argument("--symbols", help="comma-separated (default: every file for --interval)")
+    ap.add_argument("--interval", default=TIMEFRAME, help="bar interval of the history files")
+    ap.add_argument("--out", default="generated_ml_log.csv", help="output CSV (appended to)")
+    ap.add_argument("--workers", type=int, default=0, help="processes (default: all cores)")
+    args = ap.parse_args()
+
+    if args.symbols:
+        histories = {s: os.path.join(args.history_dir, f"{s}_{args.interval}.csv") for s in args.symbols.split(",")}
+    else:
+        histories = {os.path.basename(p)[:-len(f"_{args.interval}.csv")]: p
+                     for p in glob.glob(os.path.join(args.history_dir, f"*_{args.interval}.csv"))}
+    missing = [p for p in histories.values() if not os.path.exists(p)]
+    if missing or not histories:
+        print(f"No history for: {', '.join(missing) or args.history_dir}")
+        return
+
+    from ml.label_generator import generate_labels_parallel
+    try:
+        generate_labels_parallel(histories, args.interval, args.out, workers=args.workers or None)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    print(f"Labels: {os.path.abspath(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
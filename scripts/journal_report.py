@@ -0,0 +1,47 @@
+# scripts/journal_report.py
+# Performance report over journal.csv (engine/analytics.py): expectancy, profit factor, Sharpe,
+# max drawdown, MAE/MFE and a per-hour breakdown. The same numbers back Telegram /stats.
+#
+#   python scripts/journal_report.py
+#   python scripts/journal_report.py --journal backtest_journal.csv --json
+import argparse
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+from config import JOURNAL_PATH
+from engine.analytics import JournalStats, format_report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Performance report over a journal CSV.")
+    ap.add_argument("--journal", default=JOURNAL_PATH)
+    ap.add_argument("--json", action="store_true", help="print the metrics as JSON")
+    ap.add_argument("--no-hours", action="store_true", help="leave out the per-hour breakdown")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.journal):
+        print(f"No journal at {args.journal}")
+        return
+    stats = JournalStats(args.journal)
+    t0 = time.perf_counter()
+    rows = stats.update()
+    t1 = time.perf_counter()
+    report = stats.report()
+    t2 = time.perf_counter()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"=== Journal report: {args.journal} ===")
+    print(format_report(report, hours=not args.no_hours))
+    print(f"[PERF] {rows} rows: read+fold {(t1 - t0) * 1000:.1f} ms, report {(t2 - t1) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,24 @@
 # scripts/migrate_trade_log.py
+# Migrate a legacy trade_log.csv to the unified schema (logger/trade_logger.py FIELDS).
+#
+# Row classes, decided with column masks per chunk:
+#   legacy close  tp1 == "closed": the old close writer shifted columns (exit_price in sl,
+#                 exit_reason in tp2, tp_hits in tp3, pnl in strategy, strategy in status)
+#   open          status == "open": mapped directly, exit fields blank
+#   unknown       anything else: mapped directly (best effort)
+# Output columns are built with vectorized selects and streamed chunk by chunk to a temp file
+# next to the log; the original is then hard-linked to a timestamped backup and the temp file
+# swapped in with os.replace (readers see either the old or the new file). Stop the bot first:
+# rows it appends during the migration would be lost.
+#
+#   python scripts/migrate_trade_log.py --dry-run
+#   python scripts/migrate_trade_log.py [--chunk-rows 200000]
+import argparse
 import os
+import shutil
 import sys
 import time
+import numpy as np
 import pandas as pd
 from datetime import datetime
 HERE = os.path.dirname(os.path.abspath(__file__))
@@ -10,118 +27,107 @@ if PROJ not in sys.path:
     sys.path.insert(0, PROJ)
 
 from config import TRADE_LOG_PATH
+from logger.trade_logger import FIELDS
 
-FIELDS = [
-    "timestamp","trade_id","symbol","side",
-    "entry_price","sl","tp1","tp2","tp3",
-    "exit_price","status","exit_reason","tp_hits","pnl",
-    "strategy","ml_exit_reason","ml_confidence","ml_expected_pnl",
-    "atr","adx","rsi","macd","ema_ratio"
-]
+# output column <- legacy-close source column (None = blank)
+_LEGACY_CLOSE = {
+    "sl": None, "tp1": None, "tp2": None, "tp3": None,   # unknown here (original got overwritten)
+    "exit_price": "sl",          # <- exit_price was placed in 'sl'
+    "exit_reason": "tp2",        # <- exit_reason was in 'tp2'
+    "tp_hits": "tp3",            # may be blank/NaN
+    "pnl": "strategy",           # <- pnl ended up in 'strategy'
+    "strategy": "status",        # <- strategy was in 'status'
+}
+# open rows: exit fields blank, status normalized
+_OPEN_BLANK = ("exit_price", "exit_reason", "tp_hits", "pnl")
+
+CHUNK_ROWS = 200_000
 
 def backup_path(path):
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     return f"{path}.backup_{ts}.csv"
 
-def main():
-    if not os.path.exists(TRADE_LOG_PATH) or os.path.getsize(TRADE_LOG_PATH)==0:
-        print("trade_log.csv not found or empty. Nothing to migrate.")
-        return
-    df = pd.read_csv(TRADE_LOG_PATH, dtype=str)  # read raw as strings to preserve weird rows
+def classify(df: pd.DataFrame):
+    """(legacy_close, open, unknown) boolean masks; legacy wins over status=open."""
+    blank = pd.Series("", index=df.index)
+    legacy = df.get("tp1", blank).str.lower().eq("closed").to_numpy()
+    is_open = df.get("status", blank).str.lower().eq("open").to_numpy() & ~legacy
+    return legacy, is_open, ~(legacy | is_open)
+
+def migrate_chunk(df: pd.DataFrame):
+    """Unified-schema frame for one chunk of raw string rows; also returns the class masks."""
     df = df.fillna("")
+    legacy, is_open, unknown = classify(df)
+    blank = np.full(len(df), "", dtype=object)
+    col = lambda name: df[name].to_numpy(dtype=object) if name in df.columns else blank
+    out = {}
+    for name in FIELDS:
+        direct = col(name)
+        src = _LEGACY_CLOSE.get(name, name)
+        from_legacy = col(src) if src else blank
+        if name == "status":
+            direct = np.where(is_open, "open", direct)
+            from_legacy = np.full(len(df), "closed", dtype=object)
+        elif name in _OPEN_BLANK:
+            direct = np.where(is_open, "", direct)
+        out[name] = np.where(legacy, from_legacy, direct)
+    return pd.DataFrame(out, columns=FIELDS), (legacy, is_open, unknown)
 
-    # identify legacy close rows (tp1 == 'closed' case)
-    is_legacy_close = df.get("tp1","").str.lower().eq("closed")
-    is_open = df.get("status","").str.lower().eq("open")
+def migrate(path: str, chunk_rows: int = CHUNK_ROWS, dry_run: bool = False) -> dict:
+    counts = {"rows": 0, "legacy_close": 0, "open": 0, "unknown": 0, "closed_after": 0}
+    tmp = path + ".migrating"
+    t0 = time.perf_counter()
+    # read raw as strings to preserve weird rows
+    reader = pd.read_csv(path, dtype=str, chunksize=chunk_rows)
+    f = None if dry_run else open(tmp, "w", newline="", encoding="utf-8")
+    try:
+        for i, chunk in enumerate(reader):
+            out, (legacy, is_open, unknown) = migrate_chunk(chunk)
+            counts["rows"] += len(out)
+            counts["legacy_close"] += int(legacy.sum())
+            counts["open"] += int(is_open.sum())
+            counts["unknown"] += int(unknown.sum())
+            counts["closed_after"] += int((out["status"].str.lower() == "closed").sum())
+            if f is not None:
+                out.to_csv(f, index=False, header=i == 0)
+        if f is not None:
+            if counts["rows"] == 0:
+                pd.DataFrame(columns=FIELDS).to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            f = None
+            backup = backup_path(path)
+            try:
+                os.link(path, backup)
+            except OSError:
+                shutil.copy2(path, backup)
+            os.replace(tmp, path)
+            counts["backup"] = backup
+    finally:
+        if f is not None:
+            f.close()
+            os.remove(tmp)
+    counts["sec"] = time.perf_counter() - t0
+    return counts
 
-    rows = []
-    for _, r in df.iterrows():
-        if str(r.get("status","")).lower() == "open" and not is_legacy_close.loc[_]:
-            # OPEN row in old schema → map directly, leave exit fields blank
-            rows.append({
-                "timestamp": r.get("timestamp",""),
-                "trade_id": r.get("trade_id",""),
-                "symbol": r.get("symbol",""),
-                "side": r.get("side",""),
-                "entry_price": r.get("entry_price",""),
-                "sl": r.get("sl",""),
-                "tp1": r.get("tp1",""),
-                "tp2": r.get("tp2",""),
-                "tp3": r.get("tp3",""),
-                "exit_price": "",
-                "status": "open",
-                "exit_reason": "",
-                "tp_hits": "",
-                "pnl": "",
-                "strategy": r.get("strategy",""),
-                "ml_exit_reason": r.get("ml_exit_reason",""),
-                "ml_confidence": r.get("ml_confidence",""),
-                "ml_expected_pnl": r.get("ml_expected_pnl",""),
-                "atr": r.get("atr",""),
-                "adx": r.get("adx",""),
-                "rsi": r.get("rsi",""),
-                "macd": r.get("macd",""),
-                "ema_ratio": r.get("ema_ratio",""),
-            })
-        elif str(r.get("tp1","")).lower() == "closed":
-            # LEGACY CLOSED row: re-map positions as per observed misalignment
-            rows.append({
-                "timestamp": r.get("timestamp",""),
-                "trade_id": r.get("trade_id",""),
-                "symbol": r.get("symbol",""),
-                "side": r.get("side",""),
-                "entry_price": r.get("entry_price",""),
-                "sl": "",  # unknown here (original got overwritten)
-                "tp1": "", "tp2": "", "tp3": "",
-                "exit_price": r.get("sl",""),            # <- exit_price was placed in 'sl'
-                "status": "closed",
-                "exit_reason": r.get("tp2",""),          # <- exit_reason was in 'tp2'
-                "tp_hits": r.get("tp3",""),              # may be blank/NaN
-                "pnl": r.get("strategy",""),             # <- pnl ended up in 'strategy'
-                "strategy": r.get("status",""),          # <- strategy was in 'status'
-                "ml_exit_reason": r.get("ml_exit_reason",""),
-                "ml_confidence": r.get("ml_confidence",""),
-                "ml_expected_pnl": r.get("ml_expected_pnl",""),
-                "atr": r.get("atr",""),
-                "adx": r.get("adx",""),
-                "rsi": r.get("rsi",""),
-                "macd": r.get("macd",""),
-                "ema_ratio": r.get("ema_ratio",""),
-            })
-        else:
-            # Unknown row — keep as best-effort open
-            rows.append({
-                "timestamp": r.get("timestamp",""),
-                "trade_id": r.get("trade_id",""),
-                "symbol": r.get("symbol",""),
-                "side": r.get("side",""),
-                "entry_price": r.get("entry_price",""),
-                "sl": r.get("sl",""),
-                "tp1": r.get("tp1",""),
-                "tp2": r.get("tp2",""),
-                "tp3": r.get("tp3",""),
-                "exit_price": r.get("exit_price","") if "exit_price" in r else "",
-                "status": r.get("status",""),
-                "exit_reason": r.get("exit_reason","") if "exit_reason" in r else "",
-                "tp_hits": r.get("tp_hits","") if "tp_hits" in r else "",
-                "pnl": r.get("pnl","") if "pnl" in r else "",
-                "strategy": r.get("strategy",""),
-                "ml_exit_reason": r.get("ml_exit_reason",""),
-                "ml_confidence": r.get("ml_confidence",""),
-                "ml_expected_pnl": r.get("ml_expected_pnl",""),
-                "atr": r.get("atr",""),
-                "adx": r.get("adx",""),
-                "rsi": r.get("rsi",""),
-                "macd": r.get("macd",""),
-                "ema_ratio": r.get("ema_ratio",""),
-            })
+def main():
+    ap = argparse.ArgumentParser(description="Migrate trade_log.csv to the unified schema.")
+    ap.add_argument("--dry-run", action="store_true", help="only report row class counts")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows per chunk (bounds memory)")
+    args = ap.parse_args()
 
-    backup = backup_path(TRADE_LOG_PATH)
-    os.replace(TRADE_LOG_PATH, backup)
-    out = pd.DataFrame(rows, columns=FIELDS)
-    out.to_csv(TRADE_LOG_PATH, index=False)
-    print(f"Migrated trade_log.csv. Backup saved at: {backup}")
-    print(f"New rows: {len(out)} | Closed detected: {int((out['status'].astype(str).str.lower()=='closed').sum())}")
+    if not os.path.exists(TRADE_LOG_PATH) or os.path.getsize(TRADE_LOG_PATH)==0:
+        print("trade_log.csv not found or empty. Nothing to migrate.")
+        return
+    c = migrate(TRADE_LOG_PATH, args.chunk_rows, args.dry_run)
+    rate = c["rows"] / max(c["sec"], 1e-9)
+    print(f"{'Dry run: ' if args.dry_run else ''}{c['rows']} rows | legacy closes: {c['legacy_close']} | "
+          f"opens: {c['open']} | unknown: {c['unknown']} | {c['sec']:.1f}s ({rate:,.0f} rows/s)")
+    if args.dry_run:
+        return
+    print(f"Migrated trade_log.csv. Backup saved at: {c['backup']}")
+    print(f"New rows: {c['rows']} | Closed detected: {c['closed_after']}")
 
 if __name__ == "__main__":
     main()
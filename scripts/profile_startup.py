@@ -0,0 +1,120 @@
+# scripts/profile_startup.py
+# Cold-start profile of the bot: `python -X importtime -c "import main"` in a fresh interpreter
+# (per-module import time), then each run_bot() init step timed in another fresh interpreter.
+# Exits 1 when `import main` exceeds --budget-ms or pulls in a module that must stay lazy, so
+# it can gate CI / pre-deploy checks.
+#
+#   python scripts/profile_startup.py                   # report + budget check
+#   python scripts/profile_startup.py --fetch --top 30  # also time the first market-data fetch
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+# Loaded on first use (or by the background prewarm), never by `import main`
+LAZY_MODULES = ("pandas", "numpy", "ta", "binance", "telebot", "xgboost", "lightgbm", "sklearn")
+DEFAULT_BUDGET_MS = 150
+
+
+def _env(log_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "LOG_DIR": log_dir,                      # no checkpoint / open positions from a real run
+        "ML_LOG_FILE": os.path.join(log_dir, "ml_log.csv"),
+        "TERMINAL_LOG_FILE": os.path.join(log_dir, "terminal_log.txt"),
+        "TELEGRAM_TOKEN": env.get("TELEGRAM_TOKEN", ""),
+        "METRICS_PORT": "0",
+        "MODEL_POLL_SECS": "0",
+        "PYTHONPATH": PROJ + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    return env
+
+
+def import_profile(env: dict) -> list:
+    """[(module, self_us, cumulative_us, depth)] for `import main`, in import order."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=PROJ, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cum_us), (len(name) - len(name.lstrip()) - 1) // 2))
+    return rows
+
+
+def _child(fetch: bool):
+    """Time run_bot()'s init steps in this (fresh) interpreter; prints {step: seconds} as JSON."""
+    steps = {}
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        out = fn()
+        steps[name] = time.perf_counter() - t0
+        return out
+
+    step("import main", lambda: __import__("main"))
+    from dotenv import load_dotenv
+    from utils import clock
+    step("load_dotenv", load_dotenv)
+    step("load_checkpoint", lambda: __import__("engine.checkpoint", fromlist=["x"]).load_checkpoint(clock.now()))
+    step("load_open_positions", lambda: __import__("logger.open_positions_store", fromlist=["x"]).load_open_positions())
+    step("scheduler", lambda: __import__("engine.scheduler", fromlist=["x"]).CandleScheduler("5m", 300, 60))
+    # Off the critical path in run_bot (background prewarm / model thread), timed here for reference
+    step("prewarm: pandas + ta", lambda: __import__("ml.feature_builder"))
+    step("prewarm: model load", lambda: __import__("ml_predictor").get_registry())
+    if fetch:
+        from config import SYMBOLS, TIMEFRAME
+        from data.price_feed import get_latest_candle
+        step("first market-data fetch", lambda: get_latest_candle(SYMBOLS[0], TIMEFRAME, closed_only=True))
+    print(json.dumps(steps))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Profile bot cold start (imports + init steps) against a budget.")
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="max time for `import main`")
+    ap.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    ap.add_argument("--fetch", action="store_true", help="also time the first market-data fetch (network)")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return _child(args.fetch)
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        env = _env(log_dir)
+        rows = import_profile(env)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"] + (["--fetch"] if args.fetch else []),
+                              cwd=PROJ, env=env, capture_output=True, text=True)
+    main_ms = next((cum for name, _, cum, _ in rows if name == "main"), 0) / 1000
+
+    print(f"=== import main: {main_ms:.1f} ms ({len(rows)} modules) ===")
+    print(f"{'cumulative':>12} {'self':>9}  module")
+    for name, self_us, cum_us, depth in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{cum_us / 1000:10.1f}ms {self_us / 1000:7.1f}ms  {'  ' * depth}{name}")
+
+    print("=== init steps ===")
+    if proc.returncode == 0 and proc.stdout.strip():
+        for name, secs in json.loads(proc.stdout.strip().splitlines()[-1]).items():
+            print(f"{secs * 1000:10.1f}ms  {name}")
+    else:
+        print(f"init profile failed:\n{proc.stderr[-2000:]}")
+
+    loaded = sorted({name.split(".")[0] for name, *_ in rows} & set(LAZY_MODULES))
+    over = main_ms > args.budget_ms
+    print(f"[BUDGET] import main {main_ms:.1f} ms / {args.budget_ms:.0f} ms: {'FAIL' if over else 'OK'}")
+    print(f"[BUDGET] lazy modules imported eagerly: {', '.join(loaded) if loaded else 'none'}: {'FAIL' if loaded else 'OK'}")
+    sys.exit(1 if over or loaded else 0)
+
+
+if __name__ == "__main__":
+    main()
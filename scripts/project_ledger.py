@@ -0,0 +1,57 @@
+# scripts/project_ledger.py
+# Project the trade event ledger (logger/ledger.py) into trade_log.csv / journal.csv / ml_log.csv.
+# The bot does this itself in the background; run it after a crash or with the bot stopped to
+# bring the views up to date, or rebuild all three views from scratch into another directory
+# (e.g. to diff them against the live ones).
+#
+#   python scripts/project_ledger.py
+#   python scripts/project_ledger.py --rebuild rebuilt_views/
+#   python scripts/project_ledger.py --portfolio tight     # a PORTFOLIOS_FILE portfolio's ledger/views
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+from config import LEDGER_PATH, TRADE_LOG_PATH, JOURNAL_PATH, ML_LOG_FILE
+from logger.ledger import Projector
+from engine.portfolio import load_portfolios
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Project the trade event ledger into the CSV views.")
+    ap.add_argument("--ledger", default=LEDGER_PATH)
+    ap.add_argument("--rebuild", metavar="OUT_DIR", help="project every event into fresh views in OUT_DIR")
+    ap.add_argument("--portfolio", metavar="NAME", help="use this PORTFOLIOS_FILE portfolio's ledger and views")
+    args = ap.parse_args()
+
+    views = {"trade_log": TRADE_LOG_PATH, "journal": JOURNAL_PATH, "ml_log": ML_LOG_FILE}
+    if args.portfolio:
+        pf = {p.name: p for p in load_portfolios()}.get(args.portfolio)
+        if pf is None:
+            sys.exit(f"No portfolio {args.portfolio!r} (PORTFOLIOS_FILE={os.getenv('PORTFOLIOS_FILE', '')!r})")
+        args.ledger = pf.paths["ledger"]
+        views = {name: pf.paths[name] for name in views}
+
+    if args.rebuild:
+        os.makedirs(args.rebuild, exist_ok=True)
+        out = {name: os.path.join(args.rebuild, os.path.basename(path))
+               for name, path in views.items()}
+        for path in out.values():
+            if os.path.exists(path):
+                os.remove(path)
+        cursor = os.path.join(args.rebuild, ".ledger.cursor")
+        if os.path.exists(cursor):
+            os.remove(cursor)
+        projector = Projector(args.ledger, out["trade_log"], out["journal"], out["ml_log"], cursor_path=cursor)
+        print(f"Rebuilt views from {projector.project()} events -> {args.rebuild}")
+    else:
+        n = Projector(args.ledger, views["trade_log"], views["journal"], views["ml_log"]).project()
+        print(f"Projected {n} new event(s) from {args.ledger}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# scripts/replay_run.py
+# Replay a kline recording (RECORD_KLINES=...) through the real run_bot loop, offline and
+# as fast as the CPU allows. Outputs go to an isolated log dir; trade ids are seeded, so
+# two replays of the same tape produce byte-identical logs.
+#
+#   python scripts/replay_run.py logs/klines.ndjson.gz --log-dir replay_logs
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay recorded klines through run_bot.")
+    ap.add_argument("recording", help="NDJSON (.gz ok) written by RECORD_KLINES")
+    ap.add_argument("--log-dir", default="replay_logs", help="isolated LOG_DIR for this run")
+    ap.add_argument("--seed", type=int, default=0, help="trade id seed")
+    args = ap.parse_args()
+
+    # Isolate every output before config is imported (paths are resolved at import time)
+    log_dir = os.path.abspath(args.log_dir)
+    os.makedirs(log_dir, exist_ok=True)
+    os.environ["LOG_DIR"] = log_dir
+    os.environ["ML_LOG_FILE"] = os.path.join(log_dir, "ml_log.csv")
+    os.environ["TERMINAL_LOG_FILE"] = os.path.join(log_dir, "terminal_log.txt")
+    os.environ["RECORD_KLINES"] = ""
+    os.environ["SHARD_WORKERS"] = "0"
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["MODEL_POLL_SECS"] = "0"   # one model for the whole run (byte-identical logs)
+    os.environ["CHECKPOINT_PATH"] = ""   # always a cold start (a checkpoint would change the run)
+
+    # Same data settings as the recorded session, or the requests won't match the tape
+    from data.recorder import load_replay_config
+    recording = os.path.abspath(args.recording)
+    os.environ.update(load_replay_config(recording))
+
+    from data.recorder import install_replay, ReplayFinished
+    from engine.position_model import seed_trade_ids
+
+    replay = install_replay(recording)
+    seed_trade_ids(args.seed)
+
+    import main as bot
+    t0 = time.perf_counter()
+    try:
+        bot.run_bot(telegram=False)
+    except ReplayFinished as e:
+        print(f"Replay finished: {e}")
+    wall = time.perf_counter() - t0
+    print(f"Replayed {replay.served}/{replay.total} responses in {wall:.2f}s | outputs in {log_dir}")
+
+
+if __name__ == "__main__":
+    main()
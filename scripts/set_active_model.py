@@ -0,0 +1,51 @@
+# scripts/set_active_model.py
+# List model bundles in MODEL_DIR or point ACTIVE at one of them (roll forward / roll back).
+# A running bot picks the change up within MODEL_POLL_SECS and swaps between cycles; no restart.
+#
+#   python scripts/set_active_model.py                 # list versions, * = active
+#   python scripts/set_active_model.py 20261019-101500-a1b2c3
+#   python scripts/set_active_model.py --previous      # roll back one version
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="List model bundles or change the active one.")
+    ap.add_argument("version", nargs="?", help="bundle version to activate")
+    ap.add_argument("--previous", action="store_true", help="activate the version before the active one")
+    ap.add_argument("--model-dir", help="default: MODEL_DIR from config")
+    args = ap.parse_args()
+
+    from config import MODEL_DIR
+    from ml.bundle import list_versions, active_version, read_manifest, set_active
+    model_dir = args.model_dir or MODEL_DIR
+    versions = list_versions(model_dir)
+    active = active_version(model_dir)
+
+    target = args.version
+    if args.previous:
+        if active not in versions or versions.index(active) == 0:
+            print(f"No version before {active or '(none)'} in {model_dir}")
+            return
+        target = versions[versions.index(active) - 1]
+
+    if not target:
+        if not versions:
+            print(f"No model bundles in {model_dir} (run retrain_ml.py)")
+        for v in versions:
+            meta = read_manifest(os.path.join(model_dir, v)).get("metadata", {})
+            print(f"{'*' if v == active else ' '} {v}  acc={meta.get('classifier_accuracy', '-')} mae={meta.get('regressor_mae', '-')}")
+        return
+
+    set_active(target, model_dir)
+    print(f"✅ ACTIVE -> {target} (was {active or 'none'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# scripts/simulate.py
+# Run the real run_bot loop (scheduler, cooldowns, ML gating, every logger and the
+# open-positions store) over historical candles with a simulated clock.
+# Outputs go to an isolated log dir; trade ids are seeded, so reruns are identical.
+#
+#   python scripts/backtest.py BTCUSDT --interval 1m --days 3 --save-history hist/BTCUSDT_1m.csv
+#   python scripts/simulate.py --history-dir hist --symbols BTCUSDT --log-dir sim_logs
+import argparse
+import glob
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+
+def _parse_date(s):
+    return datetime.fromisoformat(s).replace(tzinfo=timezone.utc).timestamp() if s else None
+
+
+def _history_file(history_dir, symbol, base_interval):
+    for name in (f"{symbol}_{base_interval}.csv", f"{symbol}.csv"):
+        path = os.path.join(history_dir, name)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"no history for {symbol} in {history_dir} ({symbol}_{base_interval}.csv)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Faster-than-real-time simulation of run_bot over history.")
+    ap.add_argument("--history-dir", required=True, help="<SYMBOL>_<base>.csv files (timestamp in ms)")
+    ap.add_argument("--symbols", help="comma-separated (default: every file in --history-dir)")
+    ap.add_argument("--base-interval", default="1m", help="interval of the history files")
+    ap.add_argument("--start", help="UTC date/time to start trading (default: after warm-up)")
+    ap.add_argument("--end", help="UTC date/time to stop (default: end of history)")
+    ap.add_argument("--warmup-bars", type=int, default=200, help="TIMEFRAME bars of history before the start")
+    ap.add_argument("--log-dir", default="sim_logs", help="isolated LOG_DIR for this run")
+    ap.add_argument("--seed", type=int, default=0, help="trade id seed")
+    args = ap.parse_args()
+
+    symbols = args.symbols.split(",") if args.symbols else sorted(
+        os.path.basename(p).split("_")[0].split(".")[0] for p in glob.glob(os.path.join(args.history_dir, "*.csv")))
+    if not symbols:
+        print(f"No history files in {args.history_dir}")
+        return
+
+    # Isolate every output before config is imported (paths are resolved at import time)
+    log_dir = os.path.abspath(args.log_dir)
+    os.makedirs(log_dir, exist_ok=True)
+    os.environ["LOG_DIR"] = log_dir
+    os.environ["ML_LOG_FILE"] = os.path.join(log_dir, "ml_log.csv")
+    os.environ["TERMINAL_LOG_FILE"] = os.path.join(log_dir, "terminal_log.txt")
+    os.environ["SYMBOLS"] = ",".join(symbols)
+    os.environ["RECORD_KLINES"] = ""
+    os.environ["SHARD_WORKERS"] = "0"
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["MTF_ENABLED"] = "0"   # the simulator already rolls up any timeframe
+    os.environ["MODEL_POLL_SECS"] = "0"   # one model for the whole run (reproducible)
+    os.environ["CHECKPOINT_PATH"] = ""   # always a cold start (a checkpoint would change the run)
+
+    from config import TIMEFRAME
+    from engine.backtest import load_history
+    from engine.scheduler import timeframe_seconds
+    from engine.position_model import seed_trade_ids
+    from data.simulator import HistoricalMarket, install_simulation, SimulationFinished
+
+    market = HistoricalMarket({s: load_history(_history_file(args.history_dir, s, args.base_interval)) for s in symbols},
+                              base_interval=args.base_interval)
+    first_ms, last_ms = market.span()
+    start = _parse_date(args.start) or first_ms / 1000 + args.warmup_bars * timeframe_seconds(TIMEFRAME)
+    end = min(_parse_date(args.end) or float("inf"), (last_ms + 1) / 1000)
+    if start >= end:
+        print("History too short for the requested window / warm-up.")
+        return
+
+    install_simulation(market, start, end)
+    seed_trade_ids(args.seed)
+
+    import main as bot
+    t0 = time.perf_counter()
+    try:
+        bot.run_bot(telegram=False)
+    except SimulationFinished as e:
+        print(f"Simulation finished: {e}")
+    wall = time.perf_counter() - t0
+    sim_hours = (end - start) / 3600
+    print(f"Simulated {sim_hours:.1f}h of {','.join(symbols)} in {wall:.2f}s "
+          f"({sim_hours * 3600 / max(wall, 1e-9):.0f}x real time) | outputs in {log_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# scripts/sweep.py
+# Parallel TP/SL/trailing/filter parameter sweep over a stored history.
+#
+#   python scripts/sweep.py BTCUSDT data/BTCUSDT_5m.csv space.json --out sweeps/btc
+# writes sweeps/btc.ndjson (every result, resume log) and sweeps/btc.csv (ranked).
+# Rerunning the same command after an interruption only evaluates what is missing.
+import argparse
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ = os.path.abspath(os.path.join(HERE, ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+from config import TIMEFRAME
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parameter sweep of the backtest engine.")
+    ap.add_argument("symbol")
+    ap.add_argument("history", help="OHLCV CSV (see scripts/backtest.py --save-history)")
+    ap.add_argument("space", help="JSON search space file (grid or random)")
+    ap.add_argument("--interval", default=TIMEFRAME)
+    ap.add_argument("--out", default="sweeps/sweep", help="output prefix (.ndjson / .csv)")
+    ap.add_argument("--workers", type=int, default=0, help="processes (default: all cores)")
+    ap.add_argument("--rank-by", default="total_pnl_pct",
+                    choices=["total_pnl_pct", "win_rate", "max_drawdown_pct", "avg_pnl_pct", "final_balance"])
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    from engine.backtest import load_history
+    from engine.sweep import run_sweep
+
+    with open(args.space, "r", encoding="utf-8") as f:
+        space = json.load(f)
+    df = load_history(args.history)
+    try:
+        run_sweep(df, args.symbol, args.interval, space, args.out,
+                  workers=args.workers or None, rank_by=args.rank_by)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    import pandas as pd
+    print(pd.read_csv(args.out + ".csv").head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,15 @@
 # - Validate TELEGRAM_TOKEN; if invalid (no colon or empty), fall back to a no-op bot.
 # - Keep public API: run_telegram_polling(), send_startup_notice(), send_live_alert().
 # - When disabled, we tlog messages instead of raising.
+# - pandas is imported inside the handlers, so a disabled bot costs nothing at startup.
+# - Logs are read through logger.schema.read_log (typed columns, only the ones a command uses).
 
 import os
 import time
-import pandas as pd
 from collections import Counter
-from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, BALANCE_LOG_PATH, TRADE_LOG_PATH, JOURNAL_PATH
+from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, BALANCE_LOG_PATH, TRADE_LOG_PATH, JOURNAL_PATH, EQUITY_CURVE_PATH
 from utils.terminal_logger import tlog
+from logger.schema import read_log
 
 # ---------- Token validation & bot init ----------
 def _valid_token(tok: str) -> bool:
@@ -45,13 +47,14 @@ if not _TELEGRAM_ENABLED:
 
 COMMANDS_LIST = """
 📊 TitanBot-Paper Telegram Commands:
-/balance - Show current paper balance
+/balance - Show current paper balance and mark-to-market equity
 /lasttrade - Show the most recent trade (from trade_log)
 /summary - Show today's performance (from journal)
 /log - Show last closed trade (trade_log close row)
 /journal - Show last journal entry
 /rating - Win/loss stats from journal ✅
 /journalstats - Win rates and PnL per symbol ✅
+/stats - Expectancy, profit factor, Sharpe, drawdown, MAE/MFE, by hour
 """
 
 # ---------- Helpers (shared) ----------
@@ -71,6 +74,13 @@ def _mini_bar(tp3, tp12, sl, trailing, width=20) -> str:
     r = width - (g+y+t)
     return "█"*g + "▓"*y + "░"*t + "▁"*r
 
+def _last_row(df) -> dict:
+    """Last row as a dict, float32 columns shown as logged (not widened to float64 digits)."""
+    import numpy as np
+    last = ((c, df[c].iloc[-1]) for c in df.columns)
+    return {c: float(str(v)) if isinstance(v, np.float32) else v.item() if isinstance(v, np.generic) else v
+            for c, v in last}
+
 # ---------- Command handlers (registered only if enabled) ----------
 if _TELEGRAM_ENABLED:
     @bot.message_handler(commands=['help'])
@@ -80,12 +90,16 @@ if _TELEGRAM_ENABLED:
     @bot.message_handler(commands=['balance'])
     def cmd_balance(message):
         try:
-            import pandas as pd
             if os.path.exists(BALANCE_LOG_PATH):
-                df = pd.read_csv(BALANCE_LOG_PATH)
+                df = read_log("balance", BALANCE_LOG_PATH, columns=["balance"])
                 if not df.empty:
                     bal = float(df["balance"].iloc[-1])
-                    bot.reply_to(message, f"💰 Current paper balance: ${bal:,.2f}")
+                    text = f"💰 Current paper balance: ${bal:,.2f}"
+                    from engine.mark_to_market import last_sample
+                    eq = last_sample(EQUITY_CURVE_PATH)
+                    if eq:
+                        text += f"\n📈 Equity: ${eq['equity']:,.2f} (unrealized {eq['unrealized']:+,.2f} on {eq['open']} open)"
+                    bot.reply_to(message, text)
                     return
             bot.reply_to(message, "💰 Balance not available yet.")
         except Exception as e:
@@ -96,10 +110,10 @@ if _TELEGRAM_ENABLED:
         try:
             if not os.path.exists(TRADE_LOG_PATH):
                 bot.reply_to(message, "No trade_log.csv yet."); return
-            df = pd.read_csv(TRADE_LOG_PATH)
+            df = read_log("trade_log", TRADE_LOG_PATH)
             if df.empty:
                 bot.reply_to(message, "No entries in trade_log.csv."); return
-            row = df.tail(1).to_dict("records")[0]
+            row = _last_row(df)
             bot.reply_to(message, f"📈 Last trade log:\n{row}")
         except Exception as e:
             bot.reply_to(message, f"⚠️ lasttrade error: {e}")
@@ -109,40 +123,40 @@ if _TELEGRAM_ENABLED:
     @bot.message_handler(commands=['log'])
     def cmd_log(message):
         try:
-            import pandas as pd, os
             if not os.path.exists(TRADE_LOG_PATH):
                 bot.reply_to(message, "No trade_log.csv yet.")
                 return
-            df = pd.read_csv(TRADE_LOG_PATH)
+            df = read_log("trade_log", TRADE_LOG_PATH)
 
             closed = None
             if "status" in df.columns:
-                tmp = df[df["status"].astype(str).str.lower()=="closed"]
+                tmp = df[df["status"].str.lower()=="closed"]
                 if not tmp.empty:
                     closed = tmp
 
             # Heuristic fallback for legacy misaligned rows:
-            # detect rows where 'tp1' literally contains 'closed'
+            # detect rows where 'tp1' literally contains 'closed' (raw text: typed, tp1 is a price)
             if closed is None or closed.empty:
                 if "tp1" in df.columns:
-                    tmp = df[df["tp1"].astype(str).str.lower()=="closed"]
+                    raw_tp1 = read_log("trade_log", TRADE_LOG_PATH, columns=["tp1"], typed=False)["tp1"]
+                    tmp = df[(raw_tp1.str.lower()=="closed").to_numpy()]
                     if not tmp.empty:
                         closed = tmp
 
             # Final fallback: use journal.csv (ground truth)
             if closed is None or closed.empty:
                 if os.path.exists(JOURNAL_PATH):
-                    jdf = pd.read_csv(JOURNAL_PATH)
+                    jdf = read_log("journal", JOURNAL_PATH)
                     if "status" in jdf.columns:
-                        jdf = jdf[jdf["status"].astype(str).str.lower()=="closed"]
+                        jdf = jdf[jdf["status"].str.lower()=="closed"]
                     if not jdf.empty:
-                        row = jdf.tail(1).to_dict("records")[0]
+                        row = _last_row(jdf)
                         bot.reply_to(message, f"🧾 Trade log (last closed from journal):\n{row}")
                         return
                 bot.reply_to(message, "No closed trades yet.")
                 return
 
-            row = closed.tail(1).to_dict("records")[0]
+            row = _last_row(closed)
             bot.reply_to(message, f"🧾 Trade log (last closed):\n{row}")
         except Exception as e:
             bot.reply_to(message, f"⚠️ log error: {e}")
@@ -154,10 +168,10 @@ if _TELEGRAM_ENABLED:
         try:
             if not os.path.exists(JOURNAL_PATH):
                 bot.reply_to(message, "No journal.csv yet."); return
-            df = pd.read_csv(JOURNAL_PATH)
+            df = read_log("journal", JOURNAL_PATH)
             if df.empty:
                 bot.reply_to(message, "Journal empty."); return
-            row = df.tail(1).to_dict("records")[0]
+            row = _last_row(df)
             bot.reply_to(message, f"📘 Journal (last):\n{row}")
         except Exception as e:
             bot.reply_to(message, f"⚠️ journal error: {e}")
@@ -168,19 +182,19 @@ if _TELEGRAM_ENABLED:
             today_str = time.strftime("%Y-%m-%d")
             if not os.path.exists(JOURNAL_PATH):
                 bot.reply_to(message, f"📊 No journal yet for {today_str}."); return
-            df = pd.read_csv(JOURNAL_PATH)
+            df = read_log("journal", JOURNAL_PATH, columns=["timestamp","status","exit_reason","pnl","symbol"])
             if df.empty:
                 bot.reply_to(message, f"📊 No closed trades yet for {today_str}."); return
-            today = df[df["timestamp"].astype(str).str.startswith(today_str)] if "timestamp" in df.columns else df.copy()
+            today = df[df["timestamp"].str.startswith(today_str, na=False)] if "timestamp" in df.columns else df.copy()
             if "status" in today.columns:
-                today = today[today["status"].astype(str).str.lower()=="closed"].copy()
+                today = today[today["status"].str.lower()=="closed"].copy()
             if today.empty:
                 bot.reply_to(message, f"📊 No closed trades yet for {today_str}."); return
             for col in ["exit_reason","pnl","symbol"]:
                 if col not in today.columns:
                     raise ValueError(f"Missing '{col}' in journal.csv")
             today["exit_reason_norm"] = today["exit_reason"].apply(_norm_exit)
-            today["pnl"] = pd.to_numeric(today["pnl"], errors="coerce").fillna(0.0)
+            today["pnl"] = today["pnl"].fillna(0.0)
             counts = today["exit_reason_norm"].value_counts()
             tp3 = int(counts.get("TP3",0)); tp12 = int(counts.get("TP1–2",0))
             sl = int(counts.get("SL",0)); trailing = int(counts.get("TrailingSL",0))
@@ -199,18 +213,18 @@ if _TELEGRAM_ENABLED:
         try:
             if not os.path.exists(JOURNAL_PATH):
                 bot.reply_to(message, "No journal.csv yet."); return
-            df = pd.read_csv(JOURNAL_PATH)
+            df = read_log("journal", JOURNAL_PATH, columns=["symbol","status","exit_reason","pnl"])
             if "status" in df.columns:
-                df = df[df["status"].astype(str).str.lower()=="closed"].copy()
+                df = df[df["status"].str.lower()=="closed"].copy()
             if df.empty:
                 bot.reply_to(message, "No closed trades yet."); return
             for col in ["symbol","exit_reason","pnl"]:
                 if col not in df.columns:
                     raise ValueError(f"Missing '{col}' in journal.csv")
             df["exit_reason_norm"] = df["exit_reason"].apply(_norm_exit)
-            df["pnl"] = pd.to_numeric(df["pnl"], errors="coerce").fillna(0.0)
+            df["pnl"] = df["pnl"].fillna(0.0)
             out_lines = ["📘 TitanBot Journal Stats:"]
-            for sym, g in df.groupby("symbol"):
+            for sym, g in df.groupby("symbol", observed=True):
                 counts = g["exit_reason_norm"].value_counts()
                 tp3 = int(counts.get("TP3",0)); tp12 = int(counts.get("TP1–2",0))
                 sl = int(counts.get("SL",0)); trailing = int(counts.get("TrailingSL",0))
@@ -234,13 +248,13 @@ if _TELEGRAM_ENABLED:
         try:
             if not os.path.exists(JOURNAL_PATH):
                 bot.reply_to(message, "No journal.csv yet."); return
-            df = pd.read_csv(JOURNAL_PATH)
+            df = read_log("journal", JOURNAL_PATH, columns=["status","exit_reason","pnl"])
             if "status" in df.columns:
-                df = df[df["status"].astype(str).str.lower()=="closed"].copy()
+                df = df[df["status"].str.lower()=="closed"].copy()
             if df.empty:
                 bot.reply_to(message, "No closed trades yet."); return
             df["exit_reason_norm"] = df["exit_reason"].apply(_norm_exit)
-            df["pnl"] = pd.to_numeric(df["pnl"], errors="coerce").fillna(0.0)
+            df["pnl"] = df["pnl"].fillna(0.0)
             counts = df["exit_reason_norm"].value_counts()
             tp3 = int(counts.get("TP3",0)); tp12 = int(counts.get("TP1–2",0))
             sl = int(counts.get("SL",0)); trailing = int(counts.get("TrailingSL",0))
@@ -257,6 +271,21 @@ if _TELEGRAM_ENABLED:
         except Exception as e:
             bot.reply_to(message, f"⚠️ Rating error: {e}")
 
+    _journal_stats = None
+
+    @bot.message_handler(commands=['stats'])
+    def cmd_stats(message):
+        # one JournalStats per process: each /stats only reads the trades closed since the last one
+        global _journal_stats
+        try:
+            from engine.analytics import JournalStats, format_report
+            if _journal_stats is None:
+                _journal_stats = JournalStats(JOURNAL_PATH)
+            _journal_stats.update()
+            bot.reply_to(message, "📐 TitanBot Performance:\n" + format_report(_journal_stats.report()))
+        except Exception as e:
+            bot.reply_to(message, f"⚠️ stats error: {e}")
+
 # ---------- Public API ----------
 def run_telegram_polling():
     bot.infinity_polling()
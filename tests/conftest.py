@@ -0,0 +1,26 @@
+# tests/conftest.py
+# Shared fixtures: a small synthetic OHLCV history (random walk, 5m bars) for the backtest and
+# label tests. The project root is put on sys.path like the scripts/ entry points do.
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJ not in sys.path:
+    sys.path.insert(0, PROJ)
+
+
+@pytest.fixture
+def history():
+    """1500 5m bars with enough range for generate_signal() to fire regularly."""
+    rng = np.random.default_rng(7)
+    n = 1500
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, n))
+    return pd.DataFrame({"timestamp": 1_700_000_000_000 + np.arange(n) * 300_000,
+                         "open": open_, "high": high, "low": low, "close": close, "volume": 1.0})
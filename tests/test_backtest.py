@@ -0,0 +1,51 @@
+# tests/test_backtest.py
+import pytest
+
+from core.signal_engine import generate_signal
+from engine.backtest import backtest_params, fmt_ms, prepare_bars, quiet, simulate, summarize
+from engine.position_model import build_fake_trade, seeded_trade_ids, update_position_status
+from utils.pnl_utils import calc_realistic_pnl
+
+
+def _loop_backtest(bars: dict, symbol: str, params: dict = None, seed: int = 0) -> list:
+    """Reference run: every bar goes through generate_signal()/update_position_status(), like the bot."""
+    p = backtest_params(params)
+    o, h, l, c, atr, close_ms = (bars[k] for k in ("open", "high", "low", "close", "atr", "close_ms"))
+    closed, trade, next_entry_ms, opened_ms = [], None, None, None
+    with seeded_trade_ids(seed):
+        for i in range(len(c)):
+            candle = {"open": o[i], "high": h[i], "low": l[i], "close": c[i]}
+            if trade is not None:
+                update_position_status(trade, candle, atr[i], params=p, log=quiet)
+                if trade["status"] == "closed":
+                    trade["duration_sec"] = int((close_ms[i] - opened_ms) // 1000)
+                    trade["closed_at"] = fmt_ms(close_ms[i])
+                    trade["pnl"] = calc_realistic_pnl(trade["entry_price"], trade["exit_price"], trade["side"], trade["leverage"])
+                    closed.append(trade)
+                    trade, next_entry_ms = None, close_ms[i] + int(p["COOLDOWN_SECONDS"]) * 1000
+                continue
+            if next_entry_ms is not None and close_ms[i] < next_entry_ms:
+                continue
+            signal = generate_signal(symbol, candle, params=p)
+            if not signal or atr[i] <= 0:
+                continue
+            signal["leverage"] = 1
+            signal.update({k: float(bars[k][i]) for k in ("adx", "rsi", "macd", "ema_ratio")})
+            trade = build_fake_trade(signal, candle, float(atr[i]), params=p, log=quiet)
+            trade["opened_at"], opened_ms = fmt_ms(close_ms[i]), close_ms[i]
+    return closed
+
+
+@pytest.mark.parametrize("params", [None, {"COOLDOWN_SECONDS": 0, "TRAILING_START_AFTER_TP": 1}])
+def test_vectorized_simulate_matches_bar_loop(history, params):
+    bars = prepare_bars(history, "5m")
+    fast, _ = simulate(bars, "TESTUSDT", params)
+    slow = _loop_backtest(bars, "TESTUSDT", params)
+    assert len(fast) > 10
+
+    keys = ("trade_id", "side", "entry_price", "exit_price", "exit_reason", "hit", "opened_at", "closed_at", "duration_sec")
+    assert [{k: t[k] for k in keys} for t in fast] == [{k: t[k] for k in keys} for t in slow]
+    for a, b in zip(fast, slow):
+        assert a["pnl"] == pytest.approx(b["pnl"])
+        assert a["mae"] == pytest.approx(b["mae"]) and a["mfe"] == pytest.approx(b["mfe"])
+    assert summarize(fast) == summarize(slow)
@@ -0,0 +1,39 @@
+# tests/test_checkpoint.py
+import numpy as np
+import pytest
+
+from engine import checkpoint
+
+
+class _Feed:
+    base_interval = "1m"
+
+    def __init__(self, bars: dict):
+        self.bars = bars
+
+    def snapshot(self) -> dict:
+        return self.bars
+
+
+@pytest.mark.parametrize("name", ["checkpoint.npz", "checkpoint.json"])
+def test_round_trip_drops_expired_cooldowns_and_timeframe_state(tmp_path, monkeypatch, name):
+    path, now = str(tmp_path / name), 1_700_000_000.0
+    bars = {"BTCUSDT": np.arange(18, dtype=np.float64).reshape(3, 6) + 0.1, "ETHUSDT": np.empty((0, 6))}
+    assert checkpoint.save_checkpoint({"BTCUSDT": now + 60, "ETHUSDT": now - 1}, {"BTCUSDT": 12.5},
+                                      {"BTCUSDT": 1_699_999_940_000}, _Feed(bars), now=now, path=path,
+                                      portfolio_cooldowns={"fast": {"BTCUSDT": now - 5, "ETHUSDT": now + 5}}) > 0
+
+    state = checkpoint.load_checkpoint(now, path)
+    assert state["cooldowns"] == {"BTCUSDT": now + 60}
+    assert state["portfolio_cooldowns"] == {"fast": {"ETHUSDT": now + 5}}
+    assert state["atr"] == {"BTCUSDT": 12.5} and state["last_bar_ms"] == {"BTCUSDT": 1_699_999_940_000}
+    assert state["feed"]["base_interval"] == "1m"
+    for sym, arr in bars.items():
+        np.testing.assert_array_equal(state["feed"]["bars"][sym], arr)
+
+    # A TIMEFRAME change invalidates the per-timeframe state; the base-interval buffers stay
+    monkeypatch.setattr(checkpoint, "TIMEFRAME", "1h" if checkpoint.TIMEFRAME != "1h" else "4h")
+    state = checkpoint.load_checkpoint(now, path)
+    assert state["atr"] == {} and state["last_bar_ms"] == {}
+    assert state["cooldowns"] == {"BTCUSDT": now + 60}
+    np.testing.assert_array_equal(state["feed"]["bars"]["BTCUSDT"], bars["BTCUSDT"])
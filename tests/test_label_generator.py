@@ -0,0 +1,26 @@
+# tests/test_label_generator.py
+import pytest
+
+from engine.backtest import fmt_ms, prepare_bars, simulate
+from ml.label_generator import generate_signal_labels
+
+
+def test_signal_labels_match_backtest_exits(history):
+    # No cooldown, so every backtest trade is also one of the label generator's per-signal trades
+    params = {"COOLDOWN_SECONDS": 0}
+    closed, _ = simulate(prepare_bars(history, "5m"), "TESTUSDT", params)
+    labels = generate_signal_labels(history, "TESTUSDT", "5m", params)
+    assert len(closed) > 20
+
+    by_entry = {fmt_ms(int(i.rsplit("-", 1)[1])): row for i, row in zip(labels["id"], labels.to_dict("records"))}
+    reasons = set()
+    for trade in closed:
+        row = by_entry[trade["opened_at"]]
+        assert row["exit_reason"] == trade["exit_reason"]
+        assert row["timestamp"] == trade["closed_at"]
+        assert row["duration_sec"] == trade["duration_sec"]
+        assert row["exit_price"] == pytest.approx(trade["exit_price"])
+        assert row["pnl_pct"] == pytest.approx(trade["pnl"], abs=1e-4)
+        reasons.add(trade["exit_reason"])
+    # both the vectorized SL path and the run_exits() path are exercised
+    assert "SL" in reasons and len(reasons) > 1
@@ -0,0 +1,38 @@
+# tests/test_ledger.py
+import csv
+
+from engine.position_model import build_fake_trade, seeded_trade_ids
+from logger import ledger
+
+
+def _rows(path) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_interrupted_batch_is_truncated_and_projected_once(tmp_path, monkeypatch):
+    paths = {k: str(tmp_path / f"{k}.csv") for k in ("trade_log", "journal", "ml_log")}
+    messages = []
+    led = ledger.Ledger(str(tmp_path / "trade_events.ndjson"), paths["trade_log"], paths["journal"],
+                        paths["ml_log"], log=messages.append)
+    with seeded_trade_ids(0):
+        trade = build_fake_trade({"symbol": "BTCUSDT", "direction": "LONG"},
+                                 {"open": 100.0, "high": 101.0, "low": 99.0, "close": 100.0}, 1.0, log=lambda m: None)
+    led.record_open(trade)
+    trade.update(status="closed", exit_price=trade["sl"], exit_reason="SL", duration_sec=300)
+
+    # Crash after the close row reached trade_log but before journal/ml_log were appended
+    append_journal = ledger.journal_writer.append_rows
+    monkeypatch.setattr(ledger.journal_writer, "append_rows", lambda *a, **kw: 1 / 0)
+    led.record_close(trade, atr=1.0)
+    assert any("ledger projection error" in m for m in messages)
+    assert [r["status"] for r in _rows(paths["trade_log"])] == ["open", "closed"]
+    assert led.projector._load_cursor().get("pending")
+
+    monkeypatch.setattr(ledger.journal_writer, "append_rows", append_journal)
+    assert led.project() == 1
+    assert led.project() == 0
+    assert [r["status"] for r in _rows(paths["trade_log"])] == ["open", "closed"]
+    assert [r["trade_id"] for r in _rows(paths["journal"])] == [trade["trade_id"]]
+    assert [r["id"] for r in _rows(paths["ml_log"])] == [trade["trade_id"]]
+    assert not led.projector._load_cursor().get("pending")
@@ -0,0 +1,37 @@
+# tests/test_mark_to_market.py
+import pytest
+
+from engine.mark_to_market import MarkToMarket, last_sample, read_curve
+from utils.pnl_utils import calc_realistic_pnl
+
+
+def test_scale_outs_and_close_are_booked_once(tmp_path):
+    mtm = MarkToMarket(str(tmp_path / "equity_curve.bin"), stake_pct=10, scale_out=[0.5, 0.3, 0.2],
+                       balance_path=str(tmp_path / "balance_history.csv"), initial_balance=1000.0)
+    trade = {"symbol": "BTCUSDT", "side": "LONG", "leverage": 1, "status": "open", "hit": [],
+             "entry_price": 100.0, "tp1": 102.0, "tp2": 104.0, "tp3": 108.0}
+    assert mtm.stake(trade) == 100.0
+
+    sample = mtm.mark([trade], {"BTCUSDT": {"close": 101.0}}, now=1.0)
+    assert sample["unrealized"] == pytest.approx(100.0 * calc_realistic_pnl(100.0, 101.0, "LONG", 1) / 100)
+    assert sample["balance"] == 1000.0
+
+    trade["hit"] = [0]
+    tp1 = mtm.book(trade)
+    assert tp1 == pytest.approx(50.0 * calc_realistic_pnl(100.0, 102.0, "LONG", 1) / 100)
+    assert mtm.book(trade) == 0.0           # already booked
+    assert mtm.remaining(trade) == 0.5
+    # the stake was fixed at the open: booked PnL doesn't resize it
+    assert mtm.mark([trade], {}, now=2.0)["unrealized"] == pytest.approx(sample["unrealized"] / 2)
+
+    trade.update(status="closed", exit_price=101.0, exit_reason="TRAIL")
+    rest = mtm.book(trade)
+    assert rest == pytest.approx(50.0 * calc_realistic_pnl(100.0, 101.0, "LONG", 1) / 100)
+    assert mtm.book(trade) == 0.0           # the close is a fill too
+    assert mtm.balance == pytest.approx(1000.0 + tp1 + rest)
+
+    mtm.mark([trade], {}, now=3.0)
+    curve = read_curve(mtm.curve_path)
+    assert list(curve["t"]) == [1.0, 2.0, 3.0] and list(curve["open"]) == [1, 1, 0]
+    assert last_sample(mtm.curve_path) == {"t": 3.0, "balance": mtm.balance, "unrealized": 0.0,
+                                           "equity": mtm.balance, "open": 0}
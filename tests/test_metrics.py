@@ -0,0 +1,22 @@
+# tests/test_metrics.py
+from engine import pipeline
+from engine.portfolio import Portfolio
+from utils import metrics, terminal_logger
+
+
+def test_entry_cycle_times_features_once_per_symbol(tmp_path, monkeypatch):
+    monkeypatch.setattr(terminal_logger, "TERMINAL_LOG_FILE", str(tmp_path / "terminal_log.txt"))
+    import main   # after the log redirect: importing it logs the Telegram setup
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    monkeypatch.setattr(metrics, "_histograms", {})
+    candle = {"open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5}
+    monkeypatch.setattr(pipeline, "get_latest_candle", lambda *a, **kw: dict(candle))
+    monkeypatch.setattr(pipeline, "get_features_for_symbol", lambda *a, **kw: (None, None, 1.0))
+    monkeypatch.setattr(pipeline, "generate_signal", lambda *a, **kw: None)
+    pf = Portfolio("test", {"SYMBOLS": ["AAAUSDT", "BBBUSDT"]}, log_dir=str(tmp_path))
+
+    main._entry_cycle([pf], {})
+
+    counts = {dict(labels)["symbol"]: h[2] for (name, labels), h in metrics._histograms.items()
+              if name == "titanbot_stage_seconds" and ("stage", "features") in labels}
+    assert counts == {"AAAUSDT": 1, "BBBUSDT": 1}
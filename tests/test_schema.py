@@ -0,0 +1,28 @@
+# tests/test_schema.py
+import pandas as pd
+
+from logger import schema
+
+# journal.csv as written before the mae/mfe and ML columns existed (one hand-edited pnl cell)
+LEGACY_JOURNAL = (
+    "timestamp,trade_id,symbol,side,entry_price,exit_price,status,exit_reason,tp_hits,pnl,duration_sec,balance,strategy\n"
+    "2025-01-02 03:04:05,a1,BTCUSDT,LONG,65432.12345,65500.5,closed,TP1,TP1,0.1,300,1000.25,basic_trend\n"
+    "2025-01-02 04:04:05,b2,ETHUSDT,SHORT,3300.5,3310.0,closed,SL,,n/a,600,998.75,basic_trend\n"
+)
+
+
+def test_read_log_loads_a_legacy_file_with_missing_columns(tmp_path):
+    path = tmp_path / "journal.csv"
+    path.write_text(LEGACY_JOURNAL, encoding="utf-8")
+
+    df = schema.read_log("journal", str(path))
+    assert list(df.columns) == LEGACY_JOURNAL.splitlines()[0].split(",")
+    assert df["entry_price"].dtype == "float64" and df["entry_price"].iloc[0] == 65432.12345
+    assert df["pnl"].dtype == "float32" and pd.isna(df["pnl"].iloc[1])
+    assert df["symbol"].dtype == "category" and list(df["symbol"]) == ["BTCUSDT", "ETHUSDT"]
+
+    # asking for columns the file lacks returns the ones it has, chunked or not
+    wanted = ["trade_id", "pnl", "mae", "mfe", "ml_confidence"]
+    assert list(schema.read_log("journal", str(path), columns=wanted).columns) == ["trade_id", "pnl"]
+    chunks = list(schema.read_log("journal", str(path), columns=wanted, chunksize=1))
+    assert [len(c) for c in chunks] == [1, 1] and all(list(c.columns) == ["trade_id", "pnl"] for c in chunks)
@@ -0,0 +1,70 @@
+# tests/test_training.py
+# Incremental retraining reads ml_log.csv from the byte offset recorded in the active bundle, so
+# the rows between two offsets have to be fitted by exactly one run - holdout included.
+import csv
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from logger import schema
+from ml import training
+
+pytest.importorskip("xgboost")
+pytest.importorskip("lightgbm")
+
+
+def _append_rows(path, start: int, n: int):
+    """n ml_log rows with a unique entry_price each (start, start+1, ...) and alternating exit classes."""
+    rng = np.random.default_rng(start)
+    new_file = start == 0
+    with open(path, "a", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=schema.columns("ml_log"))
+        if new_file:
+            w.writeheader()
+        for i in range(start, start + n):
+            w.writerow({
+                "timestamp": f"2025-10-{10 + i // 1440:02d} {i // 60 % 24:02d}:{i % 60:02d}:00", "id": f"t{i}",
+                "symbol": "BTCUSDT", "side": "LONG" if i % 3 else "SHORT", "entry_price": float(i),
+                "exit_reason": "SL" if i % 2 else "TP1", "atr": rng.uniform(0.1, 1), "trend_strength": rng.normal(),
+                "volatility": rng.uniform(0, 0.01), "pnl_pct": rng.normal(), "duration_sec": 0, "is_partial": 0,
+            })
+
+
+def test_incremental_runs_fit_every_row_once(tmp_path, monkeypatch):
+    ml_log, model_dir = tmp_path / "ml_log.csv", tmp_path / "models"
+    fitted = Counter()
+    fit_models = training.fit_models
+
+    def recording_fit(X, *args, **kw):
+        fitted.update(X[:, training.BASE_FEATURES.index("entry_price")].astype(int).tolist())
+        return fit_models(X, *args, **kw)
+
+    monkeypatch.setattr(training, "fit_models", recording_fit)
+    monkeypatch.setattr(training, "beats", lambda new, old: True)
+    quiet = dict(ml_log=str(ml_log), model_dir=str(model_dir), rounds=5, log=lambda *a: None)
+
+    _append_rows(ml_log, 0, 100)
+    training.retrain(mode="full", **quiet)
+    _append_rows(ml_log, 100, 50)
+    first = training.retrain(mode="incremental", **quiet)
+    _append_rows(ml_log, 150, 50)
+    second = training.retrain(mode="incremental", **quiet)
+
+    assert first["mode"] == second["mode"] == "incremental"
+    assert second["parent"] == first["version"] and second["activated"]
+    assert fitted == Counter(range(200))
+
+
+def test_rejected_batch_is_not_refitted(tmp_path, monkeypatch):
+    ml_log, model_dir = tmp_path / "ml_log.csv", tmp_path / "models"
+    quiet = dict(ml_log=str(ml_log), model_dir=str(model_dir), rounds=5, log=lambda *a: None)
+    _append_rows(ml_log, 0, 100)
+    parent = training.retrain(mode="full", **quiet)
+
+    monkeypatch.setattr(training, "beats", lambda new, old: False)
+    _append_rows(ml_log, 100, 50)
+    rejected = training.retrain(mode="incremental", **quiet)
+    assert not rejected["activated"] and rejected["parent"] == parent["version"]
+    assert training.retrain(mode="incremental", **quiet)["version"] == rejected["version"]
+    assert len(training.list_versions(str(model_dir))) == 2
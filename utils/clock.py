@@ -0,0 +1,54 @@
+# utils/clock.py
+# Wall-clock indirection. Live runs use the real clock; replay and simulation install a
+# SimClock so time.time / time.sleep / log timestamps are virtual and runs are reproducible.
+
+import time as _time
+
+_clock = None   # None = real clock
+
+
+def now() -> float:
+    return _clock.now() if _clock is not None else _time.time()
+
+
+def sleep(seconds: float):
+    if _clock is not None:
+        _clock.sleep(seconds)
+    else:
+        _time.sleep(seconds)
+
+
+def strftime(fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
+    """Local-time formatted 'now' (same format/zone as time.strftime on the real clock)."""
+    return _time.strftime(fmt, _time.localtime(now()))
+
+
+def set_clock(clock):
+    """Install a clock object with now()/sleep() (None restores the real clock). Returns the previous one."""
+    global _clock
+    prev = _clock
+    _clock = clock
+    return prev
+
+
+class SimClock:
+    """
+    Virtual clock: sleep() advances time instantly. advance_to() only moves forward.
+    on_sleep(clock, seconds) runs before each sleep; raising from it stops the run loop.
+    """
+
+    def __init__(self, start: float, on_sleep=None):
+        self._now = float(start)
+        self.on_sleep = on_sleep
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float):
+        if self.on_sleep is not None:
+            self.on_sleep(self, seconds)
+        self._now += max(0.0, float(seconds))
+
+    def advance_to(self, t: float):
+        if t > self._now:
+            self._now = float(t)
@@ -0,0 +1,179 @@
+# utils/metrics.py
+# Lightweight in-process metrics for the main loop:
+# - per-stage / per-symbol latency histograms (fixed buckets, no allocation per observe)
+# - cycle overrun counter
+# - bytes written by each logger
+# Exposed as Prometheus text: atomically rewritten file and/or a localhost HTTP endpoint.
+# Everything is fail-closed: a metrics problem must never break the trading loop.
+
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from config import METRICS_ENABLED, METRICS_FILE, METRICS_PORT
+
+# Seconds. Cycles are network bound, so the interesting range is ~1ms .. 10s.
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_histograms = {}   # {(name, labels): [bucket_counts, sum, count]}
+_counters = {}     # {(name, labels): value}
+_HELP = {
+    "titanbot_stage_seconds": "Latency of a main-loop stage (optionally per symbol).",
+    "titanbot_cycle_seconds": "Wall time of a full main-loop cycle.",
+    "titanbot_cycle_overruns_total": "Cycles that took longer than EVALUATION_INTERVAL.",
+    "titanbot_log_bytes_written_total": "Bytes appended/written by each logger.",
+    "titanbot_bar_close_to_decision_seconds": "Delay from TIMEFRAME bar close to end of entry evaluation.",
+    "titanbot_scheduler_missed_ticks_total": "Bar closes coalesced because the loop was late.",
+    "titanbot_model_swaps_total": "Model bundles hot-swapped in from MODEL_DIR/ACTIVE.",
+}
+_http_started = False
+
+
+def _key(name: str, labels: dict):
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None)))
+
+
+def observe(name: str, seconds: float, **labels):
+    """Record one latency sample (seconds) into a histogram."""
+    if not METRICS_ENABLED:
+        return
+    _observe_key(_key(name, labels), seconds)
+
+
+def _observe_key(k, seconds: float):
+    i = bisect_left(_BUCKETS, seconds)
+    with _lock:
+        h = _histograms.get(k)
+        if h is None:
+            h = _histograms[k] = [[0] * (len(_BUCKETS) + 1), 0.0, 0]
+        h[0][i] += 1
+        h[1] += seconds
+        h[2] += 1
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Increase a monotonically growing counter."""
+    if not METRICS_ENABLED:
+        return
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def record_bytes(logger_name: str, nbytes: int):
+    """Called by the writers after each write; nbytes <= 0 is ignored."""
+    if nbytes and nbytes > 0:
+        inc("titanbot_log_bytes_written_total", nbytes, logger=logger_name)
+
+
+@contextmanager
+def timed(stage: str, symbol: str = None):
+    """
+    Time a block as titanbot_stage_seconds{stage=..., symbol=...}.
+    Exceptions still propagate; the sample is recorded either way.
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        # Build the key directly (hot path): labels are always stage[, symbol], already sorted.
+        labels = (("stage", stage), ("symbol", symbol)) if symbol else (("stage", stage),)
+        _observe_key(("titanbot_stage_seconds", labels), time.perf_counter() - t0)
+
+
+def record_cycle(elapsed: float, budget: float, kind: str = None):
+    """Record a full cycle duration and count it as an overrun if it exceeded the budget."""
+    observe("titanbot_cycle_seconds", elapsed, kind=kind)
+    if budget and elapsed > budget:
+        inc("titanbot_cycle_overruns_total", kind=kind)
+
+
+def _fmt_labels(labels, extra=None) -> str:
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render() -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        hists = {k: (list(v[0]), v[1], v[2]) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    seen = set()
+    for (name, labels), (buckets, total, count) in sorted(hists.items()):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+        cum = 0
+        for le, n in zip(_BUCKETS, buckets):
+            cum += n
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', le)])} {cum}")
+        lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {count}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+    for (name, labels), value in sorted(counters.items()):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str = None):
+    """Atomically rewrite the Prometheus text file (node_exporter textfile collector friendly)."""
+    if not METRICS_ENABLED:
+        return
+    path = path or METRICS_FILE
+    if not path:
+        return
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(render())
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"⚠️ metrics write error: {e}")
+
+
+def start_http_server(port: int = None):
+    """
+    Serve GET /metrics on 127.0.0.1:<port> from a daemon thread.
+    No-op if metrics are disabled, port is 0, or the server is already running.
+    """
+    global _http_started
+    port = METRICS_PORT if port is None else port
+    if not METRICS_ENABLED or not port or _http_started:
+        return
+    try:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_response(404); self.end_headers(); return
+                body = render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # keep the terminal clean
+
+        server = ThreadingHTTPServer(("127.0.0.1", int(port)), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        _http_started = True
+    except Exception as e:
+        print(f"⚠️ metrics HTTP server failed to start on port {port}: {e}")
@@ -1,21 +1,20 @@
 # utils/ml_logger.py
+# ml_log.csv view: one training row per closed trade, projected from the trade event ledger
+# (logger/ledger.py).
 import csv
 import os
-from datetime import datetime
 from utils.pnl_utils import calc_realistic_pnl
-from utils.terminal_logger import tlog
+from utils.metrics import record_bytes
 from config import ML_LOG_FILE
+from logger.schema import columns
 
-_HEADERS = [
-    "timestamp","id","symbol","side","entry_price","exit_price","exit_reason",
-    "sl","tp1","tp2","tp3","atr","trend_strength","volatility","adx","rsi",
-    "macd","ema_ratio","pnl_pct","raw_profit","duration_sec","strategy","leverage","is_partial"
-]
+HEADERS = columns("ml_log")   # logger/schema.py
 
-def log_ml_features(trade: dict, trend: float, volatility: float, atr: float):
+def ml_log_row(trade: dict, timestamp: str, trend: float, volatility: float, atr: float):
+    """Training row for a closed trade, or None (still open / unparsable prices)."""
     # Only log on final close
     if str(trade.get("status","")).lower() != "closed":
-        return
+        return None
 
     try:
         entry_price = float(trade.get("entry_price"))
@@ -23,13 +22,13 @@ def log_ml_features(trade: dict, trend: float, volatility: float, atr: float):
         side        = trade.get("side","LONG")
         leverage    = float(trade.get("leverage",1))
     except Exception:
-        return
+        return None
 
     pnl_pct   = calc_realistic_pnl(entry_price, exit_price, side, leverage)
     raw_profit = 0.0  # keep 0 unless you have notional
 
-    row = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    return {
+        "timestamp": timestamp,
         "id": trade.get("trade_id"),
         "symbol": trade.get("symbol"),
         "side": side,
@@ -55,11 +54,15 @@ def log_ml_features(trade: dict, trend: float, volatility: float, atr: float):
         "is_partial": 1 if "Partial" in str(trade.get("exit_reason","")) else 0
     }
 
-    new_file = not os.path.exists(ML_LOG_FILE)
-    with open(ML_LOG_FILE, "a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=_HEADERS, extrasaction="ignore")
+def append_rows(rows: list, path: str = ML_LOG_FILE):
+    """Append ml_log rows (dicts from ml_log_row) in one write."""
+    if not rows:
+        return
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        start = f.tell()
+        w = csv.DictWriter(f, fieldnames=HEADERS, extrasaction="ignore")
         if new_file:
             w.writeheader()
-        w.writerow(row)
-
-    tlog(f"📦 ML logged: {row['symbol']} | {row['exit_reason']} | PnL: {pnl_pct:.2f}%")
+        w.writerows(rows)
+        record_bytes("ml_log", f.tell() - start)
@@ -1,9 +1,13 @@
 # utils/terminal_logger.py
-from datetime import datetime
+from config import TERMINAL_LOG_FILE
+from utils import clock
+from utils.metrics import record_bytes
 
 def tlog(message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = clock.strftime("%Y-%m-%d %H:%M:%S")
     line = f"[{timestamp}] {message}"
     print(line)
-    with open("terminal_log.txt", "a", encoding="utf-8") as f:
+    with open(TERMINAL_LOG_FILE, "a", encoding="utf-8") as f:
+        start = f.tell()
         f.write(line + "\n")
+        record_bytes("terminal", f.tell() - start)
@@ -1,81 +1,230 @@
 # validate_logs.py
+# Streaming log validation: every log is read in bounded chunks (CHUNK_ROWS rows, only the
+# columns a check needs, typed by logger/schema.py), one process per file. Trade ids are kept
+# as 64-bit hashes in sorted NumPy arrays (8 bytes/id instead of a Python str in a set), and
+# cross-log alignment is a sorted-merge (np.setdiff1d) over those arrays. Ids for the report
+# samples are recovered with a second streaming pass over the one file concerned. A 64-bit hash
+# collision could hide one mismatch in ~10^19 id pairs.
+#
+#   python validate_logs.py [--chunk-rows 200000] [--workers 4]
+import argparse
+import multiprocessing as mp
 import os
+import time
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from config import JOURNAL_PATH, TRADE_LOG_PATH, BALANCE_LOG_PATH
-ML_LOG_PATH = "ml_log.csv"
+from config import JOURNAL_PATH, TRADE_LOG_PATH, BALANCE_LOG_PATH, ML_LOG_FILE
+from logger.schema import read_log
+ML_LOG_PATH = ML_LOG_FILE
+
+CHUNK_ROWS = 200_000
+SAMPLE = 10
+_JOURNAL_NEED = {"timestamp","trade_id","symbol","side","entry_price","exit_price","status","exit_reason","pnl"}
 
 def _exists(p): return os.path.exists(p) and os.path.getsize(p) > 0
-def _read(p): 
-    try: return pd.read_csv(p, encoding="utf-8")
-    except Exception: return None
 
-def main():
+def _hash_ids(s: pd.Series) -> np.ndarray:
+    s = s.dropna().astype(str).str.strip()
+    s = s[s != ""]
+    return pd.util.hash_array(s.to_numpy(dtype=object), categorize=False)
+
+def _sorted_ids(parts: list) -> tuple:
+    """(unique sorted hashes, duplicate rows) of the per-chunk hash arrays."""
+    ids = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.uint64)
+    dup = ids[1:] == ids[:-1]
+    return ids[np.concatenate(([True], ~dup))] if len(ids) else ids, int(dup.sum())
+
+def _chunks(kind: str, path: str, columns, chunk_rows: int):
+    """(header columns, chunk iterator over the wanted columns that exist; None = all)."""
+    header = pd.read_csv(path, nrows=0, encoding="utf-8").columns
+    return list(header), read_log(kind, path, columns, chunksize=chunk_rows)
+
+
+# ---------- per-file scans (worker processes) ----------
+def _scan_journal(path, chunk_rows):
+    cols, reader = _chunks("journal", path, ["trade_id", "status", "pnl", "exit_reason"], chunk_rows)
+    out = {"missing": _JOURNAL_NEED - set(cols), "rows": 0, "closed_rows": 0, "big_pnl": 0, "sl": 0}
+    closed_parts = []
+    for chunk in reader:
+        out["rows"] += len(chunk)
+        closed = chunk[chunk["status"].str.lower() == "closed"] if "status" in chunk else chunk
+        out["closed_rows"] += len(closed)
+        if "pnl" in chunk:
+            out["big_pnl"] += int((chunk["pnl"].fillna(0).abs() > 20).sum())
+        if "exit_reason" in chunk:
+            out["sl"] += int((chunk["exit_reason"].str.lower() == "sl").sum())
+        if "trade_id" in closed:
+            closed_parts.append(_hash_ids(closed["trade_id"]))
+    out["has_exit_reason"] = "exit_reason" in cols
+    out["closed_ids"], out["closed_dups"] = _sorted_ids(closed_parts)
+    return out
+
+def _scan_trade_log(path, chunk_rows):
+    cols, reader = _chunks("trade_log", path, ["trade_id", "status"], chunk_rows)
+    # legacy logs without these columns: rows are still counted, only the open/close pairing is skipped
+    out = {"rows": 0, "missing": {"trade_id", "status"} - set(cols)}
+    opens, closes = [], []
+    for chunk in reader:
+        out["rows"] += len(chunk)
+        if out["missing"]:
+            continue
+        status = chunk["status"].str.lower()
+        opens.append(_hash_ids(chunk.loc[status == "open", "trade_id"]))
+        closes.append(_hash_ids(chunk.loc[status == "closed", "trade_id"]))
+    out["open_ids"], out["open_dups"] = _sorted_ids(opens)
+    out["closed_ids"], out["closed_dups"] = _sorted_ids(closes)
+    return out
+
+def _scan_ml_log(path, chunk_rows):
+    cols, reader = _chunks("ml_log", path, ["id"], chunk_rows)
+    out = {"rows": 0, "cols": cols}
+    parts = []
+    for chunk in reader:
+        out["rows"] += len(chunk)
+        if "id" in chunk:
+            parts.append(_hash_ids(chunk["id"]))
+    out["ids"], out["dups"] = _sorted_ids(parts)
+    return out
+
+def _scan_balance(path, chunk_rows):
+    _, reader = _chunks("balance", path, None, chunk_rows)
+    out = {"rows": 0, "last": None}
+    for chunk in reader:
+        out["rows"] += len(chunk)
+        if len(chunk):
+            out["last"] = chunk.tail(1).to_dict("records")[0]
+    return out
+
+_SCANNERS = {"journal": _scan_journal, "trade_log": _scan_trade_log, "ml_log": _scan_ml_log, "balance": _scan_balance}
+
+def _scan(task):
+    kind, path, chunk_rows = task
+    t0 = time.perf_counter()
+    try:
+        out = _SCANNERS[kind](path, chunk_rows)
+    except Exception as e:
+        out = {"error": str(e), "rows": 0}
+    out["sec"] = time.perf_counter() - t0
+    return kind, out
+
+
+def _sample_ids(kind, path, col, wanted, chunk_rows, status=None, k=SAMPLE):
+    """First k ids in `path` whose hash is in `wanted` (second streaming pass, for the report)."""
+    found = []
+    if not len(wanted):
+        return found
+    _, reader = _chunks(kind, path, [col, "status"], chunk_rows)
+    for chunk in reader:
+        if status is not None and "status" in chunk:
+            chunk = chunk[chunk["status"].str.lower() == status]
+        ids = chunk[col].dropna().astype(str).str.strip()
+        ids = ids[ids != ""]
+        hit = np.isin(pd.util.hash_array(ids.to_numpy(dtype=object), categorize=False), wanted)
+        found.extend(x for x in ids[hit] if x not in found)
+        if len(found) >= k:
+            break
+    return found[:k]
+
+
+def _open_position_ids() -> np.ndarray:
+    """Trades legitimately still open (open_positions.json) — not an "open without close" error."""
+    from logger.open_positions_store import load_open_positions
+    ids = pd.Series([p.get("trade_id") for p in load_open_positions()], dtype=object)
+    return np.unique(_hash_ids(ids))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Validate TitanBot-Paper logs (streaming, chunked).")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows per chunk (bounds memory)")
+    ap.add_argument("--workers", type=int, default=0, help="processes (default: one per log, up to all cores)")
+    args = ap.parse_args(argv)
+
     report = []
-    def add(x): 
+    def add(x):
         print(x); report.append(x)
 
     add("=== TitanBot-Paper Log Validation ===")
+    paths = {"journal": JOURNAL_PATH, "trade_log": TRADE_LOG_PATH, "ml_log": ML_LOG_PATH, "balance": BALANCE_LOG_PATH}
+    tasks = [(k, p, args.chunk_rows) for k, p in paths.items() if _exists(p)]
+    t0 = time.perf_counter()
+    res = {}
+    if tasks:
+        workers = max(1, min(len(tasks), args.workers or os.cpu_count() or 1))
+        if workers == 1:
+            res = dict(_scan(t) for t in tasks)
+        else:
+            with mp.get_context("spawn").Pool(processes=workers) as pool:
+                res = dict(pool.imap_unordered(_scan, tasks))
+
+    def status(kind, label):
+        if kind not in res:
+            add(f"[{label}] MISSING: {paths[kind]}")
+            return None
+        r = res[kind]
+        if "error" in r:
+            add(f"[{label}] unreadable: {r['error']}")
+            return None
+        if not r["rows"]:
+            add(f"[{label}] EMPTY.")
+            return None
+        return r
 
     # JOURNAL
-    if _exists(JOURNAL_PATH):
-        jdf = _read(JOURNAL_PATH)
-        if jdf is None or jdf.empty:
-            add("[JOURNAL] EMPTY or unreadable.")
-        else:
-            need = {"timestamp","trade_id","symbol","side","entry_price","exit_price","status","exit_reason","pnl"}
-            missing = need - set(jdf.columns)
-            add(f"[JOURNAL] rows={len(jdf)} missing={missing}")
-            closed = jdf[jdf["status"].astype(str).str.lower()=="closed"] if "status" in jdf.columns else jdf
-            add(f"[JOURNAL] closed_rows={len(closed)}")
-            if "pnl" in jdf.columns:
-                pnl = pd.to_numeric(jdf["pnl"], errors="coerce").fillna(0)
-                bad = pnl.abs() > 20
-                add(f"[JOURNAL] |pnl|>20% rows={int(bad.sum())}")
-            if "exit_reason" in jdf.columns:
-                er = jdf["exit_reason"].astype(str).str.lower()
-                if (er=="sl").sum()==0:
-                    add("[JOURNAL] ⚠️ No SL detected in entire journal.")
-    else:
-        add(f"[JOURNAL] MISSING: {JOURNAL_PATH}")
-        jdf = None
-
-    # TRADE LOG
-    if _exists(TRADE_LOG_PATH):
-        tdf = _read(TRADE_LOG_PATH)
-        add(f"[TRADE_LOG] rows={0 if tdf is None else len(tdf)}")
-    else:
-        add(f"[TRADE_LOG] MISSING: {TRADE_LOG_PATH}")
+    j = status("journal", "JOURNAL")
+    if j:
+        add(f"[JOURNAL] rows={j['rows']} missing={j['missing'] or set()}")
+        add(f"[JOURNAL] closed_rows={j['closed_rows']} duplicate_closed_ids={j['closed_dups']}")
+        add(f"[JOURNAL] |pnl|>20% rows={j['big_pnl']}")
+        if j["has_exit_reason"] and j["sl"] == 0:
+            add("[JOURNAL] ⚠️ No SL detected in entire journal.")
+
+    # TRADE LOG: every open has exactly one close and vice versa
+    t = status("trade_log", "TRADE_LOG")
+    if t and t["missing"]:
+        add(f"[TRADE_LOG] rows={t['rows']} missing={t['missing']} (open/close pairing skipped)")
+        t = None
+    if t:
+        add(f"[TRADE_LOG] rows={t['rows']} opens={len(t['open_ids'])} closes={len(t['closed_ids'])} "
+            f"duplicate_opens={t['open_dups']} duplicate_closes={t['closed_dups']}")
+        unclosed = np.setdiff1d(t["open_ids"], t["closed_ids"], assume_unique=True)
+        still_open = np.intersect1d(unclosed, _open_position_ids(), assume_unique=True)
+        orphan_opens = np.setdiff1d(unclosed, still_open, assume_unique=True)
+        orphan_closes = np.setdiff1d(t["closed_ids"], t["open_ids"], assume_unique=True)
+        add(f"[TRADE_LOG] open rows with no close: {len(orphan_opens)} (+{len(still_open)} still open)")
+        if len(orphan_opens):
+            add("  sample: " + ", ".join(_sample_ids("trade_log", TRADE_LOG_PATH, "trade_id", orphan_opens, args.chunk_rows, "open")))
+        add(f"[TRADE_LOG] closes with no open: {len(orphan_closes)}")
+        if len(orphan_closes):
+            add("  sample: " + ", ".join(_sample_ids("trade_log", TRADE_LOG_PATH, "trade_id", orphan_closes, args.chunk_rows, "closed")))
 
     # ML LOG
-    if _exists(ML_LOG_PATH):
-        mdf = _read(ML_LOG_PATH)
-        if mdf is None or mdf.empty:
-            add("[ML_LOG] EMPTY or unreadable.")
-        else:
-            add(f"[ML_LOG] rows={len(mdf)} cols={list(mdf.columns)}")
-            # alignment with journal closed trades
-            if jdf is not None and "trade_id" in jdf.columns and "id" in mdf.columns:
-                closed_ids = set(jdf[jdf["status"].astype(str).str.lower()=="closed"]["trade_id"].dropna().astype(str))
-                ml_ids = set(mdf["id"].dropna().astype(str))
-                missing = closed_ids - ml_ids
-                add(f"[ALIGN] Closed trades missing in ML log: {len(missing)}")
-                if missing:
-                    add("  sample: " + ", ".join(list(missing)[:10]))
-    else:
-        add(f"[ML_LOG] MISSING: {ML_LOG_PATH}")
+    m = status("ml_log", "ML_LOG")
+    if m:
+        add(f"[ML_LOG] rows={m['rows']} cols={m['cols']} duplicate_ids={m['dups']}")
+
+    # ALIGNMENT (sorted-merge on hashed trade ids)
+    if j and m:
+        missing = np.setdiff1d(j["closed_ids"], m["ids"], assume_unique=True)
+        add(f"[ALIGN] Closed trades missing in ML log: {len(missing)}")
+        if len(missing):
+            add("  sample: " + ", ".join(_sample_ids("journal", JOURNAL_PATH, "trade_id", missing, args.chunk_rows, "closed")))
+    if j and t:
+        add(f"[ALIGN] Trade-log closes missing in journal: "
+            f"{len(np.setdiff1d(t['closed_ids'], j['closed_ids'], assume_unique=True))} | "
+            f"journal closes missing in trade log: {len(np.setdiff1d(j['closed_ids'], t['closed_ids'], assume_unique=True))}")
 
     # BALANCE
-    if _exists(BALANCE_LOG_PATH):
-        bdf = _read(BALANCE_LOG_PATH)
-        if bdf is not None and not bdf.empty:
-            add(f"[BALANCE] rows={len(bdf)} last={bdf.tail(1).to_dict('records')[0]}")
-        else:
-            add("[BALANCE] EMPTY or unreadable.")
-    else:
-        add(f"[BALANCE] MISSING: {BALANCE_LOG_PATH}")
+    b = status("balance", "BALANCE")
+    if b:
+        add(f"[BALANCE] rows={b['rows']} last={b['last']}")
 
+    rows = sum(r["rows"] for r in res.values())
+    secs = time.perf_counter() - t0
+    for kind, r in sorted(res.items()):
+        add(f"[PERF] {kind}: {r['rows']} rows in {r['sec']:.2f}s ({r['rows'] / max(r['sec'], 1e-9):,.0f} rows/s)")
+    add(f"[PERF] total: {rows} rows in {secs:.2f}s ({rows / max(secs, 1e-9):,.0f} rows/s)")
     add("=== Validation complete ===")
+    return report
 
 if __name__ == "__main__":
     main()